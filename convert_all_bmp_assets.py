@@ -1,55 +1,393 @@
+import argparse
+import hashlib
+import json
 import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 from PIL import Image
 
 
-def bmp_to_rgb565 (bmp_file, output_file):
-    """Convierte un archivo BMP a RGB565 y lo guarda en output_file."""
-    # Abre la imagen BMP
-    img = Image.open(bmp_file)
+# Cabecera de los iconos comprimidos: "R5", ancho y alto (1 byte cada uno)
+RLE565_MAGIC = b"R5"
+
+# Cabecera de los iconos con paleta: "P4", ancho, alto y nº de colores
+P4_MAGIC = b"P4"
+
+# Formatos de salida y extensión de los archivos generados
+OUTPUT_EXTENSIONS = {
+    "p4": ".p4",
+    "rle565": ".rle565",
+    "rgb565": ".rgb565",
+}
+
+# Manifiesto con el sha256 de cada BMP convertido para omitir los que no
+# cambian. Subir la versión cuando cambie la salida de algún codificador.
+MANIFEST_NAME = ".convert_manifest.json"
+CONVERTER_VERSION = 1
+
+
+def to_rgb565 (img):
+    """
+    Devuelve un array de NumPy (alto, ancho) con el color RGB565 de cada
+    píxel de la imagen, calculado de una vez para todos los píxeles.
+    """
+    rgb = np.asarray(img.convert("RGB"), dtype=np.uint16)
+
+    return ((rgb[..., 0] & 0xF8) << 8) | ((rgb[..., 1] & 0xFC) << 3) | (rgb[..., 2] >> 3)
+
+
+def read_rgb565_pixels (bmp_file):
+    """Devuelve (ancho, alto, array plano de píxeles RGB565) de un archivo BMP."""
+    with Image.open(bmp_file) as img:
+        pixels = to_rgb565(img)
+
+    height, width = pixels.shape
+
+    return width, height, pixels.ravel()
+
+
+def encode_rle565 (width, height, pixels):
+    """
+    Codifica píxeles RGB565 en formato RLE tipo PackBits:
+
+    - Cabecera: "R5", ancho (1 byte), alto (1 byte).
+    - Byte de control c con el bit 7 activo: repetición de (c & 0x7F) + 1
+      píxeles del color de los 2 bytes siguientes (big endian).
+    - Byte de control c con el bit 7 a 0: c + 1 píxeles literales a
+      continuación (2 bytes cada uno).
+    """
+    if width > 255 or height > 255:
+        raise ValueError("El formato RLE565 admite como máximo 255x255 píxeles")
+
+    out = bytearray(RLE565_MAGIC)
+    out.append(width)
+    out.append(height)
+
+    # Se recorren tramos de píxeles iguales en lugar de píxeles sueltos
+    values, lengths = find_runs(pixels)
+    literals = []
+
+    for value, length in zip(values.tolist(), lengths.tolist()):
+        # Repeticiones de 2 a 128 píxeles, si sobra uno pasa a literales
+        while length >= 2:
+            count = min(length, 128)
+            append_literals(out, literals)
+            out.append(0x80 | (count - 1))
+            out += bytes([value >> 8, value & 0xFF])
+            length -= count
+
+        if length:
+            literals.append(value)
+
+    append_literals(out, literals)
+
+    return out
+
+
+def find_runs (pixels):
+    """
+    Devuelve (valores, longitudes) de los tramos de píxeles consecutivos
+    iguales, calculados con NumPy.
+    """
+    pixels = np.asarray(pixels, dtype=np.uint16)
+
+    if not len(pixels):
+        return pixels, np.zeros(0, dtype=np.int64)
 
-    # Convierte la imagen a RGB
+    starts = np.flatnonzero(np.concatenate(([True], pixels[1:] != pixels[:-1])))
+    lengths = np.diff(np.append(starts, len(pixels)))
+
+    return pixels[starts], lengths
+
+
+def append_literals (out, literals):
+    """Añade a out los píxeles pendientes en bloques literales de hasta 128 y vacía la lista."""
+    for start in range(0, len(literals), 128):
+        chunk = literals[start:start + 128]
+        out.append(len(chunk) - 1)
+        out += np.asarray(chunk, dtype=">u2").tobytes()
+
+    literals.clear()
+
+
+def rgb_to_565 (r, g, b):
+    return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
+
+
+def encode_p4 (img):
+    """
+    Cuantiza una imagen a una paleta de 16 colores como máximo y la codifica
+    con índices de 4 bits:
+
+    - Cabecera: "P4", ancho (1 byte), alto (1 byte), nº de colores (1 byte).
+    - Paleta: 2 bytes RGB565 (big endian) por color.
+    - Índices: dos píxeles por byte, el primero en el nibble alto. Si el
+      total de píxeles es impar el último nibble queda a 0.
+    """
     img = img.convert("RGB")
 
-    # Obtiene los píxeles de la imagen
-    pixels = img.load()
+    if img.width > 255 or img.height > 255:
+        raise ValueError("El formato P4 admite como máximo 255x255 píxeles")
 
-    # Abre el archivo de salida
-    with open(output_file, 'wb') as f:
-        for y in range(img.height):
-            for x in range(img.width):
-                r, g, b = pixels[x, y]
-                # Convierte el color RGB a RGB565
-                rgb565 = ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
-                # Escribe los bytes en el archivo
-                f.write(bytes([rgb565 >> 8, rgb565 & 0xFF]))
+    # Las imágenes con pocos colores se conservan exactas
+    colors = img.getcolors(16)
 
-    print(f"Imagen convertida: {bmp_file} -> {output_file}")
+    if colors is not None:
+        palette = [color for _, color in sorted(colors, key=lambda c: -c[0])]
+        rgb = np.asarray(img, dtype=np.uint32).reshape(-1, 3)
 
+        # Cada color como un entero de 24 bits para buscarlo en la paleta
+        keys = (rgb[:, 0] << 16) | (rgb[:, 1] << 8) | rgb[:, 2]
+        palette_keys = np.array([(r << 16) | (g << 8) | b for r, g, b in palette],
+                                dtype=np.uint32)
+        order = np.argsort(palette_keys)
+        indices = order[np.searchsorted(palette_keys[order], keys)].astype(np.uint8)
+    else:
+        quantized = img.quantize(colors=16, method=Image.Quantize.MEDIANCUT,
+                                 dither=Image.Dither.NONE)
+        flat = quantized.getpalette()[:16 * 3]
+        palette = [tuple(flat[i:i + 3]) for i in range(0, len(flat), 3)]
+        indices = np.frombuffer(quantized.tobytes(), dtype=np.uint8)
+        palette = palette[:int(indices.max()) + 1]
 
-def convert_all_bmps_in_directory (source_dir, output_dir):
-    """Convierte todos los archivos BMP en el directorio source_dir a formato RGB565 y los guarda en output_dir."""
+    out = bytearray(P4_MAGIC)
+    out += bytes([img.width, img.height, len(palette)])
 
-    # Asegúrate de que el directorio de salida exista
-    if not os.path.exists(output_dir):
-        os.makedirs(output_dir)
+    colors565 = np.array([rgb_to_565(r, g, b) for r, g, b in palette], dtype=">u2")
+    out += colors565.tobytes()
+
+    if len(indices) % 2:
+        indices = np.append(indices, np.uint8(0))
+
+    # Dos índices por byte, el primero en el nibble alto
+    out += ((indices[0::2] << 4) | indices[1::2]).astype(np.uint8).tobytes()
+
+    return out
+
+
+def bmp_to_rle565 (bmp_file):
+    """
+    Convierte un archivo BMP a RGB565 comprimido con RLE.
+
+    Returns:
+        tuple: (bytes en RGB565 sin comprimir, datos del archivo RLE)
+    """
+    width, height, pixels = read_rgb565_pixels(bmp_file)
+
+    return width * height * 2, encode_rle565(width, height, pixels)
+
+
+def bmp_to_p4 (bmp_file):
+    """
+    Convierte un archivo BMP a un icono con paleta de 16 colores e índices
+    de 4 bits.
+
+    Returns:
+        tuple: (bytes en RGB565 sin comprimir, datos del archivo P4)
+    """
+    with Image.open(bmp_file) as img:
+        return img.width * img.height * 2, encode_p4(img)
+
+
+def bmp_to_rgb565 (bmp_file):
+    """
+    Convierte un archivo BMP a RGB565 sin comprimir (big endian).
+
+    Returns:
+        tuple: (bytes en RGB565, datos del archivo)
+    """
+    with Image.open(bmp_file) as img:
+        data = to_rgb565(img).astype(">u2").tobytes()
+
+    return len(data), data
+
+
+# Función de conversión de cada formato de salida
+CONVERTERS = {
+    "p4": bmp_to_p4,
+    "rle565": bmp_to_rle565,
+    "rgb565": bmp_to_rgb565,
+}
+
+
+def file_hash (path):
+    """Devuelve el sha256 en hexadecimal del contenido de un archivo o None si no existe."""
+    try:
+        with open(path, "rb") as f:
+            return hashlib.sha256(f.read()).hexdigest()
+    except FileNotFoundError:
+        return None
+
+
+def load_manifest (path):
+    """Lee el manifiesto de conversiones, vacío si no existe o no es válido."""
+    try:
+        with open(path) as f:
+            manifest = json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+    return manifest if isinstance(manifest, dict) else {}
+
+
+def save_manifest (path, manifest):
+    with open(path, "w") as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+        f.write("\n")
+
+
+def is_up_to_date (entry, source_hash, output_file, output_format):
+    """
+    Indica si la entrada del manifiesto corresponde al BMP actual, con el
+    mismo formato y versión del conversor, y el archivo generado sigue
+    intacto.
+    """
+    return (entry is not None
+            and entry.get("version") == CONVERTER_VERSION
+            and entry.get("format") == output_format
+            and entry.get("source") == source_hash
+            and entry.get("output") == file_hash(output_file))
+
+
+def convert_file (task):
+    """
+    Convierte un BMP y guarda el resultado. Se ejecuta en los procesos del
+    pool, por eso recibe y devuelve tuplas.
+
+    :param task: (ruta del BMP, ruta de salida, formato)
+    :return: (ruta del BMP, ruta de salida, bytes RGB565, bytes generados,
+              sha256 del archivo generado)
+    """
+    bmp_file, output_file, output_format = task
+    raw_size, data = CONVERTERS[output_format](bmp_file)
+
+    with open(output_file, "wb") as f:
+        f.write(data)
+
+    return bmp_file, output_file, raw_size, len(data), hashlib.sha256(data).hexdigest()
+
+
+def convert_all_bmps_in_directory (source_dir, output_dir, output_format="p4",
+                                   manifest_path=None, jobs=None, force=False,
+                                   check=False):
+    """
+    Convierte todos los archivos BMP en el directorio source_dir al formato
+    indicado (p4, rle565 o rgb565) y los guarda en output_dir.
+
+    Los BMP sin cambios desde la última conversión (según el sha256 guardado
+    en el manifiesto) se omiten y el resto se convierten en paralelo.
+
+    :param manifest_path: Ruta del manifiesto, por defecto MANIFEST_NAME en
+                          source_dir (fuera de output_dir para no subirlo a
+                          la placa).
+    :param jobs: Procesos del pool, por defecto uno por CPU.
+    :param force: Convierte todos los BMP aunque no hayan cambiado.
+    :param check: No convierte nada, solo muestra los BMP pendientes.
+    :return: Cantidad de BMP pendientes (check) o convertidos.
+    """
+    extension = OUTPUT_EXTENSIONS[output_format]
+
+    if manifest_path is None:
+        manifest_path = os.path.join(source_dir, MANIFEST_NAME)
+
+    manifest = load_manifest(manifest_path)
+    pending = []
 
     # Recorre todos los archivos en el directorio source_dir
-    for filename in os.listdir(source_dir):
-        if filename.endswith(".bmp"):
-            # Ruta completa al archivo BMP
-            bmp_file = os.path.join(source_dir, filename)
+    for filename in sorted(os.listdir(source_dir)):
+        if not filename.endswith(".bmp"):
+            continue
+
+        # Ruta completa al archivo BMP
+        bmp_file = os.path.join(source_dir, filename)
+
+        # El nombre de salida tendrá la misma base con la extensión del formato
+        output_filename = os.path.splitext(filename)[0] + extension
+        output_file = os.path.join(output_dir, output_filename)
+
+        if force or not is_up_to_date(manifest.get(filename), file_hash(bmp_file),
+                                      output_file, output_format):
+            pending.append((bmp_file, output_file, output_format))
+
+    if check:
+        for bmp_file, output_file, _ in pending:
+            print(f"Pendiente: {bmp_file} -> {output_file}")
+
+        print(f"{len(pending)} imágenes pendientes de convertir")
+
+        return len(pending)
+
+    if not pending:
+        print("Todas las imágenes están actualizadas")
+
+        return 0
+
+    # Asegúrate de que el directorio de salida exista
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = jobs or os.cpu_count() or 1
+
+    # Con una sola imagen o un proceso no compensa arrancar el pool
+    if jobs > 1 and len(pending) > 1:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(pending))) as pool:
+            results = list(pool.map(convert_file, pending))
+    else:
+        results = [convert_file(task) for task in pending]
+
+    total_raw = 0
+    total_out = 0
+
+    for bmp_file, output_file, raw_size, out_size, output_hash in results:
+        print(f"Imagen convertida: {bmp_file} -> {output_file} "
+              f"({raw_size} -> {out_size} bytes, {out_size / raw_size:.1%})")
+
+        manifest[os.path.basename(bmp_file)] = {
+            "version": CONVERTER_VERSION,
+            "format": output_format,
+            "source": file_hash(bmp_file),
+            "output": output_hash,
+        }
+
+        total_raw += raw_size
+        total_out += out_size
+
+    save_manifest(manifest_path, manifest)
+
+    print(f"Total: {total_raw} -> {total_out} bytes ({total_out / total_raw:.1%}), "
+          f"{len(results)} convertidas")
+
+    return len(results)
+
 
-            # El nombre de salida tendrá la misma base pero con extensión .rgb565
-            output_filename = os.path.splitext(filename)[0] + ".rgb565"
-            output_file = os.path.join(output_dir, output_filename)
+def main ():
+    parser = argparse.ArgumentParser(
+        description="Convierte los BMP de assets/ al formato de la pantalla.")
+    parser.add_argument("--source", default="assets",
+                        help="Directorio donde están los archivos .bmp")
+    parser.add_argument("--output", default="src/images",
+                        help="Directorio donde se guardarán los iconos convertidos")
+    parser.add_argument("--format", default="p4", choices=sorted(CONVERTERS),
+                        help="p4 (paleta 16 colores), rle565 o rgb565 sin comprimir")
+    parser.add_argument("--manifest", default=None,
+                        help=f"Manifiesto de conversiones (por defecto SOURCE/{MANIFEST_NAME})")
+    parser.add_argument("--jobs", type=int, default=None,
+                        help="Procesos en paralelo, por defecto uno por CPU")
+    parser.add_argument("--force", action="store_true",
+                        help="Convierte todo aunque no haya cambios")
+    parser.add_argument("--check", action="store_true",
+                        help="Solo comprueba, termina con error si hay imágenes pendientes")
+    args = parser.parse_args()
 
-            # Convierte el BMP a RGB565 y guarda en la ruta de salida
-            bmp_to_rgb565(bmp_file, output_file)
+    pending = convert_all_bmps_in_directory(args.source, args.output, args.format,
+                                            manifest_path=args.manifest,
+                                            jobs=args.jobs, force=args.force,
+                                            check=args.check)
 
+    if args.check and pending:
+        sys.exit(1)
 
-# Directorios de entrada y salida
-source_directory = "assets"  # Directorio donde están los archivos .bmp
-output_directory = "src/images"  # Directorio donde se guardarán los archivos .rgb565
 
-# Convierte todos los BMP del directorio "assets" y guárdalos en "src/images"
-convert_all_bmps_in_directory(source_directory, output_directory)
+if __name__ == "__main__":
+    main()
@@ -19,7 +19,11 @@ DEVICE_ID = 0
 
 # Configuración de la pantalla.
 DISPLAY_ORIENTATION = 3
+DISPLAY_GRID_SHAPE = (3, 3) # (filas, columnas). En vertical (2 y 4) también (2, 3) o (4, 2)
 DISPLAY_TIMEOUT = 180 # Minutos para apagar la pantalla automáticamente
+DISPLAY_FRAMEBUFFER = False # Dibuja en RAM (40 KB) y envía solo las zonas modificadas
+DISPLAY_WORKER = False # Renderiza la pantalla en el segundo núcleo (núcleo 1)
+DISPLAY_PAGE_SECONDS = 0 # Segundos para alternar grid e historial (solo apaisado), 0 desactiva
 
 # Indica si está en modo debug la aplicación
 DEBUG = False
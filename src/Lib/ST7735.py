@@ -4,8 +4,9 @@
 #  ST7735.py
 #
 from machine import Pin
+import framebuf
+import sys
 import time
-import math
 
 # constants
 DELAY = 0x80
@@ -32,6 +33,8 @@ ST7735_RAMWR = 0x2C
 ST7735_RAMRD = 0x2E
 
 ST7735_PTLAR = 0x30
+ST7735_VSCRDEF = 0x33
+ST7735_VSCSAD = 0x37
 ST7735_COLMOD = 0x3A
 ST7735_MADCTL = 0x36
 
@@ -68,8 +71,66 @@ ST7735_MADCTL_BGR = 0x08
 ST7735_MADCTL_MH = 0x04
 
 
+def _expand_p4_python(src, start, count, palette, dst):
+    # Convierte count bytes de índices de 4 bits (dos píxeles por byte,
+    # primero el nibble alto) en píxeles RGB565 usando la paleta
+    d = 0
+    for i in range(start, start + count):
+        b = src[i]
+        hi = (b >> 4) << 1
+        lo = (b & 0x0F) << 1
+        dst[d] = palette[hi]
+        dst[d + 1] = palette[hi + 1]
+        dst[d + 2] = palette[lo]
+        dst[d + 3] = palette[lo + 1]
+        d += 4
+
+
+_expand_p4 = _expand_p4_python
+
+# En la placa se usa el emisor viper, que genera código máquina directo
+if sys.implementation.name == 'micropython':
+    import micropython
+
+    @micropython.viper
+    def _expand_p4_viper(src: ptr8, start: int, count: int, palette: ptr8, dst: ptr8):
+        d = 0
+        i = start
+        end = start + count
+        while i < end:
+            b = src[i]
+            hi = (b >> 4) << 1
+            lo = (b & 0x0F) << 1
+            dst[d] = palette[hi]
+            dst[d + 1] = palette[hi + 1]
+            dst[d + 2] = palette[lo]
+            dst[d + 3] = palette[lo + 1]
+            d += 4
+            i += 1
+
+    _expand_p4 = _expand_p4_viper
+
+
+# Píxeles sin cambios que se admiten al unir dos rectángulos sucios: lo que
+# cuesta abrir otra ventana (CASET, RASET y RAMWR) o una cuarta parte de sus
+# áreas, lo que sea mayor
+_MERGE_SLACK = 16
+
+
+def _merge_waste(r, x0, y0, x1, y1):
+    # Píxeles de más que se enviarían al unir r con el rectángulo dado,
+    # menos el margen admitido. <= 0 si compensa unirlos
+    parts = (r[2] - r[0] + 1) * (r[3] - r[1] + 1) + (x1 - x0 + 1) * (y1 - y0 + 1)
+    merged = ((max(x1, r[2]) - min(x0, r[0]) + 1)
+              * (max(y1, r[3]) - min(y0, r[1]) + 1))
+    return merged - parts - max(parts >> 2, _MERGE_SLACK)
+
+
 class ST7735():
-    def __init__(self, spi, rst=4, ce=5, dc=16, offset=0, c_mode='RGB', color = 0, background=0x000):
+    # Máximo de rectángulos sucios, por encima se unen los más cercanos
+    MAX_DIRTY_RECTS = 16
+
+    def __init__(self, spi, rst=4, ce=5, dc=16, offset=0, c_mode='RGB', color = 0, background=0x000, framebuffer=False, fill_buffer_bytes=512):
         self._rst = Pin(rst, Pin.OUT)   	# 4
         self._ce = Pin(ce, Pin.OUT)    		# 5
         self._ce.high()
@@ -91,24 +152,82 @@ class ST7735():
         # SPI
         self._spi = spi
 
+        # Buffers preasignados para comandos y argumentos de la ventana
+        self._cmd_buf = bytearray(1)
+        self._arg_buf = bytearray(4)
+
+        # Buffer de relleno reutilizable con el patrón del último color usado.
+        # Tamaño par y al menos un píxel, con menos draw_block() fallaría
+        self._fill_buf = bytearray(max(2, fill_buffer_bytes & ~1))
+        self._fill_view = memoryview(self._fill_buf)
+        self._fill_color = None
+
+        # Buffer de línea para imágenes que se decodifican al vuelo
+        self._line_buf = bytearray(max(ST7735_TFTWIDTH, ST7735_TFTHEIGHT) * 2)
+        self._line_view = memoryview(self._line_buf)
+
+        # Ventana abierta con begin_write(): [x, y, w, h, bytes escritos]
+        self._window = None
+
+        # Framebuffer en RAM opcional (160x128x2 = 40 KB), ver enable_framebuffer()
+        self._fb = None
+        self._fb_buf = None
+        self._fb_view = None
+        self._dirty = []
+        if framebuffer:
+            self.enable_framebuffer()
+
     def command(self, c):
-        b = bytearray(1)
-        b[0] = c
+        self._cmd_buf[0] = c
         self._dc.low()
         self._ce.low()
-        self._spi.write(b)     # write 1 byte on MOSI
+        self._spi.write(self._cmd_buf)     # write 1 byte on MOSI
         self._ce.high()
         # print ('C {0:2x}'.format(c))
 
     def data(self, c):
-        b = bytearray(1)
-        b[0] = c
+        self._cmd_buf[0] = c
         self._dc.high()
         self._ce.low()
-        self._spi.write(b)     # write 1 byte on MOSI
+        self._spi.write(self._cmd_buf)     # write 1 byte on MOSI
         self._ce.high()
         # print ('D {0:2x}'.format(c))
 
+    def _write_command(self, c, args=None):
+        # Envía comando y argumentos sin tocar CS, el llamante lo controla
+        self._cmd_buf[0] = c
+        self._dc.low()
+        self._spi.write(self._cmd_buf)
+        if args is not None and len(args):
+            self._dc.high()
+            self._spi.write(args)
+
+    def write_command(self, c, args=None):
+        # Comando y todos sus argumentos en una sola ráfaga con CS bajo
+        self._ce.low()
+        self._write_command(c, args)
+        self._ce.high()
+
+    def send_commands(self, commands):
+        # Lista de comandos con el formato de begin():
+        # comando, nº de argumentos (| DELAY si espera), argumentos, [ms]
+        commands = memoryview(commands)
+        i = 0
+        end = len(commands)
+        while i < end:
+            c = commands[i]
+            argcount = commands[i + 1] & (0xff ^ DELAY)
+            delay = commands[i + 1] & DELAY
+            i += 2
+            self.write_command(c, commands[i:i + argcount])
+            i += argcount
+            if delay:
+                ms = commands[i]
+                if ms == 255:			# if delay is 255ms make it 500ms
+                    ms = 500
+                time.sleep_ms(ms)
+                i += 1
+
     def reset(self):
         self._rst.low()
         time.sleep_ms(50)        # sleep for 50 milliseconds
@@ -184,83 +303,410 @@ class ST7735():
             0xC0 | self._color_mode
         ])
 
-        argcount = 0
-        cmd = 1
-        delay = 0
-        for c in commands:
-            if argcount == 0:				# no arguments collected
-                if delay:					# if a delay flagged this is delay value
-                    if c == 255:			# if delay is 255ms make it 500ms
-                        c = 500
-                    time.sleep_ms(c)
-                    delay = 0
-                else:
-                    if cmd == 1:					# need to send command byte
-                        self.command(c)			# send coommand
-                        cmd = 0					# clear flag to show command sent
-                    else:
-                        # Clear delay bit and get arguments
-                        argcount = c & (0xff ^ DELAY)
-                        delay = c & DELAY		# set if delay required
-                        cmd = 1					# flag command now complete
-            else:							# arguments to send
-                self.data(c)				# send argument
-                argcount -= 1				# decrement the counter
+        self.send_commands(commands)
 
     # display
-    def set_addr_window(self, x0, y0, x1, y1):
-        self.command(ST7735_CASET)  # Column addr setim
+    def _set_addr_window(self, x0, y0, x1, y1):
+        # CASET, RASET y RAMWR sin tocar CS, el llamante lo controla
+        args = self._arg_buf
+        args[0] = 0x00
+        args[1] = x0 + self._offset     # XSTART
+        args[2] = 0x00
+        args[3] = x1 + self._offset     # XEND
+        self._write_command(ST7735_CASET, args)  # Column addr set
 
-        self.data(0x00)
-        self.data(x0 + self._offset)     # XSTART
-        self.data(0x00)
-        self.data(x1 + self._offset)     # XEND
+        args[1] = y0 + self._offset     # YSTART
+        args[3] = y1 + self._offset     # YEND
+        self._write_command(ST7735_RASET, args)  # Row addr set
 
-        self.command(ST7735_RASET)  # Row addr set
-        self.data(0x00)
-        self.data(y0 + self._offset)     # YSTART
-        self.data(0x00)
-        self.data(y1 + self._offset)     # YEND
+        self._write_command(ST7735_RAMWR)  # write to RAM
 
-        self.command(ST7735_RAMWR)  # write to RAM
+    def set_addr_window(self, x0, y0, x1, y1):
+        self._ce.low()
+        self._set_addr_window(x0, y0, x1, y1)
+        self._ce.high()
 
     def pixel(self, x, y, color):
 
         if (x < 0) or (x >= self._width) or (y < 0) or (y >= self._height):
             return
 
-        self.set_addr_window(x, y, x+1, y+1)
+        if self._fb is not None:
+            self._fb.pixel(x, y, self._swap(color))
+            self._mark_dirty(x, y, x, y)
+            return
 
-        a = (color >> 8)+((color & 0xff) << 8)  # reverse bytes
-        b = bytearray(a.to_bytes(2))
-        self._dc.high()
+        # Byte alto primero, igual que draw_block() y el resto del driver.
+        # La versión original enviaba los dos bytes invertidos y los
+        # píxeles sueltos salían con otro color (ver
+        # tools/check_st7735_color.py)
+        b = self._arg_buf
         self._ce.low()
-        self._spi.write(b)     # write 1 byte on MOSI
+        self._set_addr_window(x, y, x+1, y+1)
+        b[0] = color >> 8
+        b[1] = color & 0xff
+        self._dc.high()
+        self._spi.write(memoryview(b)[:2])     # write 2 bytes on MOSI
         self._ce.high()
 
+    # framebuffer
+    def enable_framebuffer(self):
+        # Todo el dibujado pasa a un framebuffer RGB565 en RAM y solo se
+        # envían por SPI las regiones modificadas al llamar a flush().
+        # Los píxeles se guardan en el orden de bytes de la pantalla
+        # (big endian), por eso los colores se invierten al usar framebuf.
+        if self._fb_buf is None:
+            self._fb_buf = bytearray(ST7735_TFTWIDTH * ST7735_TFTHEIGHT * 2)
+            self._fb_view = memoryview(self._fb_buf)
+        self._fb = framebuf.FrameBuffer(self._fb_buf, self._width, self._height, framebuf.RGB565)
+        self._dirty = []
+
+    def disable_framebuffer(self):
+        self.flush()
+        self._fb = None
+        self._fb_buf = None
+        self._fb_view = None
+
+    def has_framebuffer(self):
+        return self._fb is not None
+
+    def framebuffer(self):
+        # Buffer con la imagen actual (big endian), útil para capturas
+        return self._fb_buf
+
+    def _swap(self, color):
+        return ((color & 0xff) << 8) | (color >> 8)
+
+    def _mark_dirty(self, x0, y0, x1, y1):
+        # Recorta a la pantalla, el dibujado puede empezar fuera de ella
+        if x0 < 0:
+            x0 = 0
+        if y0 < 0:
+            y0 = 0
+        if x1 >= self._width:
+            x1 = self._width - 1
+        if y1 >= self._height:
+            y1 = self._height - 1
+        if x0 > x1 or y0 > y1:
+            return
+
+        # Une el rectángulo con los que apenas añaden píxeles sin cambios
+        # al hacerlo: solaparse o tocarse no basta, dos celdas del grid en
+        # esquinas opuestas tocan a toda la pantalla
+        rects = self._dirty
+        i = 0
+        while i < len(rects):
+            r = rects[i]
+            if _merge_waste(r, x0, y0, x1, y1) <= 0:
+                x0 = min(x0, r[0])
+                y0 = min(y0, r[1])
+                x1 = max(x1, r[2])
+                y1 = max(y1, r[3])
+                rects.pop(i)
+                i = 0
+            else:
+                i += 1
+        rects.append([x0, y0, x1, y1])
+
+        # Demasiados rectángulos, se unen las parejas que menos píxeles
+        # sin cambios añaden hasta volver al máximo
+        while len(rects) > self.MAX_DIRTY_RECTS:
+            best = None
+            best_waste = 0
+            for i in range(len(rects) - 1):
+                a = rects[i]
+                for j in range(i + 1, len(rects)):
+                    waste = _merge_waste(a, *rects[j])
+                    if best is None or waste < best_waste:
+                        best = (i, j)
+                        best_waste = waste
+            i, j = best
+            b = rects.pop(j)
+            a = rects[i]
+            a[0] = min(a[0], b[0])
+            a[1] = min(a[1], b[1])
+            a[2] = max(a[2], b[2])
+            a[3] = max(a[3], b[3])
+
+    def mark_all_dirty(self):
+        if self._fb is not None:
+            self._dirty = [[0, 0, self._width - 1, self._height - 1]]
+
+    def flush(self):
+        # Envía por SPI las regiones modificadas del framebuffer
+        if self._fb is None or not self._dirty:
+            return
+        buf = self._fb_view
+        stride = self._width * 2
+        for x0, y0, x1, y1 in self._dirty:
+            self._ce.low()
+            self._set_addr_window(x0, y0, x1, y1)
+            self._dc.high()
+            if x0 == 0 and x1 == self._width - 1:
+                self._spi.write(buf[y0 * stride:(y1 + 1) * stride])
+            else:
+                start = y0 * stride + x0 * 2
+                length = (x1 - x0 + 1) * 2
+                # Las filas estrechas se agrupan en el buffer de línea para
+                # no hacer una escritura de pocos bytes por fila
+                per_write = len(self._line_buf) // length
+                if per_write > 1:
+                    line = self._line_view
+                    rows = y1 - y0 + 1
+                    while rows:
+                        count = min(rows, per_write)
+                        pos = 0
+                        for _ in range(count):
+                            line[pos:pos + length] = buf[start:start + length]
+                            pos += length
+                            start += stride
+                        self._spi.write(line[:pos])
+                        rows -= count
+                else:
+                    for _ in range(y0, y1 + 1):
+                        self._spi.write(buf[start:start + length])
+                        start += stride
+            self._ce.high()
+        self._dirty = []
+
     def draw_block(self, x, y, w, h, color):
-        size = w * h
-        max_rows = math.floor(500 / h)
-        rows = 0
-        while rows < h:
-            block_rows = min(max_rows, h-rows)
-            b = bytes([color >> 8, color & 0xff])*w*block_rows
-            self.draw_bmp(x, y+rows, w, block_rows, b)
-            rows = rows + max_rows
+        # Recorta el bloque a la pantalla, puede empezar fuera de ella
+        if x < 0:
+            w += x
+            x = 0
+        if y < 0:
+            h += y
+            y = 0
+        if (x >= self._width) or (y >= self._height) or w <= 0 or h <= 0:
+            return
+        if (x + w - 1) >= self._width:
+            w = self._width - x
+        if (y + h - 1) >= self._height:
+            h = self._height - y
+
+        if self._fb is not None:
+            self._fb.fill_rect(x, y, w, h, self._swap(color))
+            self._mark_dirty(x, y, x + w - 1, y + h - 1)
+            return
+
+        pattern = self._fill_pattern(color)
+        chunk = len(pattern)
+        remaining = w * h * 2
+
+        # Una sola ventana y el patrón repetido hasta cubrir el bloque
+        self._ce.low()
+        self._set_addr_window(x, y, x+w-1, y+h-1)
+        self._dc.high()
+        while remaining >= chunk:
+            self._spi.write(pattern)
+            remaining -= chunk
+        if remaining:
+            self._spi.write(pattern[:remaining])
+        self._ce.high()
+
+    def _fill_pattern(self, color):
+        # Rellena el buffer con el color solo cuando cambia respecto al anterior
+        view = self._fill_view
+        if color != self._fill_color:
+            view[0] = color >> 8
+            view[1] = color & 0xff
+            filled = 2
+            size = len(view)
+            while filled < size:
+                n = min(filled, size - filled)
+                view[filled:filled + n] = view[:n]
+                filled += n
+            self._fill_color = color
+        return view
 
     def draw_bmp(self, x, y, w, h, buffer):
         if ((x >= self._width) or (y >= self._height)):
             return
+        stride = w * 2
         if (x + w - 1) >= self._width:
             w = self._width - x
         if (y + h - 1) >= self._height:
             h = self._height - y
-        self.set_addr_window(x, y, x+w-1, y+h-1)
-        self._dc.high()
+        if self._fb is not None:
+            # Copia fila a fila la imagen en el framebuffer, sin las filas
+            # y columnas que quedan fuera por arriba o por la izquierda
+            start = 0
+            if x < 0:
+                start -= x * 2
+                w += x
+                x = 0
+            if y < 0:
+                start -= y * stride
+                h += y
+                y = 0
+            if w <= 0 or h <= 0:
+                return
+            fb = self._fb_view
+            src = memoryview(buffer)
+            length = w * 2
+            dst = (y * self._width + x) * 2
+            fb_stride = self._width * 2
+            for _ in range(h):
+                fb[dst:dst + length] = src[start:start + length]
+                dst += fb_stride
+                start += stride
+            self._mark_dirty(x, y, x + w - 1, y + h - 1)
+            return
         self._ce.low()
+        self._set_addr_window(x, y, x+w-1, y+h-1)
+        self._dc.high()
         self._spi.write(buffer)     # write bytes on MOSI
         self._ce.high()
 
+    def begin_write(self, x, y, w, h):
+        # Abre una ventana para enviar su contenido en varios trozos con
+        # write_data(). La ventana debe caber entera en la pantalla.
+        if x < 0 or y < 0 or (x + w) > self._width or (y + h) > self._height:
+            return False
+        if self._fb is not None:
+            self._window = [x, y, w, h, 0]
+            return True
+        self._ce.low()
+        self._set_addr_window(x, y, x+w-1, y+h-1)
+        self._dc.high()
+        return True
+
+    def write_data(self, buffer):
+        if self._fb is None:
+            self._spi.write(buffer)
+            return
+        # Copia en el framebuffer continuando donde quedó la ventana
+        x, y, w, h, offset = self._window
+        fb = self._fb_view
+        src = memoryview(buffer)
+        row_bytes = w * 2
+        stride = self._width * 2
+        pos = 0
+        size = len(src)
+        while pos < size and offset < row_bytes * h:
+            row = offset // row_bytes
+            col = offset - row * row_bytes
+            take = min(size - pos, row_bytes - col)
+            dst = (y + row) * stride + x * 2 + col
+            fb[dst:dst + take] = src[pos:pos + take]
+            pos += take
+            offset += take
+        self._window[4] = offset
+
+    def end_write(self):
+        if self._fb is None:
+            self._ce.high()
+            return
+        x, y, w, h, _ = self._window
+        self._mark_dirty(x, y, x + w - 1, y + h - 1)
+        self._window = None
+
+    def draw_rle565(self, x, y, data):
+        # Imagen RGB565 comprimida con RLE (ver convert_all_bmp_assets.py):
+        # "R5", ancho, alto y bloques de control (bit 7: repetición, si no
+        # literales). Se decodifica en el buffer de línea y se envía cada vez
+        # que se llena, sin reservar memoria.
+        data = memoryview(data)
+        w = data[2]
+        h = data[3]
+        if not self.begin_write(x, y, w, h):
+            return
+        line = self._line_view
+        size = len(line)
+        filled = 0
+        i = 4
+        end = len(data)
+        while i < end:
+            c = data[i]
+            i += 1
+            if c & 0x80:
+                count = (c & 0x7F) + 1
+                high = data[i]
+                low = data[i + 1]
+                i += 2
+                while count:
+                    line[filled] = high
+                    line[filled + 1] = low
+                    filled += 2
+                    count -= 1
+                    if filled == size:
+                        self.write_data(line)
+                        filled = 0
+            else:
+                remaining = (c + 1) * 2
+                while remaining:
+                    take = min(remaining, size - filled)
+                    line[filled:filled + take] = data[i:i + take]
+                    filled += take
+                    i += take
+                    remaining -= take
+                    if filled == size:
+                        self.write_data(line)
+                        filled = 0
+        if filled:
+            self.write_data(line[:filled])
+        self.end_write()
+
+    def draw_p4(self, x, y, data):
+        # Imagen con paleta de hasta 16 colores e índices de 4 bits (ver
+        # convert_all_bmp_assets.py): "P4", ancho, alto, nº de colores,
+        # paleta RGB565 y dos píxeles por byte. Los índices se expanden a
+        # RGB565 en el buffer de línea y se envían cada vez que se llena.
+        w = data[2]
+        h = data[3]
+        colors = data[4]
+        if not self.begin_write(x, y, w, h):
+            return
+        palette = memoryview(data)[5:5 + colors * 2]
+        start = 5 + colors * 2
+        remaining = w * h * 2           # bytes RGB565 a enviar
+        chunk = len(self._line_buf) // 4  # bytes de índices por envío
+        line = self._line_view
+        while remaining > 0:
+            count = min(chunk, (remaining + 3) // 4)
+            _expand_p4(data, start, count, palette, line)
+            send = min(count * 4, remaining)
+            self.write_data(line[:send])
+            start += count
+            remaining -= send
+        self.end_write()
+
+    # vertical scroll
+    def set_scroll_area(self, top, height, bottom):
+        # Áreas fija superior, desplazable y fija inferior en filas nativas
+        # del panel (las columnas lógicas en las orientaciones apaisadas)
+        args = bytearray(6)
+        args[0] = top >> 8
+        args[1] = top & 0xff
+        args[2] = height >> 8
+        args[3] = height & 0xff
+        args[4] = bottom >> 8
+        args[5] = bottom & 0xff
+        self.write_command(ST7735_VSCRDEF, args)
+
+    def scroll_to(self, line):
+        # Fila de memoria que se muestra al inicio del área desplazable
+        args = memoryview(self._arg_buf)[:2]
+        args[0] = line >> 8
+        args[1] = line & 0xff
+        self.write_command(ST7735_VSCSAD, args)
+
+    def reset_scroll(self):
+        self.set_scroll_area(0, ST7735_TFTHEIGHT, 0)
+        self.scroll_to(0)
+
+    def sleep(self):
+        # Apaga la imagen y entra en reposo, el panel conserva su memoria
+        self.write_command(ST7735_DISPOFF)
+        self.write_command(ST7735_SLPIN)
+        time.sleep_ms(5)
+
+    def wake(self):
+        # Tras SLPOUT el panel necesita 120 ms antes de recibir comandos
+        self.write_command(ST7735_SLPOUT)
+        time.sleep_ms(120)
+        self.write_command(ST7735_DISPON)
+
     def fill_screen(self, color):
         self.draw_block(0, 0, self._width, self._height, color)
 
@@ -268,21 +714,26 @@ class ST7735():
         return ((r & 0xF8) << 8) | ((g & 0xFC) << 3) | (b >> 3)
 
     def set_rotation(self, m):
-        self.command(ST7735_MADCTL)
         rotation = m % 4  # can't be higher than 3
+        args = memoryview(self._arg_buf)[:1]
         if rotation == 0:
-            self.data(ST7735_MADCTL_MX | ST7735_MADCTL_MY | self._color_mode)
+            args[0] = ST7735_MADCTL_MX | ST7735_MADCTL_MY | self._color_mode
             self._width = ST7735_TFTWIDTH
             self._height = ST7735_TFTHEIGHT
         elif rotation == 1:
-            self.data(ST7735_MADCTL_MY | ST7735_MADCTL_MV | self._color_mode)
+            args[0] = ST7735_MADCTL_MY | ST7735_MADCTL_MV | self._color_mode
             self._width = ST7735_TFTHEIGHT
             self._height = ST7735_TFTWIDTH
         elif rotation == 2:
-            self.data(self._color_mode)
+            args[0] = self._color_mode
             self._width = ST7735_TFTWIDTH
             self._height = ST7735_TFTHEIGHT
         elif rotation == 3:
-            self.data(ST7735_MADCTL_MX | ST7735_MADCTL_MV | self._color_mode)
+            args[0] = ST7735_MADCTL_MX | ST7735_MADCTL_MV | self._color_mode
             self._width = ST7735_TFTHEIGHT
             self._height = ST7735_TFTWIDTH
+        self.write_command(ST7735_MADCTL, args)
+        if self._fb is not None:
+            # Mismo buffer con las nuevas dimensiones, se reenvía completo
+            self._fb = framebuf.FrameBuffer(self._fb_buf, self._width, self._height, framebuf.RGB565)
+            self.mark_all_dirty()
@@ -0,0 +1,132 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  fixed_format.py
+#
+# Formateo de números en un bytearray de ancho fijo sin crear cadenas
+# intermedias, para no reservar memoria en cada fotograma de la pantalla.
+
+_SPACE = 0x20
+_MINUS = 0x2D
+_DOT = 0x2E
+_ZERO = 0x30
+_OVERFLOW = 0x23  # '#'
+_UNKNOWN = 0x3F  # '?'
+
+
+def _center_start (width, length):
+    # Mismo reparto que str.center(): con margen impar y ancho impar el
+    # espacio sobrante va a la izquierda
+    margin = width - length
+    return (margin >> 1) + (margin & width & 1)
+
+
+def format_value (buf, value, large=999.9):
+    """
+    Escribe value centrado en buf con el formato de
+    str(round(value, 1)).center(len(buf)):
+
+    - float: un decimal, sin decimales si es mayor que large. Las décimas
+      se calculan como round(value * 10), redondeando el valor ya
+      multiplicado (las mitades exactas al par). En valores que acaban en
+      5 en la centésima puede quedar una décima distinta que con
+      round(value, 1) de CPython, que redondea el valor decimal exacto:
+      9.95 se escribe '10.0' y 28.15 '28.2', donde CPython da 9.9 y 28.1.
+      Por encima de large se trunca a entero.
+    - int: sin decimales.
+    - None: '-'.
+
+    Si el número no cabe se rellena con '#'. Solo los float reservan un
+    valor temporal al escalarlos a décimas.
+
+    :param buf: bytearray de destino, su longitud es el ancho del campo.
+    :param value: Valor a escribir.
+    :param large: A partir de este valor los float se muestran sin decimales.
+    :return: buf
+    """
+    width = len(buf)
+
+    if value is None:
+        return format_text(buf, b'-')
+
+    if isinstance(value, float):
+        if value > large:
+            number = int(value)
+            decimals = 0
+        else:
+            number = round(value * 10)
+            decimals = 1
+    elif isinstance(value, int):
+        number = value
+        decimals = 0
+    else:
+        return format_text(buf, b'?')
+
+    negative = number < 0
+
+    if negative:
+        number = -number
+
+    # Cantidad de dígitos, al menos uno antes de la coma
+    digits = 1
+    limit = 10
+
+    while number >= limit:
+        digits += 1
+        limit *= 10
+
+    if digits <= decimals:
+        digits = decimals + 1
+
+    length = digits + (1 if decimals else 0) + (1 if negative else 0)
+
+    if length > width:
+        for i in range(width):
+            buf[i] = _OVERFLOW
+
+        return buf
+
+    start = _center_start(width, length)
+
+    for i in range(width):
+        buf[i] = _SPACE
+
+    # Se escribe de derecha a izquierda
+    pos = start + length - 1
+
+    for i in range(digits):
+        buf[pos] = _ZERO + number % 10
+        number //= 10
+        pos -= 1
+
+        if decimals and i == decimals - 1:
+            buf[pos] = _DOT
+            pos -= 1
+
+    if negative:
+        buf[pos] = _MINUS
+
+    return buf
+
+
+def format_text (buf, text):
+    """
+    Escribe text (str o bytes) centrado en buf como str.center(len(buf)),
+    recortado si no cabe. Los carácteres que no son ASCII se sustituyen por
+    '?'.
+
+    :return: buf
+    """
+    width = len(buf)
+    length = min(len(text), width)
+    start = _center_start(width, length)
+    is_str = isinstance(text, str)
+
+    for i in range(width):
+        buf[i] = _SPACE
+
+    for i in range(length):
+        c = ord(text[i]) if is_str else text[i]
+        buf[start + i] = c if c < 0x80 else _UNKNOWN
+
+    return buf
@@ -0,0 +1,88 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  icon_store.py
+#
+from Lib.lru_cache import LruCache
+
+
+class IconStore:
+    """
+    Almacén de iconos ya leídos desde la flash, mantenidos en RAM bajo un
+    presupuesto de bytes con expulsión LRU.
+
+    Los iconos del conjunto habitual se sirven desde RAM sin leer la flash.
+    Al expulsar un icono se reutiliza su buffer para el siguiente si tiene el
+    mismo tamaño, y los iconos que no caben en el presupuesto se leen con
+    readinto en un buffer reservado al crear la instancia, por lo que en
+    régimen estable no se reserva memoria nueva.
+
+    Atributos:
+        flash_reads (int): Lecturas realizadas desde la flash.
+    """
+
+    def __init__ (self, max_bytes, buffer_bytes=900):
+        """
+        :param max_bytes: Presupuesto de bytes para los iconos en RAM (0 desactiva la caché).
+        :param buffer_bytes: Tamaño del buffer de lectura, al menos el del icono más grande.
+        """
+        self._cache = LruCache(max_bytes)
+        self._buffer = bytearray(buffer_bytes)
+        self._buffer_view = memoryview(self._buffer)
+        self.flash_reads = 0
+
+    @property
+    def cache (self):
+        return self._cache
+
+    def get (self, path):
+        """
+        Devuelve el contenido del icono como buffer. El resultado solo es
+        válido hasta la siguiente llamada si el icono no ha entrado en caché.
+
+        :raises ValueError: Si el fichero no cabe en el buffer de lectura,
+                            en lugar de devolver el icono cortado.
+        """
+        icon = self._cache.get(path)
+
+        if icon is not None:
+            return icon
+
+        with open(path, 'rb') as f:
+            size = f.readinto(self._buffer)
+
+            # Con el buffer lleno se comprueba que no quede nada por leer
+            if size == len(self._buffer) and f.read(1):
+                raise ValueError('El icono {} ocupa más de {} bytes, aumenta buffer_bytes'
+                                 .format(path, size))
+
+        self.flash_reads += 1
+        data = self._buffer_view[:size]
+
+        if size > self._cache.max_bytes:
+            return data
+
+        icon = self._take_buffer(size)
+        icon[:] = data
+        self._cache.put(path, icon)
+
+        return icon
+
+    def _take_buffer (self, size):
+        """
+        Libera espacio para size bytes reutilizando, si es posible, el buffer
+        de un icono expulsado del mismo tamaño.
+        """
+        cache = self._cache
+        reusable = None
+
+        while cache.used_bytes + size > cache.max_bytes:
+            evicted = cache.pop_oldest()
+
+            if reusable is None and len(evicted) == size:
+                reusable = evicted
+
+        return reusable if reusable is not None else bytearray(size)
+
+    def clear (self):
+        self._cache.clear()
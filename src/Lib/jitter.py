@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  jitter.py
+#
+from time import ticks_us, ticks_diff
+
+
+class JitterMeter:
+    """
+    Mide la duración de cada vuelta de un bucle y su variación (jitter)
+    respecto a la media, sin guardar las muestras.
+
+    Uso: llamar a start() al comenzar la vuelta y a stop() al terminarla.
+
+    Atributos:
+        count (int): Vueltas medidas.
+        last_us (int): Duración de la última vuelta.
+        min_us (int): Vuelta más rápida.
+        max_us (int): Vuelta más lenta.
+    """
+
+    def __init__ (self):
+        self.reset()
+
+    def reset (self):
+        self.count = 0
+        self.last_us = 0
+        self.min_us = None
+        self.max_us = None
+
+        self._started = None
+        self._total = 0
+        self._total_sq = 0
+
+    def start (self):
+        self._started = ticks_us()
+
+    def stop (self):
+        """
+        Termina la vuelta y devuelve su duración en microsegundos.
+        """
+        if self._started is None:
+            return 0
+
+        elapsed = ticks_diff(ticks_us(), self._started)
+        self._started = None
+
+        self.count += 1
+        self.last_us = elapsed
+        self._total += elapsed
+        self._total_sq += elapsed * elapsed
+
+        if self.min_us is None or elapsed < self.min_us:
+            self.min_us = elapsed
+
+        if self.max_us is None or elapsed > self.max_us:
+            self.max_us = elapsed
+
+        return elapsed
+
+    def mean_us (self):
+        return self._total / self.count if self.count else 0
+
+    def jitter_us (self):
+        """
+        Desviación típica de la duración de las vueltas.
+        """
+        if not self.count:
+            return 0
+
+        mean = self.mean_us()
+        variance = self._total_sq / self.count - mean * mean
+
+        return variance ** 0.5 if variance > 0 else 0
+
+    def summary (self):
+        return 'vueltas: {}, media: {:.1f} ms, jitter: {:.2f} ms, min: {:.1f} ms, max: {:.1f} ms'.format(
+            self.count, self.mean_us() / 1000, self.jitter_us() / 1000,
+            (self.min_us or 0) / 1000, (self.max_us or 0) / 1000)
@@ -3,7 +3,13 @@ class Lcd_Gfx:
     Clase que proporciona métodos para dibujar figuras geométricas en una pantalla LCD utilizando MicroPython en una Raspberry Pi Pico.
     Los métodos incluyen dibujo de líneas, triángulos, rectángulos, círculos y otros, con soporte para relleno.
 
+    Las líneas horizontales y verticales y los rellenos se dibujan como tramos
+    mediante `draw_block(x, y, w, h, color)` si la pantalla lo ofrece, con una
+    sola ventana de dirección por tramo en lugar de una por píxel.
+
     Métodos:
+        drawHLine: Dibuja un tramo horizontal.
+        drawVLine: Dibuja un tramo vertical.
         drawLine: Dibuja una línea entre dos puntos dados.
         drawTrie: Dibuja un triángulo mediante tres puntos.
         drawFillTrie: Dibuja un triángulo relleno mediante tres puntos.
@@ -11,8 +17,58 @@ class Lcd_Gfx:
         drawFillRect: Dibuja un rectángulo relleno.
         drawCircle: Dibuja un círculo sin relleno.
         drawfillCircle: Dibuja un círculo relleno.
+        drawBarGauge: Dibuja una barra horizontal proporcional a un valor.
+        drawSparkline: Dibuja una gráfica de línea compacta con una serie de valores.
     """
 
+    def _span (self, x: int, y: int, w: int, h: int, thelcd, fill) -> None:
+        """
+        Dibuja un rectángulo relleno como un único bloque o, si la pantalla
+        no tiene `draw_block`, píxel a píxel.
+        """
+        if x < 0:
+            w += x
+            x = 0
+        if y < 0:
+            h += y
+            y = 0
+        if w <= 0 or h <= 0:
+            return
+
+        draw_block = getattr(thelcd, 'draw_block', None)
+
+        if draw_block is not None:
+            draw_block(x, y, w, h, fill)
+            return
+
+        for yy in range(y, y + h):
+            for xx in range(x, x + w):
+                thelcd.pixel(xx, yy, fill)
+
+    def drawHLine (self, x: int, y: int, w: int, thelcd, fill) -> None:
+        """
+        Dibuja un tramo horizontal de w píxeles desde (x, y).
+
+        Args:
+            x, y (int): Coordenadas del primer píxel.
+            w (int): Longitud del tramo en píxeles.
+            thelcd (object): Objeto de pantalla LCD.
+            fill (int): Color del tramo.
+        """
+        self._span(x, y, w, 1, thelcd, fill)
+
+    def drawVLine (self, x: int, y: int, h: int, thelcd, fill) -> None:
+        """
+        Dibuja un tramo vertical de h píxeles desde (x, y).
+
+        Args:
+            x, y (int): Coordenadas del primer píxel.
+            h (int): Longitud del tramo en píxeles.
+            thelcd (object): Objeto de pantalla LCD.
+            fill (int): Color del tramo.
+        """
+        self._span(x, y, 1, h, thelcd, fill)
+
     def drawLine (self, x0: int, y0: int, x1: int, y1: int, thelcd,
                   fill: bool) -> None:
         """
@@ -26,6 +82,14 @@ class Lcd_Gfx:
             thelcd (object): Objeto de pantalla LCD que tiene el método `pixel(x, y, fill)` para dibujar píxeles.
             fill (bool): Si es `True`, el píxel se dibuja; si es `False`, no.
         """
+        # Horizontales y verticales como un solo tramo (sin el punto final)
+        if y0 == y1:
+            self.drawHLine(min(x0, x1), y0, abs(x1 - x0), thelcd, fill)
+            return
+        if x0 == x1:
+            self.drawVLine(x0, min(y0, y1), abs(y1 - y0), thelcd, fill)
+            return
+
         steep = abs(y1 - y0) > abs(x1 - x0)
         if steep:
             x0, y0 = y0, x0
@@ -40,16 +104,25 @@ class Lcd_Gfx:
         if y0 < y1:
             ystep = 1
 
+        # Agrupa los píxeles consecutivos con la misma y en un tramo
+        run_start = x0
         for xx in range(x0, x1):
-            if steep:
-                thelcd.pixel(y0, xx, fill)
-            else:
-                thelcd.pixel(xx, y0, fill)
             err -= dy
             if err < 0:
+                if steep:
+                    self.drawVLine(y0, run_start, xx - run_start + 1, thelcd, fill)
+                else:
+                    self.drawHLine(run_start, y0, xx - run_start + 1, thelcd, fill)
+                run_start = xx + 1
                 y0 += ystep
                 err += dx
 
+        if run_start < x1:
+            if steep:
+                self.drawVLine(y0, run_start, x1 - run_start, thelcd, fill)
+            else:
+                self.drawHLine(run_start, y0, x1 - run_start, thelcd, fill)
+
     def drawTrie (self, x0: int, y0: int, x1: int, y1: int, x2: int, y2: int,
                   thelcd, fill: bool) -> None:
         """
@@ -174,9 +247,7 @@ class Lcd_Gfx:
         if ya > ye:
             ya, ye = ye, ya
 
-        for yy in range(ya, ye):
-            for xx in range(xa, xe):
-                thelcd.pixel(xx, yy, fill)
+        self._span(xa, ya, xe - xa, ye - ya, thelcd, fill)
 
     def drawCircle (self, x0: int, y0: int, r: int, thelcd, fill: bool) -> None:
         """
@@ -243,3 +314,85 @@ class Lcd_Gfx:
             self.drawLine(x0 - x, y0 - y, x0 - x, y0 + y, thelcd, fill)
             self.drawLine(x0 + y, y0 - x, x0 + y, y0 + x, thelcd, fill)
             self.drawLine(x0 - y, y0 - x, x0 - y, y0 + x, thelcd, fill)
+
+    def drawBarGauge (self, x: int, y: int, w: int, h: int, value: float,
+                      min_value: float, max_value: float, thelcd, fill,
+                      background, border=None) -> None:
+        """
+        Dibuja una barra horizontal rellena en proporción a value dentro del
+        rango [min_value, max_value]. Usa como máximo dos tramos (relleno y
+        fondo) más cuatro para el borde.
+
+        Args:
+            x, y (int): Coordenadas de la esquina superior izquierda.
+            w, h (int): Ancho y alto de la barra incluyendo el borde.
+            value (float): Valor a representar, se limita al rango.
+            min_value, max_value (float): Rango de valores de la barra.
+            thelcd (object): Objeto de pantalla LCD.
+            fill (int): Color de la parte rellena.
+            background (int): Color de la parte vacía.
+            border (int): Color del borde, None para no dibujarlo.
+        """
+        if border is not None:
+            self.drawRect(x, y, w, h, thelcd, border)
+            x += 1
+            y += 1
+            w -= 2
+            h -= 2
+
+        if w <= 0 or h <= 0:
+            return
+
+        if value is None or max_value <= min_value:
+            filled = 0
+        else:
+            value = min(max(value, min_value), max_value)
+            filled = int((value - min_value) * w / (max_value - min_value) + 0.5)
+
+        self._span(x, y, filled, h, thelcd, fill)
+        self._span(x + filled, y, w - filled, h, thelcd, background)
+
+    def drawSparkline (self, x: int, y: int, w: int, h: int, values, thelcd,
+                       fill, background, min_value=None,
+                       max_value=None) -> None:
+        """
+        Dibuja una gráfica de línea compacta con los últimos w valores, una
+        columna por valor. Cada columna es un único tramo vertical que une el
+        valor anterior con el actual.
+
+        Args:
+            x, y (int): Coordenadas de la esquina superior izquierda.
+            w, h (int): Ancho y alto de la gráfica.
+            values (list): Serie de valores, se ignoran los None.
+            thelcd (object): Objeto de pantalla LCD.
+            fill (int): Color de la línea.
+            background (int): Color del fondo.
+            min_value, max_value (float): Escala vertical, por defecto la de los datos.
+        """
+        # Sin tamaño no se dibuja nada: con w <= 0 el corte [-w:] tomaría
+        # la serie entera y las columnas saldrían fuera de la gráfica
+        if w <= 0 or h <= 0:
+            return
+
+        self._span(x, y, w, h, thelcd, background)
+
+        values = [v for v in values if v is not None][-w:]
+
+        if not values:
+            return
+
+        low = min(values) if min_value is None else min_value
+        high = max(values) if max_value is None else max_value
+        scale = (h - 1) / (high - low) if high > low else 0
+
+        previous = None
+        for i, value in enumerate(values):
+            value = min(max(value, low), high)
+            yy = y + h - 1 - int((value - low) * scale + 0.5)
+
+            if previous is None:
+                previous = yy
+
+            top = min(previous, yy)
+            self._span(x + i, top, 1, max(previous, yy) - top + 1, thelcd, fill)
+            previous = yy
@@ -0,0 +1,121 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  lru_cache.py
+#
+
+
+class LruCache:
+    """
+    Caché LRU (se descarta primero lo usado hace más tiempo) limitada por un
+    presupuesto de bytes en lugar de por número de elementos.
+
+    Pensada para buffers (bytes/bytearray) en MicroPython: el tamaño de cada
+    entrada es su len() y nunca se supera max_bytes en total.
+
+    Atributos:
+        max_bytes (int): Presupuesto máximo de bytes para todas las entradas.
+        used_bytes (int): Bytes ocupados actualmente.
+        hits (int): Lecturas resueltas desde la caché.
+        misses (int): Lecturas que no estaban en la caché.
+    """
+
+    def __init__ (self, max_bytes):
+        """
+        :param max_bytes: Presupuesto máximo de bytes que puede ocupar la caché.
+        """
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+        self._entries = {}
+
+        # Claves ordenadas de menos a más recientemente usadas
+        self._order = []
+
+    def __len__ (self):
+        return len(self._entries)
+
+    def __contains__ (self, key):
+        return key in self._entries
+
+    def get (self, key):
+        """
+        Devuelve el valor asociado a key marcándolo como el más reciente o
+        None si no está en la caché.
+        """
+        value = self._entries.get(key)
+
+        if value is None:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+
+        order = self._order
+
+        # Caso habitual al repetir el mismo elemento, evita mover la lista
+        if order[-1] != key:
+            order.remove(key)
+            order.append(key)
+
+        return value
+
+    def put (self, key, value):
+        """
+        Almacena value bajo key expulsando las entradas más antiguas hasta
+        que quepa dentro del presupuesto.
+
+        Returns:
+            bool: False si el valor por sí solo supera el presupuesto y no se
+            ha almacenado.
+        """
+        size = len(value)
+
+        if size > self.max_bytes:
+            return False
+
+        if key in self._entries:
+            self.remove(key)
+
+        while self.used_bytes + size > self.max_bytes:
+            self.remove(self._order[0])
+
+        self._entries[key] = value
+        self._order.append(key)
+        self.used_bytes += size
+
+        return True
+
+    def remove (self, key):
+        """
+        Elimina una entrada de la caché si existe.
+        """
+        value = self._entries.pop(key, None)
+
+        if value is not None:
+            self._order.remove(key)
+            self.used_bytes -= len(value)
+
+    def pop_oldest (self):
+        """
+        Expulsa la entrada usada hace más tiempo y devuelve su valor para
+        poder reutilizar el buffer, o None si la caché está vacía.
+        """
+        if not self._order:
+            return None
+
+        key = self._order[0]
+        value = self._entries[key]
+        self.remove(key)
+
+        return value
+
+    def clear (self):
+        """
+        Vacía la caché por completo manteniendo las estadísticas.
+        """
+        self._entries = {}
+        self._order = []
+        self.used_bytes = 0
@@ -0,0 +1,66 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  mailbox.py
+#
+import _thread
+
+
+class Mailbox:
+    """
+    Buzón de una sola posición para pasar mensajes de un hilo a otro.
+
+    put() nunca espera: sustituye el mensaje pendiente si el receptor aún
+    no lo ha recogido, así el receptor siempre trabaja con el más reciente.
+    wait() bloquea al receptor sobre un lock en lugar de sondear.
+
+    Pensado para un único hilo productor y un único hilo consumidor.
+
+    Atributos:
+        replaced (int): Mensajes descartados por llegar otro más nuevo.
+    """
+
+    def __init__ (self):
+        self.replaced = 0
+
+        self._message = None
+        self._lock = _thread.allocate_lock()
+
+        # Señal de mensaje pendiente: bloqueado cuando el buzón está vacío
+        self._signal = _thread.allocate_lock()
+        self._signal.acquire()
+
+    def put (self, message):
+        """
+        Deja un mensaje (distinto de None) sustituyendo al pendiente.
+        """
+        with self._lock:
+            if self._message is not None:
+                self.replaced += 1
+
+            self._message = message
+
+        # Con un solo productor no hay carrera entre comprobar y liberar
+        if self._signal.locked():
+            self._signal.release()
+
+    def take (self):
+        """
+        Devuelve el mensaje pendiente vaciando el buzón o None si no hay.
+        """
+        with self._lock:
+            message = self._message
+            self._message = None
+
+        return message
+
+    def wait (self):
+        """
+        Espera hasta que haya un mensaje y lo devuelve.
+        """
+        while True:
+            self._signal.acquire()
+            message = self.take()
+
+            if message is not None:
+                return message
@@ -0,0 +1,54 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  ring_buffer.py
+#
+
+
+class RingBuffer:
+    """
+    Buffer circular de tamaño fijo. Al llenarse, cada nuevo elemento
+    sustituye al más antiguo sin reservar memoria nueva.
+    """
+
+    def __init__ (self, size):
+        self._items = [None] * size
+        self._size = size
+        self._next = 0
+        self._count = 0
+
+    def __len__ (self):
+        return self._count
+
+    def append (self, item):
+        """
+        Añade item y devuelve el elemento sustituido, None mientras el
+        buffer no esté lleno.
+        """
+        replaced = self._items[self._next]
+        self._items[self._next] = item
+        self._next = (self._next + 1) % self._size
+
+        if self._count < self._size:
+            self._count += 1
+
+        return replaced
+
+    def items (self):
+        """
+        Devuelve los elementos del más antiguo al más reciente.
+        """
+        start = (self._next - self._count) % self._size
+
+        return [self._items[(start + i) % self._size] for i in range(self._count)]
+
+    def last (self):
+        if not self._count:
+            return None
+
+        return self._items[(self._next - 1) % self._size]
+
+    def clear (self):
+        self._items = [None] * self._size
+        self._next = 0
+        self._count = 0
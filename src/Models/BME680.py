@@ -1,5 +1,6 @@
 import time
 import math
+import micropython
 from micropython import const
 
 try:
@@ -7,6 +8,11 @@ try:
 except ImportError:
     import ustruct as struct
 
+try:
+    from collections import namedtuple
+except ImportError:
+    from ucollections import namedtuple
+
 # Constants and register addresses
 _BME680_CHIPID = const(0x61)
 _BME680_REG_CHIPID = const(0xD0)
@@ -28,6 +34,7 @@ _BME680_REG_HDATA = const(0x25)
 _BME680_SAMPLERATES = (0, 1, 2, 4, 8, 16)
 _BME680_FILTERSIZES = (0, 1, 3, 7, 15, 31, 63, 127)
 _BME680_RUNGAS = const(0x10)
+_BME680_GAS_WAIT = const(0x65)  # 37ms x4 = 148ms de calentamiento
 _LOOKUP_TABLE_1 = (
     2147483647.0, 2147483647.0, 2147483647.0, 2147483647.0, 2147483647.0,
     2126008810.0, 2147483647.0, 2130303777.0, 2147483647.0, 2147483647.0,
@@ -41,6 +48,16 @@ _LOOKUP_TABLE_2 = (
     500000.0, 250000.0, 125000.0)
 
 
+# Las mismas tablas como enteros para la compensación en punto fijo
+_LOOKUP_TABLE_1_INT = tuple(int(value) for value in _LOOKUP_TABLE_1)
+_LOOKUP_TABLE_2_INT = tuple(int(value) for value in _LOOKUP_TABLE_2)
+
+# Resultado inmutable de read_snapshot(): temperatura (ºC), presión (hPa),
+# humedad (%), resistencia del gas (Ohm) y calidad del aire (0-100)
+BME680Reading = namedtuple('BME680Reading',
+                           ('temperature', 'pressure', 'humidity', 'gas', 'air_quality'))
+
+
 def _read24 (arr):
     """Convierte una lista de 3 bytes en un valor flotante de 24 bits"""
     ret = 0.0
@@ -50,6 +67,84 @@ def _read24 (arr):
     return ret
 
 
+def _div (a, b):
+    """División entera truncando hacia cero como en C (// redondea hacia abajo)."""
+    q = a // b
+
+    if q < 0 and q * b != a:
+        q += 1
+
+    return q
+
+
+# Compensación en punto fijo: fórmulas enteras de la API de Bosch (bme68x.c
+# sin BME68X_USE_FPU), sin ningún float. Reciben los valores crudos y los
+# coeficientes de calibración como enteros.
+
+@micropython.native
+def _t_fine_fixed (adc_temp, calibration):
+    """t_fine a partir del valor crudo de temperatura."""
+    t1, t2, t3 = calibration
+    var1 = (adc_temp >> 3) - (t1 << 1)
+    var2 = (var1 * t2) >> 11
+    var3 = ((var1 >> 1) * (var1 >> 1)) >> 12
+    var3 = (var3 * (t3 << 4)) >> 14
+
+    return var2 + var3
+
+
+@micropython.native
+def _pressure_fixed (adc_pres, t_fine, calibration):
+    """Presión en Pa."""
+    p1, p2, p3, p4, p5, p6, p7, p8, p9, p10 = calibration
+    var1 = (t_fine >> 1) - 64000
+    var2 = ((((var1 >> 2) * (var1 >> 2)) >> 11) * p6) >> 2
+    var2 = var2 + ((var1 * p5) << 1)
+    var2 = (var2 >> 2) + (p4 << 16)
+    var1 = (((((var1 >> 2) * (var1 >> 2)) >> 13) * (p3 << 5)) >> 3) + ((p2 * var1) >> 1)
+    var1 = var1 >> 18
+    var1 = ((32768 + var1) * p1) >> 15
+    pressure = (1048576 - adc_pres) - (var2 >> 12)
+
+    # pressure * 3125 * 2 / var1 repartido en cociente y resto para que los
+    # productos no pasen de 30 bits (enteros pequeños en MicroPython)
+    quotient = pressure // var1
+    pressure = quotient * 6250 + ((pressure - quotient * var1) * 6250) // var1
+    var1 = (p9 * (((pressure >> 3) * (pressure >> 3)) >> 13)) >> 12
+    var2 = ((pressure >> 2) * p8) >> 13
+    var3 = ((pressure >> 8) * (pressure >> 8) * (pressure >> 8) * p10) >> 17
+
+    return pressure + ((var1 + var2 + var3 + (p7 << 7)) >> 4)
+
+
+@micropython.native
+def _humidity_fixed (adc_hum, t_fine, calibration):
+    """Humedad relativa en milésimas de % (0 a 100000)."""
+    h1_x16, h2, h3, h4, h5, h6, h7 = calibration
+    temp_scaled = ((t_fine * 5) + 128) >> 8
+    var1 = (adc_hum - h1_x16) - (_div(temp_scaled * h3, 100) >> 1)
+    var2 = (h2 * (_div(temp_scaled * h4, 100)
+                  + _div((temp_scaled * _div(temp_scaled * h5, 100)) >> 6, 100)
+                  + (1 << 14))) >> 10
+    var3 = var1 * var2
+    var4 = ((h6 << 7) + _div(temp_scaled * h7, 100)) >> 4
+    var5 = ((var3 >> 14) * (var3 >> 14)) >> 10
+    var6 = (var4 * var5) >> 1
+    humidity = (((var3 + var6) >> 10) * 1000) >> 12
+
+    return min(max(humidity, 0), 100000)
+
+
+@micropython.native
+def _gas_fixed (adc_gas, gas_range, sw_err):
+    """Resistencia del gas en Ohm."""
+    var1 = ((1340 + 5 * sw_err) * _LOOKUP_TABLE_1_INT[gas_range]) >> 16
+    var2 = (adc_gas << 15) - 16777216 + var1
+    var3 = (_LOOKUP_TABLE_2_INT[gas_range] * var1) >> 9
+
+    return _div(var3 + (var2 >> 1), var2)
+
+
 class BME680:
     """
     Clase principal para interactuar con el sensor BME680. Lee datos de temperatura, humedad,
@@ -63,16 +158,20 @@ class BME680:
       altitude (float): Altitud calculada a partir de la presión.
       gas (int): Resistencia de gas (valor de gas).
       is_gas_ready (bool): Indica si el sensor de gas está calibrado y si han pasado 5 minutos.
+      measuring (bool): Hay una medición lanzada con start_measurement() sin recoger.
+      fixed_point (bool): Compensa con enteros en lugar de con float.
     """
 
-    def __init__ (self, *, refresh_rate=10, temperature_offset=0.0):
+    def __init__ (self, *, refresh_rate=10, temperature_offset=0.0, fixed_point=True):
         """
         Inicializa el sensor BME680.
 
         :param refresh_rate: Tasa de refresco de las lecturas en Hz (lecturas por segundo).
         :param temperature_offset: Correción de temperatura en grados Celsius para compensar la diferencia con un sensor calibrado.
+        :param fixed_point: Compensación entera de Bosch, sin operaciones con float hasta convertir el resultado final.
         """
         self.temperature_offset = temperature_offset
+        self.fixed_point = fixed_point
         self._write(_BME680_REG_SOFTRESET, [0xB6])  # Reset del sensor
         time.sleep(0.005)
         chip_id = self._read_byte(_BME680_REG_CHIPID)
@@ -80,7 +179,7 @@ class BME680:
             raise RuntimeError('Error en la ID del chip: 0x%x' % chip_id)
         self._read_calibration()
         self._write(_BME680_BME680_RES_HEAT_0, [0x73])
-        self._write(_BME680_BME680_GAS_WAIT_0, [0x65])
+        self._write(_BME680_BME680_GAS_WAIT_0, [_BME680_GAS_WAIT])
         self._pressure_oversample = 0b011
         self._temp_oversample = 0b100
         self._humidity_oversample = 0b010
@@ -97,6 +196,19 @@ class BME680:
         # Marca cuando se comenzó a leer el sensor de gas
         self._gas_start_time = None
 
+        # Bloque de configuración y último CTRL_MEAS, ver _build_config_block()
+        self._config_block = None
+        self._ctrl_meas = 0
+
+        # Medición lanzada con start_measurement() pendiente de recoger
+        self.measuring = False
+        self._ready_at = 0
+        self._timeout_at = 0
+
+        # Tiempo de calentamiento del gas: 6 bits de valor y 2 de
+        # multiplicador (x1, x4, x16, x64) en ms
+        self._gas_wait_ms = (_BME680_GAS_WAIT & 0x3F) << ((_BME680_GAS_WAIT >> 6) * 2)
+
     # Métodos para configurar las resoluciones de muestreo (oversample)
     @property
     def pressure_oversample (self):
@@ -106,6 +218,7 @@ class BME680:
     def pressure_oversample (self, sample_rate):
         if sample_rate in _BME680_SAMPLERATES:
             self._pressure_oversample = _BME680_SAMPLERATES.index(sample_rate)
+            self._config_block = None
         else:
             raise RuntimeError("Tasa de muestreo no válida")
 
@@ -117,6 +230,7 @@ class BME680:
     def humidity_oversample (self, sample_rate):
         if sample_rate in _BME680_SAMPLERATES:
             self._humidity_oversample = _BME680_SAMPLERATES.index(sample_rate)
+            self._config_block = None
         else:
             raise RuntimeError("Tasa de muestreo no válida")
 
@@ -128,6 +242,7 @@ class BME680:
     def temperature_oversample (self, sample_rate):
         if sample_rate in _BME680_SAMPLERATES:
             self._temp_oversample = _BME680_SAMPLERATES.index(sample_rate)
+            self._config_block = None
         else:
             raise RuntimeError("Tasa de muestreo no válida")
 
@@ -139,6 +254,7 @@ class BME680:
     def filter_size (self, size):
         if size in _BME680_FILTERSIZES:
             self._filter = _BME680_FILTERSIZES[size]
+            self._config_block = None
         else:
             raise RuntimeError("Tamaño de filtro no válido")
 
@@ -149,6 +265,14 @@ class BME680:
         Calcula la temperatura utilizando la calibración interna y la compensación manual si se proporciona.
         """
         self._perform_reading()
+        return self._compensate_temperature()
+
+    def _compensate_temperature (self):
+        """Temperatura de la última medición ya leída."""
+        if self.fixed_point:
+            # Centésimas de grado
+            return (((self._t_fine * 5) + 128) >> 8) / 100 + self.temperature_offset
+
         calc_temp = (((self._t_fine * 5) + 128) / 256)
         calc_temp = calc_temp / 100  # Conversión a grados Celsius
         return calc_temp + self.temperature_offset  # Aplica el offset si está configurado
@@ -156,6 +280,14 @@ class BME680:
     @property
     def pressure (self):
         self._perform_reading()
+        return self._compensate_pressure()
+
+    def _compensate_pressure (self):
+        """Presión en hPa de la última medición ya leída."""
+        if self.fixed_point:
+            return _pressure_fixed(self._adc_pres, self._t_fine,
+                                   self._pressure_calibration_int) / 100
+
         var1 = (self._t_fine / 2) - 64000
         var2 = ((var1 / 4) * (var1 / 4)) / 2048
         var2 = (var2 * self._pressure_calibration[5]) / 4
@@ -181,6 +313,14 @@ class BME680:
     @property
     def humidity (self):
         self._perform_reading()
+        return self._compensate_humidity()
+
+    def _compensate_humidity (self):
+        """Humedad relativa de la última medición ya leída."""
+        if self.fixed_point:
+            return _humidity_fixed(self._adc_hum, self._t_fine,
+                                   self._humidity_calibration_int) / 1000
+
         temp_scaled = ((self._t_fine * 5) + 128) / 256
         var1 = ((self._adc_hum - (self._humidity_calibration[0] * 16)) -
                 ((temp_scaled * self._humidity_calibration[2]) / 200))
@@ -219,6 +359,13 @@ class BME680:
     def gas (self):
         """Devuelve la resistencia del gas"""
         self._perform_reading()
+        return self._compensate_gas()
+
+    def _compensate_gas (self):
+        """Resistencia del gas en Ohm de la última medición ya leída."""
+        if self.fixed_point:
+            return _gas_fixed(self._adc_gas, self._gas_range, self._sw_err_int)
+
         var1 = ((1340 + (5 * self._sw_err)) * (
             _LOOKUP_TABLE_1[self._gas_range])) / 65536
         var2 = ((self._adc_gas * 32768) - 16777216) + var1
@@ -258,8 +405,16 @@ class BME680:
         Returns:
             IAQ: Índice de calidad del aire en porcentaje (0-100), donde 100 es excelente y 0 es malo.
         """
+        return self._air_quality_from_gas(self.gas, Rmin, Rmax)
+
+    @staticmethod
+    def _air_quality_from_gas (gas, Rmin=100, Rmax=500) -> int:
+        """
+        Calidad del aire (0-100) a partir de una resistencia del gas en Ohm
+        ya medida, ver air_quality().
+        """
         # Obtener la resistencia del gas medida
-        gas_resistance = self.gas / 1000
+        gas_resistance = gas / 1000
 
         # Ajustar la resistencia medida si está fuera del rango Rmin - Rmax
         if gas_resistance < Rmin:
@@ -276,32 +431,176 @@ class BME680:
         # Una resistencia mayor indica mejor calidad del aire
         return round(IAQ)  # Resistencia mayor -> Mejor calidad del aire -> IAQ más alto
 
+    def read_snapshot (self):
+        """
+        Realiza una única medición en modo forzado, con una sola lectura de
+        los 15 registros de datos, y calcula todas las compensaciones una vez.
+
+        A diferencia de las propiedades no depende de refresh_rate: cada
+        llamada es exactamente una medición. Espera a que termine la
+        conversión, para no bloquear usar start_measurement() y collect().
+
+        Returns:
+            BME680Reading: Tupla inmutable con temperature, pressure,
+            humidity, gas y air_quality.
+        """
+        self._measure()
+
+        return self._reading()
+
+    def measurement_duration_ms (self):
+        """
+        Duración estimada de una medición en ms con el sobremuestreo y el
+        tiempo de calentamiento del gas configurados (igual que el cálculo
+        de la API de Bosch).
+        """
+        cycles = (_BME680_SAMPLERATES[self._temp_oversample]
+                  + _BME680_SAMPLERATES[self._pressure_oversample]
+                  + _BME680_SAMPLERATES[self._humidity_oversample])
+
+        # 1963us por ciclo, cambios entre T/P/H, medición de gas y despertar
+        duration_us = cycles * 1963 + 477 * 4 + 477 * 5 + 500
+
+        return (duration_us + 999) // 1000 + 1 + self._gas_wait_ms
+
+    def start_measurement (self):
+        """
+        Configura el sensor y lanza una medición en modo forzado sin esperar
+        a que termine.
+
+        Returns:
+            int: Instante (time.ticks_ms()) en el que se espera el resultado.
+        """
+        if self._config_block is None:
+            self._build_config_block()
+
+        # Configuración y disparo del modo forzado en una sola transacción
+        self._write_pairs(self._config_block)
+
+        duration = self.measurement_duration_ms()
+
+        self.measuring = True
+        self._ready_at = time.ticks_add(time.ticks_ms(), duration)
+
+        # Margen de una conversión más antes de dar la medición por perdida
+        self._timeout_at = time.ticks_add(self._ready_at, duration)
+
+        return self._ready_at
+
+    def _build_config_block (self):
+        """
+        Precalcula las parejas registro/valor que configuran y lanzan una
+        medición. CTRL_MEAS va la última: el valor de CTRL_HUM se aplica al
+        escribirlo y el modo forzado (bit 0) arranca la conversión. Se
+        guarda el valor de CTRL_MEAS para no tener que leerlo del sensor.
+        """
+        self._ctrl_meas = (self._temp_oversample << 5) | (self._pressure_oversample << 2)
+        self._config_block = bytes((
+            _BME680_REG_CONFIG, self._filter << 2,
+            _BME680_REG_CTRL_HUM, self._humidity_oversample,
+            _BME680_REG_CTRL_GAS, _BME680_RUNGAS,
+            _BME680_REG_CTRL_MEAS, self._ctrl_meas | 0x01,
+        ))
+
+    def poll (self):
+        """
+        Comprueba sin esperar si la medición lanzada ha terminado. Antes del
+        instante previsto no accede al bus; después lee los 15 registros de
+        datos una vez y, si hay datos nuevos, los guarda.
+
+        Si pasada una conversión más del instante previsto aún no hay datos
+        nuevos, la medición se da por perdida y se lanza otra. Si falla la
+        lectura del bus se deja de esperar la medición y se propaga el
+        error, así el siguiente ciclo lanza una nueva.
+
+        Returns:
+            bool: True si la medición ha terminado y sus datos están leídos.
+        """
+        if not self.measuring:
+            return False
+
+        now = time.ticks_ms()
+
+        if time.ticks_diff(now, self._ready_at) < 0:
+            return False
+
+        try:
+            data = self._read(_BME680_REG_MEAS_STATUS, 15)
+        except OSError:
+            self.measuring = False
+            raise
+
+        if not data[0] & 0x80:
+            if time.ticks_diff(now, self._timeout_at) >= 0:
+                self.measuring = False
+                self.start_measurement()
+
+            return False
+
+        self.measuring = False
+        self._load_data(data)
+
+        return True
+
+    def collect (self):
+        """
+        Devuelve el resultado de la medición lanzada con start_measurement()
+        si ya ha terminado, sin esperar.
+
+        Returns:
+            BME680Reading|None: Lectura compensada o None si aún no está.
+        """
+        if not self.poll():
+            return None
+
+        return self._reading()
+
+    def _reading (self):
+        """Compensa los valores crudos de la última medición leída."""
+        gas = self._compensate_gas()
+
+        return BME680Reading(self._compensate_temperature(),
+                             self._compensate_pressure(),
+                             self._compensate_humidity(),
+                             gas,
+                             self._air_quality_from_gas(gas))
+
     def _perform_reading (self):
         """Realiza la lectura de los sensores BME680 y actualiza los valores internos."""
         if (time.ticks_diff(self._last_reading,
                             time.ticks_ms()) * time.ticks_diff(0, 1)
                 < self._min_refresh_time):
             return
-        self._write(_BME680_REG_CONFIG, [self._filter << 2])
-        self._write(_BME680_REG_CTRL_MEAS,
-                    [(self._temp_oversample << 5) | (
-                            self._pressure_oversample << 2)])
-        self._write(_BME680_REG_CTRL_HUM, [self._humidity_oversample])
-        self._write(_BME680_REG_CTRL_GAS, [_BME680_RUNGAS])
-        ctrl = self._read_byte(_BME680_REG_CTRL_MEAS)
-        ctrl = (ctrl & 0xFC) | 0x01
-        self._write(_BME680_REG_CTRL_MEAS, [ctrl])
-        new_data = False
-        while not new_data:
-            data = self._read(_BME680_REG_MEAS_STATUS, 15)
-            new_data = data[0] & 0x80 != 0
+        self._measure()
+
+    def _measure (self):
+        """Lanza una medición en modo forzado y espera a tener sus datos."""
+        ready_at = self.start_measurement()
+        wait = time.ticks_diff(ready_at, time.ticks_ms())
+
+        if wait > 0:
+            time.sleep_ms(wait)
+
+        while not self.poll():
             time.sleep(0.005)
+
+    def _load_data (self, data):
+        """Guarda los valores crudos de los 15 registros de datos leídos."""
         self._last_reading = time.ticks_ms()
+        self._gas_range = data[14] & 0x0F
+
+        if self.fixed_point:
+            self._adc_pres = (data[2] << 12) | (data[3] << 4) | (data[4] >> 4)
+            self._adc_temp = (data[5] << 12) | (data[6] << 4) | (data[7] >> 4)
+            self._adc_hum = (data[8] << 8) | data[9]
+            self._adc_gas = (data[13] << 2) | (data[14] >> 6)
+            self._t_fine = _t_fine_fixed(self._adc_temp, self._temp_calibration_int)
+            return
+
         self._adc_pres = _read24(data[2:5]) / 16
         self._adc_temp = _read24(data[5:8]) / 16
         self._adc_hum = struct.unpack('>H', bytes(data[8:10]))[0]
         self._adc_gas = int(struct.unpack('>H', bytes(data[13:15]))[0] / 64)
-        self._gas_range = data[14] & 0x0F
         var1 = (self._adc_temp / 8) - (self._temp_calibration[0] * 2)
         var2 = (var1 * self._temp_calibration[1]) / 2048
         var3 = ((var1 / 2) * (var1 / 2)) / 4096
@@ -314,6 +613,17 @@ class BME680:
         coeff += self._read(_BME680_BME680_COEFF_ADDR2, 16)
         coeff = list(
             struct.unpack('<hbBHhbBhhbbHhhBBBHbbbBbHhbb', bytes(coeff[1:39])))
+
+        # Coeficientes enteros para la compensación en punto fijo. Se
+        # decodifican igual que los float de abajo: h1 * 16 es exactamente
+        # el valor de 16 bits leído y h2 se completa con sus 4 bits bajos
+        self._temp_calibration_int = (coeff[23], coeff[0], coeff[1])
+        self._pressure_calibration_int = tuple(coeff[x] for x in
+                                               (3, 4, 5, 7, 8, 10, 9, 12, 13, 14))
+        self._humidity_calibration_int = (coeff[17], coeff[16] * 16 + coeff[17] % 16,
+                                          coeff[18], coeff[19], coeff[20], coeff[21],
+                                          coeff[22])
+
         coeff = [float(i) for i in coeff]
         self._temp_calibration = [coeff[x] for x in [23, 0, 1]]
         self._pressure_calibration = [coeff[x] for x in
@@ -326,7 +636,8 @@ class BME680:
         self._humidity_calibration[0] /= 16
         self._heat_range = (self._read_byte(0x02) & 0x30) / 16
         self._heat_val = self._read_byte(0x00)
-        self._sw_err = (self._read_byte(0x04) & 0xF0) / 16
+        self._sw_err_int = self._read_byte(0x04) >> 4
+        self._sw_err = float(self._sw_err_int)
 
     def _read_byte (self, register):
         """Lee un solo byte de un registro I2C."""
@@ -340,17 +651,27 @@ class BME680:
         """Método que debe ser implementado en una clase hija (I2C o SPI)."""
         raise NotImplementedError()
 
+    def _write_pairs (self, pairs):
+        """
+        Escribe parejas (registro, valor) consecutivas. Por defecto con un
+        _write() por pareja, las clases hijas pueden enviarlas juntas.
+        """
+        for i in range(0, len(pairs), 2):
+            self._write(pairs[i], [pairs[i + 1]])
+
 
 class BME680_I2C(BME680):
     """
     Subclase que implementa la interfaz I2C para el sensor BME680.
     """
 
-    def __init__ (self, i2c, address=0x77, debug=False, *, refresh_rate=10, temperature_offset=0.0):
+    def __init__ (self, i2c, address=0x77, debug=False, *, refresh_rate=10, temperature_offset=0.0,
+                  fixed_point=True):
         self._i2c = i2c
         self._address = address
         self._debug = debug
-        super().__init__(refresh_rate=refresh_rate, temperature_offset=temperature_offset)
+        super().__init__(refresh_rate=refresh_rate, temperature_offset=temperature_offset,
+                         fixed_point=fixed_point)
 
     def _read (self, register, length):
         """Lee datos desde el bus I2C."""
@@ -362,11 +683,23 @@ class BME680_I2C(BME680):
         return result
 
     def _write (self, register, values):
-        """Escribe datos en el bus I2C."""
+        """
+        Escribe datos en el bus I2C en una sola transacción. El BME680 no
+        avanza el registro al escribir varios bytes, así que se envían como
+        parejas registro/valor.
+        """
+        pairs = bytearray(len(values) * 2)
+
+        for i in range(len(values)):
+            pairs[i * 2] = (register + i) & 0xFF
+            pairs[i * 2 + 1] = values[i] & 0xFF
+
+        self._write_pairs(pairs)
+
+    def _write_pairs (self, pairs):
+        """Escribe parejas (registro, valor) en una sola transacción I2C."""
         if self._debug:
-            print("\t${:x} write".format(register),
-                  " ".join(["{:02x}".format(i) for i in values]))
-        for value in values:
-            self._i2c.writeto_mem(self._address, register,
-                                  bytearray([value & 0xFF]))
-            register += 1
+            print("\twrite",
+                  " ".join(["${:x}={:02x}".format(pairs[i], pairs[i + 1])
+                            for i in range(0, len(pairs), 2)]))
+        self._i2c.writeto(self._address, pairs)
@@ -1,16 +1,59 @@
 #!/usr/bin/env python
 # -*- coding: utf-8 -*-
 #
-from math import floor, ceil
-from time import time, sleep_ms
-from Lib.ST7735 import ST7735
+import _thread
+import micropython
+import sys
+from math import floor
+from time import time, sleep_ms, ticks_ms, ticks_diff
+from Lib.ST7735 import ST7735, ST7735_TFTWIDTH, ST7735_TFTHEIGHT
+from Lib.lru_cache import LruCache
+from Lib.icon_store import IconStore
 from machine import Pin
 
+from Lib.fixed_format import format_value, format_text
+from Models.HistoryChart import HistoryChart
 from Models.WeatherStation import WeatherStation
 
 
+def _copy_rows_python(src, dst, dst_start, row_bytes, rows, dst_stride):
+    # Copia una imagen de rows filas de row_bytes bytes en dst a partir de
+    # dst_start, avanzando dst_stride bytes por fila
+    s = 0
+    d = dst_start
+    for _ in range(rows):
+        dst[d:d + row_bytes] = src[s:s + row_bytes]
+        s += row_bytes
+        d += dst_stride
+
+
+_copy_rows = _copy_rows_python
+
+# En la placa se usa viper: copia byte a byte sin crear trozos intermedios
+if sys.implementation.name == 'micropython':
+    @micropython.viper
+    def _copy_rows_viper(src: ptr8, dst: ptr8, dst_start: int, row_bytes: int, rows: int, dst_stride: int):
+        s = 0
+        d = dst_start
+        r = 0
+        while r < rows:
+            i = 0
+            while i < row_bytes:
+                dst[d + i] = src[s + i]
+                i += 1
+            s += row_bytes
+            d += dst_stride
+            r += 1
+
+    _copy_rows = _copy_rows_viper
+
+# Marca de valor aún no formateado en los buffers del grid
+_STALE = object()
+
+
 class DisplayST7735_128x160():
     TIME_TO_OFF = 10  # Tiempo en minutos para apagar la pantalla
+    BUTTON_DEBOUNCE_MS = 200  # Pulsaciones más seguidas se ignoran (rebotes)
     DISPLAY_ORIENTATION = 3  # Orientación de la pantalla
     DEBUG = False
 
@@ -19,7 +62,22 @@ class DisplayST7735_128x160():
     DISPLAY_WIDTH = 160
     DISPLAY_HEIGHT = 128
 
-    locked = False
+    # Páginas que se pueden mostrar
+    PAGE_GRID = 'grid'
+    PAGE_HISTORY = 'history'
+
+    # Sensores del grid por orden de celda (de izquierda a derecha y de
+    # arriba a abajo) y formas admitidas como (filas, columnas). En apaisado
+    # solo cabe el grid de 3x3, en vertical también 2x3 y 4x2 (en estas se
+    # muestran los primeros sensores de la lista)
+    GRID_KEYS = ('temperature', 'air_quality', 'light',
+                 'humidity', 'co2', 'uv',
+                 'pressure', 'tvoc', 'sound')
+    GRID_SHAPES = ((2, 3), (3, 3), (4, 2))
+    GRID_ICON_WIDTH = 15
+    GRID_ICON_HEIGHT = 30
+    GRID_TEXT_CHARS = 5  # Ancho fijo en carácteres de valor y unidad
+
 
     # Colores por secciones (de más claro a más oscuro)
     COLORS = {
@@ -86,33 +144,107 @@ class DisplayST7735_128x160():
         },
     }
 
-    def __init__(self, spi, rst=9, ce=13, dc=12, offset=0, c_mode='RGB', btn_display_on=None, orientation=3, timeout=10, debug=False, color=0, background=0x000, pin_backlight=None):
-        self.display = ST7735(spi, rst, ce, dc, offset, c_mode, color=color, background=background)
-        self.display.set_rotation(orientation)
+    def __init__(self, spi, rst=9, ce=13, dc=12, offset=0, c_mode='RGB', btn_display_on=None, orientation=3, timeout=10, debug=False, color=0, background=0x000, pin_backlight=None, glyph_cache_bytes=6144, icon_cache_bytes=10800, framebuffer=False, history_interval=10, grid_shape=None, grid_keys=None):
+        # Con framebuffer todo se dibuja en RAM y se envía con flush()
+        self.display = ST7735(spi, rst, ce, dc, offset, c_mode, color=color, background=background, framebuffer=framebuffer)
 
-        # Estado inicial de la pantalla
-        self.reset()
+        # Acceso exclusivo al driver y sus buffers compartidos (SPI, texto,
+        # iconos) entre el bucle principal y el renderizado en el núcleo 1
+        self._lock = _thread.allocate_lock()
+
+        # Fuente cargada una sola vez en RAM (5 bytes por carácter desde 0x20)
+        self._font_data = self.load_font(self.FONTS['normal']['font'])
+
+        # Primer código fuera de la fuente (las claves de la caché admiten
+        # hasta 7 bits por carácter)
+        self._font_end = min(0x20 + len(self._font_data) // self.FONTS['normal']['w'], 0x80)
+
+        # Caché de carácteres ya expandidos a RGB565 por (carácter, color, fondo)
+        self._glyph_cache = LruCache(glyph_cache_bytes)
+
+        # Índice de cada pareja de colores {color: {fondo: índice}}
+        self._palettes = {}
+        self._palette_count = 0
+
+        # Última cadena dibujada en cada posición de texto, ver printSlot()
+        self._text_slots = {}
+
+        # Capas estáticas ya dibujadas ('header', 'footer'), el resto de la
+        # pantalla son huecos de texto e iconos que se actualizan por separado
+        self._static_layers = set()
+
+        # Carácteres dibujados y omitidos por no cambiar, ver text_stats()
+        self.glyphs_drawn = 0
+        self.glyphs_skipped = 0
+
+        # Buffer reutilizable para componer una línea completa de texto y
+        # enviarla en una sola escritura SPI
+        font = self.FONTS['normal']
+        glyph_width = font['w'] + font['font_padding']
+        glyph_height = font['h'] + font['font_padding']
+        max_chars = max(ST7735_TFTWIDTH, ST7735_TFTHEIGHT) // glyph_width
+        self._text_buffer = bytearray(max_chars * glyph_width * glyph_height * 2)
+        self._text_views = {}
+
+        # Iconos del grid en RAM. Con paleta de 4 bits ocupan unos 250 bytes
+        # y caben los 27 de WeatherStation.data_images; el buffer de lectura
+        # admite también iconos RGB565 sin comprimir (15x30px = 900 bytes)
+        self._icons = IconStore(icon_cache_bytes, buffer_bytes=900)
+
+        # Sensores a mostrar en el grid, ver GRID_KEYS
+        self.grid_keys = tuple(grid_keys) if grid_keys else self.GRID_KEYS
+
+        # Tabla de huecos del grid, se calcula en compile_layout()
+        self._grid_layout = []
+
+        # Estado de cada celda del grid, se crea en compile_layout():
+        # [rango dibujado, último valor, texto del valor, última unidad,
+        #  texto de la unidad]
+        self._grid_cells = []
+
+        # Celdas redibujadas en la última llamada a grid_update()
+        self.grid_redraws = 0
+
+        # Página visible y últimos datos de cabecera y footer para poder
+        # redibujarlos al volver al grid
+        self.page = self.PAGE_GRID
+        self._wifi_status = 0
+        self._footer_center = 'WEATHER STATION'
+
+        # Estado del wifi y texto del footer dibujados, None si no lo están
+        self._wifi_drawn = None
+        self._footer_drawn = None
+
+        # Última petición del botón (True encender, False apagar) y
+        # contadores de peticiones recibidas y aplicadas por loop()
+        self._power_request = None
+        self._power_requests = 0
+        self._power_handled = 0
+
+        # Pulsación pendiente de procesar fuera de la interrupción
+        self._button_scheduled = False
+        self._button_at = ticks_ms()
+
+        # Referencia creada una vez, crearla dentro de la interrupción
+        # reservaría memoria
+        self._button_handler = self._on_button
+        self.pin_backlight = None
 
         # Tiempo en el que se encendió la pantalla por primera vez
         self.display_on_at = time()
         self.display_on = True  # Indica si la pantalla está encendida o apagada
         self.DEBUG = debug
-
-        self.DISPLAY_ORIENTATION = orientation
         self.TIME_TO_OFF = timeout
 
-        if self.DISPLAY_ORIENTATION == 1:
-            self.DISPLAY_WIDTH = 160
-            self.DISPLAY_HEIGHT = 128
-        elif self.DISPLAY_ORIENTATION == 2:
-            self.DISPLAY_WIDTH = 128
-            self.DISPLAY_HEIGHT = 160
-        elif self.DISPLAY_ORIENTATION == 3:
-            self.DISPLAY_WIDTH = 160
-            self.DISPLAY_HEIGHT = 128
-        elif self.DISPLAY_ORIENTATION == 4:
-            self.DISPLAY_WIDTH = 128
-            self.DISPLAY_HEIGHT = 160
+        # El historial usa el scroll por hardware, solo en apaisado
+        self.history = None
+        self._history_interval = history_interval
+
+        # La orientación debe estar definida antes del estado inicial
+        self.set_orientation(orientation, grid_shape)
+
+        # Estado inicial de la pantalla
+        self.reset()
 
         if btn_display_on is not None:
             self.btn_display_on = Pin(btn_display_on, Pin.IN, Pin.PULL_DOWN)
@@ -125,160 +257,435 @@ class DisplayST7735_128x160():
             self.pin_backlight.on()
             sleep_ms(100)
 
-    def reset(self):
+    def set_orientation(self, orientation, grid_shape=None):
         """
-        Prepara el estado inicial de la pantalla.
+        Define la orientación y la forma del grid y recalcula la tabla de
+        huecos del grid. Para verlo en pantalla hay que llamar después a
+        reset() y volver a dibujar cabecera, footer y grid.
+
+        :param orientation: 1 y 3 apaisada, 2 y 4 vertical.
+        :param grid_shape: (filas, columnas) del grid, por defecto (3, 3).
         """
+        if grid_shape is None:
+            grid_shape = (3, 3)
 
-        while self.locked:
-            sleep_ms(10)
+        grid_shape = tuple(grid_shape)
 
-        self.locked = True
+        if grid_shape not in self.GRID_SHAPES:
+            raise ValueError('Forma del grid no admitida: {}'.format(grid_shape))
 
-        self.display.reset()
-        self.display.begin()
-        self.display.set_rotation(self.DISPLAY_ORIENTATION)
+        if orientation in (1, 3) and grid_shape != (3, 3):
+            raise ValueError('En apaisado solo se admite el grid de 3x3')
 
-        self.locked = False
+        # Al cambiar de orientación el historial deja de ser válido
+        if self.history is not None and self.history.active:
+            with self._lock:
+                self.history.deactivate()
 
-        self.cleanDisplay()
+        self.page = self.PAGE_GRID
+        self.DISPLAY_ORIENTATION = orientation
+        self.grid_shape = grid_shape
 
-    def cleanDisplay(self):
+        if orientation in (1, 3):
+            self.DISPLAY_WIDTH = 160
+            self.DISPLAY_HEIGHT = 128
+        else:
+            self.DISPLAY_WIDTH = 128
+            self.DISPLAY_HEIGHT = 160
 
-        while self.locked:
-            sleep_ms(10)
+        self.display.set_rotation(orientation)
+        self.compile_layout()
 
-        try:
-            self.locked = True
+        self.history = None
+
+        if orientation in (1, 3):
+            self.history = HistoryChart(self.display, orientation,
+                                        width=self.DISPLAY_WIDTH,
+                                        height=self.DISPLAY_HEIGHT,
+                                        interval=self._history_interval,
+                                        background=self.COLORS['black'],
+                                        grid_color=self.COLORS['gray5'])
 
-            black = self.COLORS['black']
-            self.display._bground = black
+    def reset(self):
+        """
+        Prepara el estado inicial de la pantalla.
+        """
+
+        with self._lock:
+            self.display.reset()
+            self.display.begin()
             self.display.set_rotation(self.DISPLAY_ORIENTATION)
-            self.display.fill_screen(black)
-            self.display.draw_block(0, 0, self.DISPLAY_WIDTH, self.DISPLAY_HEIGHT, black)
+
+        self.cleanDisplay()
+
+    def cleanDisplay(self):
+
+        try:
+            with self._lock:
+                black = self.COLORS['black']
+                self.display._bground = black
+                self.display.set_rotation(self.DISPLAY_ORIENTATION)
+                self.display.fill_screen(black)
         except Exception as e:
             if self.DEBUG:
                 print('Error en cleanDisplay(): {}'.format(e))
-        finally:
-            self.locked = False
+
+        self.invalidate_layers()
+
+    def flush(self):
+        """
+        Envía a la pantalla las regiones modificadas cuando se usa el
+        framebuffer en RAM. Sin framebuffer no hace nada.
+        """
+        if not self.display.has_framebuffer():
+            return
+
+        try:
+            with self._lock:
+                self.display.flush()
+        except Exception as e:
+            if self.DEBUG:
+                print('Error en flush(): {}'.format(e))
+
+    def invalidate_grid(self):
+        """
+        Olvida el estado dibujado del grid para que la próxima llamada a
+        grid_update() redibuje todas las celdas.
+        """
+        for cell in self._grid_cells:
+            cell[0] = None
+            cell[1] = _STALE
+            cell[3] = _STALE
 
     def loop(self):
         """
-        Mientras la pantalla esté encendida, comprobar si se apaga cada 10 segundos
+        Aplica los cambios de encendido pedidos por el botón y apaga la
+        pantalla cuando pasa el tiempo configurado sin pulsarlo.
         """
+        request = None
+        requests = self._power_requests
 
-        diffSeconds = time() - self.display_on_at
-        diffMinutes = diffSeconds / 60
+        # Se compara un contador en lugar de vaciar la petición, así una
+        # pulsación que llegue mientras tanto no se pierde
+        if requests != self._power_handled:
+            self._power_handled = requests
+            request = self._power_request
 
-        if diffMinutes > self.TIME_TO_OFF and self.display_on:
-            self.display_on = False
+        if request is True:
+            self.display_on_at = time()
 
-            # Apaga el led para la pantalla
-            if self.pin_backlight is not None:
-                self.pin_backlight.off()
+            if not self.display_on:
+                self.power_on()
+        elif request is False and self.display_on:
+            self.power_off()
 
-            #self.cleanDisplay()
+        diffSeconds = time() - self.display_on_at
 
-        #elif not self.display_on:
-        #    self.callbackDisplayOn()
+        # Comparación entera, sin dividir entre 60 para no crear un float
+        if diffSeconds > self.TIME_TO_OFF * 60 and self.display_on:
+            self.power_off()
 
-    def callbackDisplayOn(self, pin=None):
+    def power_off(self):
         """
-        Callback para encender la pantalla, se dispara al pulsar el botón de encendido
+        Apaga la retroiluminación y pone el panel en reposo (DISPOFF y
+        SLPIN). Mientras está apagada no se dibuja nada y el estado guardado
+        de la pantalla se da por obsoleto.
         """
-        if self.btn_display_on.value() == 1:
-            while self.locked:
-                if self.DEBUG:
-                    print('Esperando a que se desbloquee la pantalla en callbackDisplayOn()')
+        try:
+            with self._lock:
+                self.display_on = False
 
-                sleep_ms(10)
+                # Apaga el led para la pantalla
+                if self.pin_backlight is not None:
+                    self.pin_backlight.off()
 
-            try:
-                self.display_on = True
+                self.display.sleep()
+        except Exception as e:
+            if self.DEBUG:
+                print('Error al apagar la pantalla: {}'.format(e))
 
-                # Enciende el led de la pantalla
-                if self.pin_backlight is not None:
-                    self.pin_backlight.on()
+        self.invalidate_grid()
+
+    def power_on(self):
+        """
+        Saca el panel del reposo y redibuja una sola vez la página visible
+        completa con los últimos datos.
+        """
+        try:
+            with self._lock:
+                self.display.wake()
+        except Exception as e:
+            if self.DEBUG:
+                print('Error al encender la pantalla: {}'.format(e))
 
-                #self.reset()
-                self.display_on_at = time()
+        self.display_on = True
+        self.display_on_at = time()
 
-                #self.displayHeadInfo(wifi_status=False)
-                #self.displayFooterInfo()
-                #sleep_ms(self.DELAY)
-                #self.grid_create()
+        if self.page == self.PAGE_HISTORY:
+            try:
+                with self._lock:
+                    self.history.activate()
             except Exception as e:
                 if self.DEBUG:
-                    print('Error al encender la pantalla: {}'.format(e))
-            finally:
-                self.locked = False
-
+                    print('Error al redibujar el historial: {}'.format(e))
         else:
-            # En caso de entrar con la pantalla encendida, la apago
-            self.display_on = False
+            if self.history is not None and self.history.active:
+                with self._lock:
+                    self.history.deactivate()
 
-            if self.pin_backlight is not None:
-                self.pin_backlight.off()
+            self.cleanDisplay()
+            self.displayHeadInfo(self._wifi_status)
+            self.displayFooterInfo(self._footer_center)
+            self.grid_create()
+            self.grid_update()
 
-            #self.cleanDisplay()
+        self.flush()
 
-        sleep_ms(50)
+        # Enciende el led de la pantalla tras tener la imagen completa
+        if self.pin_backlight is not None:
+            self.pin_backlight.on()
 
+    def callbackDisplayOn(self, pin=None):
+        """
+        Callback para encender la pantalla, se dispara al pulsar el botón de
+        encendido. Dentro de la interrupción solo se lee el pin y se aplaza
+        el resto con micropython.schedule(), sin esperas ni locks.
+        """
+        if self._button_scheduled:
+            return
 
-    def printChar(self, x, y, ch, color, bg_color):
+        self._button_scheduled = True
+
+        try:
+            micropython.schedule(self._button_handler, self.btn_display_on.value())
+        except RuntimeError:
+            # Cola de tareas llena, se descarta esta pulsación
+            self._button_scheduled = False
+
+    def _on_button(self, value):
+        """
+        Procesa la pulsación fuera de la interrupción: descarta rebotes y
+        anota la petición que aplicará loop() desde el hilo que renderiza.
+        """
+        self._button_scheduled = False
+
+        now = ticks_ms()
+
+        if ticks_diff(now, self._button_at) < self.BUTTON_DEBOUNCE_MS:
+            return
+
+        self._button_at = now
+
+        # Con el botón soltado al leerlo (rebote) se interpreta como apagar
+        self._power_request = value == 1
+        self._power_requests += 1
+
+    def render(self, frame):
+        """
+        Dibuja un fotograma completo: estado de encendido, página, cabecera,
+        footer, historial y grid, y envía el framebuffer si se usa.
+
+        Es el único punto de entrada cuando la pantalla se renderiza desde
+        el segundo núcleo (ver Models/DisplayWorker.py).
+
+        :param frame: Tupla (valores, estado wifi, texto del footer, página)
+                      con los valores de WeatherStation.snapshot(). Con texto
+                      del footer None se mantiene el anterior.
+        """
+        values, wifi_status, footer, page = frame
+
+        # Encendido/apagado pedido por el botón o por tiempo
+        self.loop()
+
+        if page != self.page:
+            self.set_page(page)
+
+        self.displayHeadInfo(wifi_status)
+
+        if footer is not None:
+            self.displayFooterInfo(center=footer)
+
+        self.history_push(values)
+        self.grid_update(values)
+        self.flush()
+
+    def set_page(self, page):
+        """
+        Cambia la página visible entre el grid y el historial.
+
+        El historial solo existe en orientación apaisada, en otro caso se
+        mantiene el grid. Al volver al grid se restablece el scroll y se
+        redibuja la pantalla completa.
+        """
+        if page == self.page:
+            return
+
+        if page == self.PAGE_HISTORY and self.history is None:
+            return
+
+        # Apagada solo se anota la página, power_on() la dibuja al encender
         if not self.display_on:
+            self.page = page
             return
 
-        while self.locked:
+        try:
+            with self._lock:
+                if page == self.PAGE_HISTORY:
+                    self.history.activate()
+                else:
+                    self.history.deactivate()
+        except Exception as e:
             if self.DEBUG:
-                print('Esperando a que se desbloquee la pantalla en printChar()')
+                print('Error en set_page(): {}'.format(e))
+
+        self.page = page
 
-            sleep_ms(10)
+        if page == self.PAGE_GRID:
+            self.cleanDisplay()
+            self.displayHeadInfo(self._wifi_status)
+            self.displayFooterInfo(self._footer_center)
+            self.grid_create()
+
+    def history_push(self, values=None):
+        """
+        Añade los valores actuales al historial, dibujando solo la columna
+        nueva si el historial está visible.
+
+        :param values: Copia de WeatherStation.snapshot(), si no se indica
+                       se leen los datos actuales de WeatherStation.data.
+        """
+        # La tupla de valores solo se crea cuando toca guardar una muestra
+        if self.history is None or not self.history.due():
+            return
 
         try:
-            self.locked = True
-
-            font = self.FONTS['normal']  ## Fuente
-            font_height = font['h']  # Alto de la letra
-            font_width = font['w']  # Ancho de la letra
-            font_padding = font['font_padding']
-
-            fp = (ord(ch)-0x20) * font_width
-            f = open(font['font'], 'rb')
-            f.seek(fp)
-            b = f.read(font_width)
-            char_buf = bytearray(b)
-            char_buf.append(0)
-
-            font_height_padding = font_height + font_padding
-            font_width_padding = font_width + font_padding
-
-            # Creo la imagen del carácter teniendo en cuenta padding
-            char_image = bytearray()
-            for bit in range(font_height_padding):
-                for c in range(font_width_padding):
-                    if ((char_buf[c] >> bit) & 1) > 0:
-                        char_image.append(color >> font_height_padding)
-                        char_image.append(color & 0xff)
-                    else:
-                        char_image.append(bg_color >> font_height_padding)
-                        char_image.append(bg_color & 0xff)
-
-            self.display.draw_bmp(x, y, font_width_padding, font_height_padding, char_image)
+            with self._lock:
+                if values is None:
+                    self.history.push(WeatherStation.data, draw=self.display_on)
+                else:
+                    self.history.push_values(
+                        tuple(values[key][0] if key in values else None
+                              for key, _, _, _ in self.history.SERIES),
+                        draw=self.display_on)
+        except Exception as e:
+            if self.DEBUG:
+                print('Error en history_push(): {}'.format(e))
+
+    def load_font(self, path):
+        """
+        Lee el archivo de la fuente completo y lo devuelve en un bytearray.
+        """
+        with open(path, 'rb') as f:
+            return bytearray(f.read())
+
+    def get_glyph(self, ch, color, bg_color):
+        """
+        Devuelve la imagen RGB565 del carácter (incluyendo el padding) desde
+        la caché, expandiéndola y almacenándola si aún no estaba.
+        """
+        code = ch if isinstance(ch, int) else ord(ch)
+
+        # Los carácteres fuera de la fuente se sustituyen por '?'
+        if code < 0x20 or code >= self._font_end:
+            code = 0x3F
+
+        # Clave entera pequeña (paleta y carácter) para no crear una tupla
+        # en cada búsqueda
+        key = (self._palette_index(color, bg_color) << 7) | code
+        glyph = self._glyph_cache.get(key)
+
+        if glyph is None:
+            glyph = self.expand_glyph(code, color, bg_color)
+            self._glyph_cache.put(key, glyph)
+
+        return glyph
+
+    def _palette_index(self, color, bg_color):
+        """
+        Número de la pareja de colores (texto, fondo), se asigna la primera
+        vez que se usa.
+        """
+        by_background = self._palettes.get(color)
+
+        if by_background is None:
+            by_background = {}
+            self._palettes[color] = by_background
+
+        index = by_background.get(bg_color)
+
+        if index is None:
+            index = self._palette_count
+            self._palette_count += 1
+            by_background[bg_color] = index
+
+        return index
+
+    def expand_glyph(self, ch, color, bg_color):
+        """
+        Crea la imagen RGB565 de un carácter a partir de las columnas de la
+        fuente cargada en RAM.
+        """
+        font = self.FONTS['normal']  ## Fuente
+        font_height = font['h']  # Alto de la letra
+        font_width = font['w']  # Ancho de la letra
+        font_padding = font['font_padding']
+
+        font_height_padding = font_height + font_padding
+        font_width_padding = font_width + font_padding
+
+        # Los carácteres fuera de la fuente se sustituyen por '?'
+        index = (ch if isinstance(ch, int) else ord(ch)) - 0x20
+        if index < 0 or (index + 1) * font_width > len(self._font_data):
+            index = ord('?') - 0x20
+
+        fp = index * font_width
+        columns = self._font_data[fp:fp + font_width]
+
+        color_high = color >> 8
+        color_low = color & 0xff
+        bg_high = bg_color >> 8
+        bg_low = bg_color & 0xff
+
+        # Creo la imagen del carácter teniendo en cuenta padding
+        char_image = bytearray(font_width_padding * font_height_padding * 2)
+        i = 0
+        for bit in range(font_height_padding):
+            for c in range(font_width_padding):
+                if c < font_width and (columns[c] >> bit) & 1:
+                    char_image[i] = color_high
+                    char_image[i + 1] = color_low
+                else:
+                    char_image[i] = bg_high
+                    char_image[i + 1] = bg_low
+                i += 2
+
+        return char_image
+
+    def printChar(self, x, y, ch, color, bg_color):
+        if not self.display_on:
+            return
+
+        try:
+            with self._lock:
+                font = self.FONTS['normal']  ## Fuente
+                font_padding = font['font_padding']
+
+                char_image = self.get_glyph(ch, color, bg_color)
+
+                self.display.draw_bmp(x, y, font['w'] + font_padding, font['h'] + font_padding, char_image)
         except Exception as e:
             if self.DEBUG:
                 print('Error en printChar(): {}'.format(e))
-        finally:
-            self.locked = False
 
     def printByPos(self, line, pos, content, length = None, color = 0xFFE0, background = 0x0000):
         """
-        Imprime contenido en una posición determinada borrando previamente el contenido si recibe longitud
+        Imprime contenido en una posición determinada. Solo se dibujan los
+        carácteres distintos a los que ya había en esa posición.
 
         line: integer, línea en eje vertical dónde se imprimirá el contenido
         pos: integer, posición en eje horizontal dónde se imprimirá el contenido
         content: string, contenido a dibujar
-        length: integer, longitud del contenido a borrar (cantidad de carácteres). Esto es para no dejar residuos de contenido anterior
+        length: integer, longitud mínima del contenido (cantidad de carácteres), se rellena con espacios. Esto es para no dejar residuos de contenido anterior
         """
 
         font = self.FONTS['normal']  ## Fuente
@@ -299,17 +706,172 @@ class DisplayST7735_128x160():
         pixels_x = pos * font_total_width # Posición en eje horizontal para iniciar a dibujar
         pixels_y = line * line_height # Posición en eje vertical para iniciar a dibujar
 
-        # Si recibo la longitud, borro el contenido previo
-        if length:
-            clean_length_width = int(length) * font_total_width
+        # Si recibo la longitud, los espacios borran el contenido previo
+        if length and len(content) < int(length):
+            content = content + ' ' * (min(int(length), max_line_chars) - len(content))
+
+        self.printSlot(pixels_x, pixels_y + font['font_padding'], content, color, background)
+
+    def printSlot(self, x, y, content, color, background):
+        """
+        Dibuja texto en un hueco que recuerda la última cadena dibujada en
+        esa posición y solo envía los tramos de carácteres que han cambiado.
+
+        Si la nueva cadena es más corta se completa con espacios para borrar
+        los carácteres sobrantes de la anterior.
+
+        content puede ser str o bytes/bytearray; con bytearray (como los
+        buffers del grid) y el hueco ya creado no se reserva memoria.
+
+        Returns:
+            int: Carácteres dibujados.
+        """
+        if not self.display_on:
+            return 0
+
+        if isinstance(content, str):
+            content = self._text_bytes(content)
+
+        length = len(content)
+        key = (y << 8) | x
+        slot = self._text_slots.get(key)
 
-            self.display.draw_block(pixels_x, pixels_y, clean_length_width, line_height, background)
+        # Hueco: [carácteres dibujados, cantidad (-1 sin dibujar), color, fondo]
+        if slot is None or len(slot[0]) < length:
+            slot = [bytearray(max(length, self.GRID_TEXT_CHARS)), -1, color, background]
+            self._text_slots[key] = slot
 
-        pixels_x_counter = pixels_x
+        drawn_text = slot[0]
+        old_length = slot[1]
 
-        for ch in (content):
-            self.printChar(pixels_x_counter, pixels_y + font['font_padding'], ch, color, background)
-            pixels_x_counter += font_width + font['font_padding']
+        if old_length < 0 or slot[2] != color or slot[3] != background:
+            for i in range(length):
+                drawn_text[i] = content[i]
+
+            self.printText(x, y, drawn_text, color, background, 0, length)
+            slot[1] = length
+            slot[2] = color
+            slot[3] = background
+            self.glyphs_drawn += length
+
+            return length
+
+        font = self.FONTS['normal']
+        glyph_width = font['w'] + font['font_padding']
+        total = length if length > old_length else old_length
+        drawn = 0
+        i = 0
+
+        while i < total:
+            c = content[i] if i < length else 0x20
+
+            if i < old_length and c == drawn_text[i]:
+                self.glyphs_skipped += 1
+                i += 1
+                continue
+
+            # Tramo de carácteres consecutivos que han cambiado, se guardan
+            # en el hueco y se dibujan desde ahí
+            end = i
+
+            while end < total:
+                c = content[end] if end < length else 0x20
+
+                if end < old_length and c == drawn_text[end]:
+                    break
+
+                drawn_text[end] = c
+                end += 1
+
+            self.printText(x + i * glyph_width, y, drawn_text, color, background, i, end)
+            drawn += end - i
+            i = end
+
+        slot[1] = total
+        self.glyphs_drawn += drawn
+
+        return drawn
+
+    def _text_bytes(self, text):
+        """
+        Convierte una cadena a bytes ASCII, lo que no es ASCII pasa a '?'.
+        """
+        return bytes(ord(c) if ord(c) < 0x80 else 0x3F for c in text)
+
+    def forget_text(self, y_start=0, y_end=None):
+        """
+        Olvida lo dibujado en los huecos de texto entre las dos alturas,
+        necesario cuando se pinta encima de ellos (fondos, limpiar pantalla).
+        Los buffers de los huecos se conservan.
+        """
+        for key, slot in self._text_slots.items():
+            if y_end is None or y_start <= (key >> 8) < y_end:
+                slot[1] = -1
+
+    def text_stats(self):
+        """
+        Devuelve los carácteres dibujados y los omitidos por no haber
+        cambiado desde la llamada anterior y reinicia los contadores.
+        """
+        stats = (self.glyphs_drawn, self.glyphs_skipped)
+        self.glyphs_drawn = 0
+        self.glyphs_skipped = 0
+
+        return stats
+
+    def printText(self, x, y, content, color, background, start=0, end=None):
+        """
+        Dibuja una cadena completa componiendo todos los carácteres en el
+        buffer de texto y enviándola con una sola ventana de dirección y una
+        sola escritura SPI, en lugar de una por carácter.
+
+        content puede ser str o bytes/bytearray, de este último se dibujan
+        los carácteres entre start y end.
+
+        Los carácteres que no caben enteros hasta el borde de la pantalla se
+        descartan.
+        """
+        if not self.display_on:
+            return
+
+        if isinstance(content, str):
+            content = self._text_bytes(content)
+
+        if end is None:
+            end = len(content)
+
+        font = self.FONTS['normal']  ## Fuente
+        glyph_width = font['w'] + font['font_padding']
+        glyph_height = font['h'] + font['font_padding']
+        glyph_row_bytes = glyph_width * 2
+
+        chars = min(end - start, (self.DISPLAY_WIDTH - x) // glyph_width)
+
+        if chars <= 0:
+            return
+
+        try:
+            with self._lock:
+                buffer = self._text_buffer
+                line_row_bytes = chars * glyph_row_bytes
+
+                # Copio cada fila de cada carácter en su lugar de la línea
+                for i in range(chars):
+                    glyph = self.get_glyph(content[start + i], color, background)
+                    _copy_rows(glyph, buffer, i * glyph_row_bytes,
+                               glyph_row_bytes, glyph_height, line_row_bytes)
+
+                # Vista del tamaño exacto, se crea una vez por longitud
+                view = self._text_views.get(chars)
+
+                if view is None:
+                    view = memoryview(buffer)[:line_row_bytes * glyph_height]
+                    self._text_views[chars] = view
+
+                self.display.draw_bmp(x, y, chars * glyph_width, glyph_height, view)
+        except Exception as e:
+            if self.DEBUG:
+                print('Error en printText(): {}'.format(e))
 
 
     def displayHeadInfo(self, wifi_status):
@@ -318,15 +880,22 @@ class DisplayST7735_128x160():
         - Estado de la conexión wifi
         - Estado de la subida de datos a la API
         - ¿Título o logotipo?
+
+        El fondo y el nombre forman la capa estática y se dibujan una sola
+        vez, en las siguientes llamadas solo cambia el estado del wifi.
         """
+        self._wifi_status = wifi_status
 
-        while self.locked:
-            if self.DEBUG:
-                print('Esperando a que se desbloquee la pantalla en displayHeadInfo()')
+        if self.page != self.PAGE_GRID or not self.display_on:
+            return
 
-            sleep_ms(10)
+        wifi_on = wifi_status >= 3
 
-        font = self.FONTS['normal']  ## Fuente
+        # Sin cambios no se compone ningún texto
+        if wifi_on is self._wifi_drawn and 'header' in self._static_layers:
+            return
+
+        font = self.FONTS['normal']  ## Fuente
         font_width = font['w']  # Ancho de la letra
         font_total_width = font_width + (font['font_padding'] * 2)
 
@@ -336,17 +905,6 @@ class DisplayST7735_128x160():
         color = self.COLORS['yellow1']
         background = self.COLORS['red3']
 
-        ## Dibujar fondo de una línea
-        self.display.draw_block(0, 0, self.DISPLAY_WIDTH, font['line_height'], background)
-
-        """
-        NOMBRE
-        """
-        center_content = ' WEATHER STATION'
-
-        self.printByPos(0, 0, center_content, len(center_content),
-                        color, background)
-
         """
         INFORMACIÓN DEL WIFI
         """
@@ -354,210 +912,342 @@ class DisplayST7735_128x160():
 
         # Posición del comienzo para el estado del wifi. Calculado desde la derecha de la pantalla
         pos_wireless_start = max_line_chars - block_wireless_width
-        wifi_on = 'ON' if wifi_status >= 3 else 'OFF'
-        content = ' W: ' + wifi_on # W: ON | W: OFF
+
+        if 'header' not in self._static_layers:
+            self._draw_header_static(pos_wireless_start * font_total_width, color, background)
+
+        content = ' W: ' + ('ON' if wifi_on else 'OFF') # W: ON | W: OFF
 
         self.printByPos(0, pos_wireless_start, content, block_wireless_width, color, background)
+        self._wifi_drawn = wifi_on
+
+    def _draw_header_static(self, title_max_width, color, background):
+        """
+        Capa estática de la cabecera: fondo y nombre.
+        """
+        font = self.FONTS['normal']  ## Fuente
+
+        try:
+            with self._lock:
+                ## Dibujar fondo de una línea
+                self.display.draw_block(0, 0, self.DISPLAY_WIDTH, font['line_height'], background)
+        except Exception as e:
+            if self.DEBUG:
+                print('Error al dibujar el fondo de la cabecera: ' + str(e))
+
+        self.forget_text(0, font['line_height'])
+
+        """
+        NOMBRE
+        """
+        center_content = ' WEATHER STATION'
+
+        # En vertical el nombre completo se solaparía con el estado del wifi
+        if len(center_content) * (font['w'] + font['font_padding']) > title_max_width:
+            center_content = ' WEATHER'
 
+        self.printByPos(0, 0, center_content, len(center_content),
+                        color, background)
+
+        self._static_layers.add('header')
 
     def displayFooterInfo(self, center = 'WEATHER STATION'):
+        """
+        Dibuja el texto centrado en el footer. El fondo es la capa estática
+        y se dibuja una sola vez; el texto ocupa siempre la línea completa
+        para que al cambiar la hora solo se redibujen los dígitos distintos.
+        """
+        self._footer_center = center
 
-        while self.locked:
-            if self.DEBUG:
-                print('Esperando a que se desbloquee la pantalla en displayFooterInfo()')
+        if self.page != self.PAGE_GRID or not self.display_on:
+            return
 
-            sleep_ms(10)
+        if center == self._footer_drawn and 'footer' in self._static_layers:
+            return
 
-        font = self.FONTS['normal']  ## Fuente
+        font = self.FONTS['normal']  ## Fuente
         font_width = font['w']  # Ancho de la letra
         font_total_width = font_width + font['font_padding']
 
         # Cantidad máxima de carácteres en la línea
         max_line_chars = floor(self.DISPLAY_WIDTH / font_total_width)
 
+        line = self._footer_line
+
+        color = self.COLORS['black']
+        background = self.COLORS['white']
+
+        if 'footer' not in self._static_layers:
+            self._draw_footer_static(line, background)
+
         """
         INFORMACIÓN EN EL CENTRO
         """
-        start_x = floor((max_line_chars/2) - (len(center) / 2))
+        content = center[:max_line_chars].center(max_line_chars)
+        start_x = (self.DISPLAY_WIDTH - max_line_chars * font_total_width) // 2
 
-        line = floor((self.DISPLAY_HEIGHT / font['line_height']) - 1)
+        self.printSlot(start_x, line * font['line_height'] + font['font_padding'],
+                       content, color, background)
+        self._footer_drawn = center
 
-        color = self.COLORS['black']
-        background = self.COLORS['white']
+    def _draw_footer_static(self, line, background):
+        """
+        Capa estática del footer: fondo de la línea completa.
+        """
+        font = self.FONTS['normal']  ## Fuente
+        line_y = line * font['line_height']
 
         try:
-            # TODO: Extraer el "draw_block" a un método de esta clase
-            self.locked = True
-            self.display.draw_block(0, line * font['line_height'], self.DISPLAY_WIDTH, font['line_height'], background)
-
+            with self._lock:
+                self.display.draw_block(0, line_y, self.DISPLAY_WIDTH, font['line_height'], background)
         except Exception as e:
             if self.DEBUG:
                 print('Error al dibujar el bloque de información en el footer: ' + str(e))
-        finally:
-            self.locked = False
 
-        self.printByPos(line, start_x, center, len(center), color, background)
+        self.forget_text(line_y, line_y + font['line_height'])
+        self._static_layers.add('footer')
 
+    def invalidate_layers(self):
+        """
+        Marca las capas estáticas como no dibujadas y olvida los textos, la
+        siguiente llamada a displayHeadInfo(), displayFooterInfo() y
+        grid_update() dibujará todo de nuevo.
+        """
+        self._static_layers = set()
+        self._wifi_drawn = None
+        self._footer_drawn = None
+        self.forget_text()
+        self.invalidate_grid()
 
     def load_bmp(self, path, x, y, width, height):
-        def load_bmp (filename):
-            with open(filename, 'rb') as f:
-                return f.read()
-
-        image = load_bmp(path)
-
-        self.display.draw_bmp(x, y, width, height, image)
+        """
+        Dibuja un icono obtenido desde el almacén de iconos en RAM. Admite
+        RGB565 sin comprimir, con paleta de 4 bits (.p4) y RGB565 con RLE
+        (.rle565), estos dos últimos se decodifican directamente hacia la
+        pantalla.
+        """
+        # El almacén comparte un buffer de lectura, también va bajo el lock
+        with self._lock:
+            image = self._icons.get(path)
+
+            if path.endswith('.p4'):
+                self.display.draw_p4(x, y, image)
+            elif path.endswith('.rle565'):
+                self.display.draw_rle565(x, y, image)
+            else:
+                self.display.draw_bmp(x, y, width, height, image)
 
-    def grid_create (self):
+    def compile_layout (self):
         """
-        Crea el grid de 3x3 cuadrados dónde se colocarán los elementos.
-        La cuadrícula se encuentra en el centro de la pantalla con un
-        margen superior e inferior de 9px para respetar el encabezado y el
-        footer.
+        Calcula una sola vez, para la orientación y forma del grid actuales,
+        la tabla de huecos del grid: coordenadas de cada celda, posición del
+        icono y origen de las dos líneas de texto, junto a los rangos e
+        iconos de su sensor. grid_create() y grid_update() solo recorren
+        esta tabla.
+
+        Si la celda es lo bastante ancha el texto va a la derecha del
+        icono, en otro caso debajo de él.
         """
-        cell_width = self.DISPLAY_WIDTH // 3
-        cell_height = (
-                                  self.DISPLAY_HEIGHT - 18) // 3  # 18px for header and footer
-        bg_color = self.COLORS['black']
+        rows, cols = self.grid_shape
 
-        data_images = WeatherStation.data_images
+        font = self.FONTS['normal']
+        line_height = font['line_height']
+
+        # Línea del footer, el grid ocupa desde la cabecera (9px) hasta ella
+        self._footer_line = self.DISPLAY_HEIGHT // line_height - 1
+
+        cell_width = self.DISPLAY_WIDTH // cols
+        cell_height = (self._footer_line * line_height - 9) // rows
+        char_step = font['w'] + (font['font_padding'] * 2)  # Igual que printByPos()
+        text_width = self.GRID_TEXT_CHARS * (font['w'] + font['font_padding'])
+        text_height = 2 * line_height
+        img_width = self.GRID_ICON_WIDTH
+        img_height = self.GRID_ICON_HEIGHT
+        margin = 1
+
+        side_by_side = cell_width >= img_width + margin + text_width
+
+        ranges = WeatherStation.data_ranges
+        images = WeatherStation.data_images
 
-        # Iterate over 3 rows and 3 columns
-        for row in range(3):
+        layout = []
 
-            if row == 0:
-                columns = ['temperature', 'air_quality', 'light']
-            elif row == 1:
-                columns = ['humidity', 'co2', 'uv']
-            elif row == 2:
-                columns = ['pressure', 'tvoc', 'sound']
+        for slot, key in enumerate(self.grid_keys[:rows * cols]):
+            x = (slot % cols) * cell_width
+            y = (slot // cols) * cell_height + 9  # Margen superior de 9px
+
+            if side_by_side:
+                img_x = x
+                img_y = y + (cell_height - img_height) // 2
+
+                # Texto ajustado a la rejilla de carácteres de printByPos()
+                text_y = y + (cell_height - text_height) // 2
+                text_line = text_y // line_height
+                text_x = ((x + img_width + margin) // char_step + margin) * char_step
+                value_y = text_line * line_height + font['font_padding']
             else:
-                continue
+                block_height = img_height + margin + text_height
+                img_x = x + (cell_width - img_width) // 2
+                img_y = y + max(0, (cell_height - block_height) // 2)
+                text_x = x + (cell_width - text_width) // 2
+
+                # Si no cabe todo, el texto tapa la parte baja del icono
+                # antes que salirse de la celda
+                value_y = min(img_y + img_height + margin,
+                              y + cell_height - text_height) + font['font_padding']
+
+            sensor_ranges = ranges[key]
+            sensor_images = images[key]
+
+            layout.append((
+                key,
+                x, y, cell_width, cell_height,
+                img_x, img_y,
+                text_x, value_y, value_y + line_height,
+                (sensor_ranges['low'][0], sensor_ranges['low'][1],
+                 sensor_ranges['medium'][0], sensor_ranges['medium'][1],
+                 sensor_ranges['high'][0], sensor_ranges['high'][1]),
+                {
+                    'low': sensor_images['low'],
+                    'medium': sensor_images['medium'],
+                    'high': sensor_images['high'],
+                },
+            ))
+
+        self._grid_layout = layout
+
+        # Buffers de texto preasignados, grid_update() escribe en ellos
+        chars = self.GRID_TEXT_CHARS
+        self._grid_cells = [[None, _STALE, bytearray(chars), _STALE, bytearray(chars)]
+                            for _ in layout]
+
+        self.invalidate_layers()
 
-            for col in range(3):
-                images = data_images.get(columns[col])
-                image = images.get('medium')
+    def grid_create (self):
+        """
+        Crea el grid de celdas dónde se colocarán los elementos según la
+        tabla calculada en compile_layout(). La cuadrícula se encuentra en el
+        centro de la pantalla con un margen superior e inferior de 9px para
+        respetar el encabezado y el footer.
+        """
+        # Apagada no se dibuja, al encender se crea de nuevo
+        if not self.display_on:
+            return
 
-                x = col * cell_width
-                y = row * cell_height + 9  # Adding the 9px top margin
+        bg_color = self.COLORS['black']
+        img_width = self.GRID_ICON_WIDTH
+        img_height = self.GRID_ICON_HEIGHT
+        cells = self._grid_cells
+        layout = self._grid_layout
 
-                self.display.draw_block(x, y, cell_width, cell_height, bg_color)
+        # Los fondos de las celdas tapan los textos dibujados en el grid
+        if layout:
+            self.forget_text(layout[0][2], layout[-1][2] + layout[-1][4])
 
-                img_width = 15
-                img_height = 30
-                img_y = y + (cell_height - img_height) // 2
+        for slot, (_, x, y, w, h, img_x, img_y, _, _, _, _, images) in enumerate(layout):
+            with self._lock:
+                self.display.draw_block(x, y, w, h, bg_color)
 
-                # Placeholder for the image
-                #self.display.draw_block(x, img_y, img_width, img_height, self.COLORS['gray4'])
+            self.load_bmp(images['medium'], img_x, img_y, img_width, img_height)
 
-                self.load_bmp(image, x, img_y, img_width, img_height)
+            # El icono está dibujado, los textos se han olvidado arriba
+            cells[slot][0] = 'medium'
 
-    def grid_update (self):
+    def grid_update (self, values=None):
         """
-        Actualiza los datos en el grid de 3x3 cuadrados en el centro de la pantalla.
+        Actualiza los datos del grid en el centro de la pantalla.
+
+        Solo se dibujan los iconos cuyo rango ha cambiado y los textos
+        distintos a los ya dibujados en cada celda.
+
+        :param values: Copia de WeatherStation.snapshot() a dibujar, si no
+                       se indica se leen los datos de WeatherStation.data.
+
+        Returns:
+            int: Cantidad de celdas en las que se ha redibujado algo.
         """
-        data = WeatherStation.data
+        data = WeatherStation.data if values is None else values
 
-        if not data:
-            return
+        if not data or self.page != self.PAGE_GRID or not self.display_on:
+            return 0
 
-        cell_width = self.DISPLAY_WIDTH // 3
-        cell_height = (
-                                  self.DISPLAY_HEIGHT - 18) // 3  # 18px for header and footer
-        margin = 1
-        img_width = 15
-        img_height = 30  # Assumed height based on 'grid_create'
+        redraws = 0
 
-        font = self.FONTS['normal']
+        img_width = self.GRID_ICON_WIDTH
+        img_height = self.GRID_ICON_HEIGHT
         text_color = self.COLORS['white']
         bg_color = self.COLORS['black']
+        cells = self._grid_cells
+        layout = self._grid_layout
 
-        font_total_height = font['line_height']
-        total_text_height = 2 * font_total_height  # Para dos líneas de texto
-
-        data_ranges = WeatherStation.data_ranges
-        data_images = WeatherStation.data_images
-
-        # Iterar sobre 3 filas y 3 columnas
-        for row in range(3):
-            if row == 0:
-                columns = ['temperature', 'air_quality', 'light']
-            elif row == 1:
-                columns = ['humidity', 'co2', 'uv']
-            elif row == 2:
-                columns = ['pressure', 'tvoc', 'sound']
-            else:
-                continue
+        # Se recorre por índice: enumerate() y el desempaquetado de sus
+        # tuplas reservarían memoria en cada celda
+        for slot in range(len(layout)):
+            key, _, _, _, _, img_x, img_y, text_x, value_y, unit_y, bounds, images = layout[slot]
 
-            for col in range(3):
-                stats = data.get(columns[col])
+            if values is None:
+                stats = data[key]
                 value = stats.get('current')
                 unit = stats.get('unit')
+            else:
+                value, unit = data[key]
 
-                ranges = data_ranges.get(columns[col])
-                images = data_images.get(columns[col])
+            sensor_range = 'medium'
 
-                sensor_range = 'medium'
+            if isinstance(value, (int, float)):
+                sensor_range = self._get_range(key, bounds, value)
 
-                if isinstance(value, float):
-                    sensor_range = WeatherStation.get_range(columns[col], value)
+            cell = cells[slot]
 
-                    if value > 999.9:
-                        value = int(value)
-                    else:
-                        value = round(value, 1)
-                elif isinstance(value, int):
-                    sensor_range = WeatherStation.get_range(columns[col], value)
+            # Los textos se formatean en los buffers de la celda solo cuando
+            # cambia el valor o la unidad
+            last = cell[1]
 
-                elif value is None:
-                    value = '-'
+            if last is _STALE or value != last or type(value) is not type(last):
+                if isinstance(value, str):
+                    format_text(cell[2], value)
+                else:
+                    format_value(cell[2], value)
 
-                image = images.get(sensor_range)
+                cell[1] = value
 
-                # Asegúrate de que 'value' sea una cadena
-                if not isinstance(value, str):
-                    value = str(value)
+            if unit is not cell[3]:
+                format_text(cell[4], unit if isinstance(unit, str) else str(unit))
+                cell[3] = unit
 
-                # Asegúrate de que 'unit' sea una cadena
-                if not isinstance(unit, str):
-                    unit = str(unit)
+            redraw_image = cell[0] != sensor_range
 
-                # Centramos las cadenas a 5 caracteres
-                value = value.center(5)
-                unit = unit.center(5)
+            if redraw_image:
+                self.load_bmp(images[sensor_range], img_x, img_y, img_width, img_height)
+                cell[0] = sensor_range
 
-                x = col * cell_width
-                y = row * cell_height + 9  # Añadiendo margen superior de 9px
+            # printSlot() solo dibuja los carácteres distintos a los que ya
+            # hay en pantalla
+            drawn = self.printSlot(text_x, value_y, cell[2], text_color, bg_color)
+            drawn += self.printSlot(text_x, unit_y, cell[4], text_color, bg_color)
 
-                # Ajuste para centrar texto verticalmente dentro de la celda
-                text_y = y + (
-                        cell_height - total_text_height) // 2  # Donde comienza el texto dentro de la celda
+            if redraw_image or drawn:
+                redraws += 1
 
-                text_x = x + img_width + margin  # Ajustar la posición x en base al ancho de la imagen y el margen de manera uniforme para todas las columnas
+        self.grid_redraws = redraws
 
-                text_pos_x = ceil(
-                    text_x // (font['w'] + (font['font_padding'] * 2))) + margin
+        if self.DEBUG:
+            print('Celdas redibujadas en grid_update(): {}'.format(redraws))
 
-                # Replicar cálculo de posición de la imagen de grid_create
-                img_y = y + (cell_height - img_height) // 2
+        return redraws
 
-                # Dibujar la nueva imagen en la misma posición
-                self.load_bmp(image, x, img_y, img_width, img_height)
-
-                # Ajustar posición vertical del texto usando text_y
-                self.printByPos(
-                    text_y // font['line_height'],
-                    text_pos_x,
-                    value,
-                    None,
-                    text_color,
-                    bg_color
-                )
-                self.printByPos(
-                    (text_y // font['line_height']) + 1,
-                    text_pos_x,
-                    unit,
-                    None,
-                    text_color,
-                    bg_color
-                )
+    @staticmethod
+    def _get_range (key, bounds, value):
+        """
+        Igual que WeatherStation.get_range() pero con los límites ya leídos
+        en la tabla del grid: (bajo, bajo, medio, medio, alto, alto).
+        """
+        if bounds[0] <= value <= bounds[1]:
+            return 'low'
+        elif bounds[2] <= value <= bounds[3]:
+            return 'medium'
+        elif bounds[4] <= value <= bounds[5]:
+            return 'high'
+
+        raise ValueError(
+            'Value {} is out of range for sensor type {}'.format(value, key))
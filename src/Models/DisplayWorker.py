@@ -0,0 +1,82 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+import _thread
+from time import ticks_us, ticks_diff
+from Lib.mailbox import Mailbox
+
+
+class DisplayWorker:
+    """
+    Renderiza la pantalla en el segundo núcleo del RP2040 (el hilo creado
+    con _thread se ejecuta en el núcleo 1).
+
+    El bucle principal entrega fotogramas con submit() sin esperar nunca a
+    la pantalla; el trabajador dibuja siempre el último recibido y descarta
+    los intermedios si el SPI va más lento que las lecturas.
+
+    Mientras el trabajador está activo, solo él debe llamar a la pantalla.
+    """
+
+    def __init__ (self, display, debug=False):
+        """
+        :param display: Instancia de DisplayST7735_128x160.
+        :param debug: Muestra por consola los errores al renderizar.
+        """
+        self.display = display
+        self.DEBUG = debug
+
+        self.running = False
+        self.frames = 0  # Fotogramas dibujados
+        self.last_render_us = 0  # Duración del último fotograma
+
+        self._mailbox = Mailbox()
+
+    @property
+    def dropped (self):
+        """Fotogramas sustituidos por otro más nuevo antes de dibujarse."""
+        return self._mailbox.replaced
+
+    def start (self):
+        """
+        Lanza el hilo de renderizado en el segundo núcleo.
+        """
+        if self.running:
+            return
+
+        self.running = True
+        _thread.start_new_thread(self._run, ())
+
+    def stop (self):
+        """
+        Pide al hilo que termine tras el fotograma en curso.
+        """
+        self.running = False
+
+        # Despierta al hilo si está esperando un fotograma
+        self._mailbox.put(())
+
+    def submit (self, frame):
+        """
+        Entrega un fotograma para DisplayST7735_128x160.render(), sustituye
+        al pendiente si aún no se ha empezado a dibujar.
+        """
+        self._mailbox.put(frame)
+
+    def _run (self):
+        while self.running:
+            frame = self._mailbox.wait()
+
+            if not self.running:
+                break
+
+            start = ticks_us()
+
+            try:
+                self.display.render(frame)
+            except Exception as e:
+                if self.DEBUG:
+                    print('Error al renderizar en el segundo núcleo: {}'.format(e))
+
+            self.last_render_us = ticks_diff(ticks_us(), start)
+            self.frames += 1
@@ -0,0 +1,178 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+from time import time
+from Lib.ST7735 import ST7735_TFTHEIGHT
+from Lib.ring_buffer import RingBuffer
+
+
+class HistoryChart:
+    """
+    Gráfica de historial a pantalla completa que se desplaza con el scroll
+    vertical por hardware del ST7735 (VSCRDEF/VSCSAD).
+
+    En las orientaciones apaisadas (1 y 3) las filas nativas del panel son
+    las columnas que vemos, así que cada muestra nueva se dibuja como una
+    sola columna de píxeles (una escritura SPI) y después se mueve el
+    puntero de scroll para que quede en el borde derecho, sin redibujar el
+    resto de la gráfica.
+
+    Las muestras se guardan en un buffer circular del ancho de la pantalla
+    para poder repintar la gráfica completa al volver a mostrarla.
+    """
+
+    # (clave en WeatherStation.data, color RGB565, valor mínimo, valor máximo)
+    SERIES = (
+        ('temperature', 0xF800, 0, 40),
+        ('co2', 0x07E0, 400, 2000),
+        ('sound', 0x001F, 30, 90),
+    )
+
+    def __init__ (self, display, orientation, width=160, height=128,
+                  interval=10, background=0x0000, grid_color=0x2104):
+        """
+        :param display: Instancia del driver ST7735.
+        :param orientation: Orientación de la pantalla, solo 1 o 3 (apaisada).
+        :param width: Ancho en píxeles, una muestra por columna.
+        :param height: Alto en píxeles de la gráfica.
+        :param interval: Segundos mínimos entre muestras.
+        :param background: Color de fondo.
+        :param grid_color: Color de las líneas guía horizontales.
+        """
+        if orientation not in (1, 3):
+            raise ValueError('El historial con scroll necesita orientación apaisada (1 o 3)')
+
+        self.display = display
+        self.width = width
+        self.height = height
+        self.interval = interval
+        self.active = False
+        self.samples = RingBuffer(width)
+
+        # Con la orientación 1 las filas nativas van en sentido contrario
+        self._reversed = orientation == 1
+
+        self._last_sample_at = None
+        self._next_column = 0
+
+        # Columna vacía (fondo y guías) y buffer de la columna a enviar
+        self._empty_column = bytearray(height * 2)
+        self._column = bytearray(height * 2)
+
+        for y in range(height):
+            color = grid_color if y in (height // 4, height // 2, height * 3 // 4) else background
+            self._empty_column[y * 2] = color >> 8
+            self._empty_column[y * 2 + 1] = color & 0xFF
+
+    def push (self, data, draw=True):
+        """
+        Añade una muestra con el valor actual de cada serie si ha pasado el
+        intervalo y, si la gráfica está visible, la dibuja.
+
+        :param data: Diccionario con el formato de WeatherStation.data.
+        :param draw: False para solo guardarla, con la pantalla apagada.
+        :return: True si se ha añadido la muestra.
+        """
+        return self.push_values(
+            tuple(data.get(key, {}).get('current') for key, _, _, _ in self.SERIES),
+            draw)
+
+    def due (self):
+        """
+        Indica si ya ha pasado el intervalo y la siguiente muestra se
+        guardará, para no preparar los valores cuando no hace falta.
+        """
+        return self._last_sample_at is None or time() - self._last_sample_at >= self.interval
+
+    def push_values (self, values, draw=True):
+        """
+        Igual que push() recibiendo directamente una tupla con el valor de
+        cada serie en el orden de SERIES.
+        """
+        if not self.due():
+            return False
+
+        self._last_sample_at = time()
+        self.samples.append(values)
+
+        if self.active and draw:
+            self._draw_sample(values)
+
+        return True
+
+    def activate (self):
+        """
+        Muestra la gráfica: redibuja todo el historial una vez y deja el
+        scroll preparado para las siguientes muestras.
+        """
+        self.active = True
+        self._next_column = 0
+        self.display.set_scroll_area(0, ST7735_TFTHEIGHT, 0)
+
+        samples = self.samples.items()
+
+        # Columnas vacías a la izquierda cuando aún no hay historial completo
+        for _ in range(self.width - len(samples)):
+            self._draw_sample(None, scroll=False)
+
+        for values in samples:
+            self._draw_sample(values, scroll=False)
+
+        if self.display.has_framebuffer():
+            self.display.flush()
+
+        self.display.scroll_to(self._scroll_line(self._next_column - 1))
+
+    def deactivate (self):
+        """
+        Deja de mostrar la gráfica y restablece el scroll.
+        """
+        self.active = False
+        self.display.reset_scroll()
+
+    def _scroll_line (self, column):
+        """
+        Fila de memoria a mostrar al inicio del área de scroll para que la
+        columna indicada quede en el borde derecho de la pantalla.
+        """
+        if self._reversed:
+            return (ST7735_TFTHEIGHT - 1 - column) % ST7735_TFTHEIGHT
+
+        return (column + 1) % ST7735_TFTHEIGHT
+
+    def _draw_sample (self, values, scroll=True):
+        column = self._next_column
+        self._render_column(values)
+        self.display.draw_bmp(column, 0, 1, self.height, self._column)
+
+        # Con framebuffer la columna debe llegar al panel antes del scroll
+        if scroll and self.display.has_framebuffer():
+            self.display.flush()
+
+        self._next_column = (column + 1) % self.width
+
+        if scroll:
+            self.display.scroll_to(self._scroll_line(column))
+
+    def _render_column (self, values):
+        buffer = self._column
+        buffer[:] = self._empty_column
+
+        if values is None:
+            return
+
+        height = self.height
+
+        for i, (_, color, low, high) in enumerate(self.SERIES):
+            value = values[i]
+
+            if value is None:
+                continue
+
+            value = min(max(value, low), high)
+            y = height - 1 - int((value - low) * (height - 2) / (high - low))
+
+            # Punto de 2 píxeles de alto para que se distinga
+            for yy in (y - 1, y):
+                buffer[yy * 2] = color >> 8
+                buffer[yy * 2 + 1] = color & 0xFF
@@ -0,0 +1,206 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+from time import time
+from Lib.ring_buffer import RingBuffer
+import ujson
+
+
+class IAQEngine:
+    """
+    Índice de calidad del aire (0-100, 100 es excelente) a partir de la
+    resistencia del gas del BME680 comparada con una línea base de aire
+    limpio aprendida en el propio sensor, en lugar de un rango fijo.
+
+    La línea base sale de la media de una ventana de tamaño fijo con las
+    últimas lecturas, mantenida con una suma acumulada para que cada muestra
+    cueste lo mismo sea cual sea la ventana. Con la ventana llena sube en
+    cuanto la media la supera (el aire más limpio visto) y baja muy despacio
+    cuando queda por debajo, para seguir la deriva del sensor sin
+    confundirla con contaminación.
+
+    El índice reparte GAS_WEIGHT puntos al gas según lo que la resistencia
+    queda por debajo de la línea base y HUMIDITY_WEIGHT a la humedad según
+    lo que se aleja de HUMIDITY_REFERENCE, así una humedad alta o baja
+    también empeora el índice.
+
+    La línea base se guarda en la flash al aprenderla y después cada
+    save_interval segundos si ha cambiado. Tras reiniciar se carga y el
+    índice está disponible en cuanto el calefactor da READY_SAMPLES lecturas,
+    sin esperar a llenar la ventana otra vez.
+
+    Todas las cuentas son con enteros para no reservar memoria por muestra.
+
+    Atributos:
+        baseline (int): Resistencia en Ohm del aire limpio, None sin aprender.
+        samples (int): Lecturas recibidas desde el arranque.
+        ready (bool): Hay línea base y el calefactor ya se ha estabilizado.
+    """
+
+    # Puntos del índice para el gas y para la humedad (suman 100)
+    GAS_WEIGHT = 75
+    HUMIDITY_WEIGHT = 25
+
+    # Humedad relativa ideal en %
+    HUMIDITY_REFERENCE = 40
+
+    # La línea base baja 1/2^DRIFT_SHIFT de la diferencia con la media por muestra
+    DRIFT_SHIFT = 10
+
+    # Lecturas tras arrancar con una línea base guardada antes de dar el índice
+    READY_SAMPLES = 3
+
+    def __init__ (self, window=50, path='/iaq_baseline.json',
+                  save_interval=3600, debug=False):
+        """
+        :param window: Lecturas de la ventana, con una lectura por ciclo del
+                       bucle principal (unos 6 segundos) 50 son 5 minutos.
+        :param path: Fichero en la flash para la línea base, None para no
+                     guardarla.
+        :param save_interval: Segundos mínimos entre escrituras en la flash.
+        :param debug: Muestra por consola la carga y el guardado.
+        """
+        self.DEBUG = debug
+        self.path = path
+        self.save_interval = save_interval
+        self.baseline = None
+        self.samples = 0
+
+        self._window = RingBuffer(window)
+        self._window_size = window
+        self._sum = 0
+
+        # La primera línea base aprendida se guarda sin esperar
+        self._saved_baseline = None
+        self._next_save = 0
+
+        self.load()
+
+    @property
+    def ready (self):
+        return self.baseline is not None and self.samples >= self.READY_SAMPLES
+
+    def update (self, gas, humidity):
+        """
+        Añade una lectura a la ventana, actualiza la línea base y calcula el
+        índice.
+
+        :param gas: Resistencia del gas en Ohm.
+        :param humidity: Humedad relativa en %.
+        :return: Índice de calidad del aire 0-100 o None si aún no está listo.
+        """
+        if gas is None or gas <= 0:
+            return None
+
+        gas = int(gas)
+        replaced = self._window.append(gas)
+        self._sum += gas - (replaced or 0)
+        self.samples += 1
+
+        # Hasta llenar la ventana se usa la línea base guardada, si la hay
+        if len(self._window) == self._window_size:
+            mean = self._sum // self._window_size
+            baseline = self.baseline
+
+            if baseline is None or mean > baseline:
+                self.baseline = mean
+            else:
+                self.baseline = baseline - ((baseline - mean) >> self.DRIFT_SHIFT)
+
+            self._save_if_due()
+
+        return self.score(gas, humidity)
+
+    def score (self, gas, humidity):
+        """
+        Índice de calidad del aire para una lectura con la línea base actual,
+        sin añadirla a la ventana.
+
+        :return: Índice 0-100 o None si aún no está listo.
+        """
+        if not self.ready or not gas:
+            return None
+
+        baseline = self.baseline
+        gas_score = min(int(gas), baseline) * self.GAS_WEIGHT // baseline
+
+        if humidity is None:
+            return gas_score + self.HUMIDITY_WEIGHT
+
+        humidity = min(max(int(humidity), 0), 100)
+        reference = self.HUMIDITY_REFERENCE
+
+        if humidity > reference:
+            humidity_score = (100 - humidity) * self.HUMIDITY_WEIGHT // (100 - reference)
+        else:
+            humidity_score = humidity * self.HUMIDITY_WEIGHT // reference
+
+        return gas_score + humidity_score
+
+    def load (self):
+        """
+        Carga la línea base guardada en la flash.
+
+        :return: True si se ha cargado.
+        """
+        if not self.path:
+            return False
+
+        try:
+            with open(self.path, 'r') as f:
+                baseline = int(ujson.load(f)['baseline'])
+        except (OSError, ValueError, KeyError, TypeError):
+            return False
+
+        if baseline <= 0:
+            return False
+
+        self.baseline = baseline
+        self._saved_baseline = baseline
+
+        if self.DEBUG:
+            print('IAQ: línea base cargada', baseline, 'Ohm')
+
+        return True
+
+    def save (self):
+        """
+        Guarda la línea base actual en la flash.
+
+        :return: True si se ha guardado.
+        """
+        if not self.path or self.baseline is None:
+            return False
+
+        try:
+            with open(self.path, 'w') as f:
+                ujson.dump({'baseline': self.baseline}, f)
+        except OSError as e:
+            if self.DEBUG:
+                print('IAQ: no se pudo guardar la línea base:', e)
+
+            return False
+
+        self._saved_baseline = self.baseline
+
+        if self.DEBUG:
+            print('IAQ: línea base guardada', self.baseline, 'Ohm')
+
+        return True
+
+    def _save_if_due (self):
+        """
+        Como mucho una escritura cada save_interval segundos y solo si la
+        línea base ha cambiado más de un 1/64 desde la guardada, para no
+        desgastar la flash. Si falla se reintenta en el siguiente intervalo.
+        """
+        now = time()
+
+        if now < self._next_save:
+            return
+
+        self._next_save = now + self.save_interval
+        saved = self._saved_baseline
+
+        if saved is None or abs(self.baseline - saved) > saved >> 6:
+            self.save()
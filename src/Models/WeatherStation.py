@@ -1,6 +1,7 @@
 from Models.BH1750 import BH1750
 from Models.BME680 import BME680_I2C, BME680  # Import BME680 for air_quality reading
 from Models.CJMCU811 import CCS811
+from Models.IAQEngine import IAQEngine
 from Models.Sonometer import Sonometer
 from Models.VEML6070 import VEML6070
 
@@ -58,49 +59,49 @@ class WeatherStation:
     }
     data_images = {
         "temperature": {
-            "low": "/images/temperature_low.rgb565",
-            "medium": "/images/temperature_medium.rgb565",
-            "high": "/images/temperature_high.rgb565",
+            "low": "/images/temperature_low.p4",
+            "medium": "/images/temperature_medium.p4",
+            "high": "/images/temperature_high.p4",
         },
         "humidity": {
-            "low": "/images/humidity_low.rgb565",
-            "medium": "/images/humidity_medium.rgb565",
-            "high": "/images/humidity_high.rgb565",
+            "low": "/images/humidity_low.p4",
+            "medium": "/images/humidity_medium.p4",
+            "high": "/images/humidity_high.p4",
         },
         "pressure": {
-            "low": "/images/pressure_low.rgb565",
-            "medium": "/images/pressure_medium.rgb565",
-            "high": "/images/pressure_high.rgb565",
+            "low": "/images/pressure_low.p4",
+            "medium": "/images/pressure_medium.p4",
+            "high": "/images/pressure_high.p4",
         },
         "air_quality": {
-            "low": "/images/air_quality_low.rgb565",
-            "medium": "/images/air_quality_medium.rgb565",
-            "high": "/images/air_quality_high.rgb565",
+            "low": "/images/air_quality_low.p4",
+            "medium": "/images/air_quality_medium.p4",
+            "high": "/images/air_quality_high.p4",
         },
         "co2": {
-            "low": "/images/co2_low.rgb565",
-            "medium": "/images/co2_medium.rgb565",
-            "high": "/images/co2_high.rgb565",
+            "low": "/images/co2_low.p4",
+            "medium": "/images/co2_medium.p4",
+            "high": "/images/co2_high.p4",
         },
         "tvoc": {
-            "low": "/images/tvoc_low.rgb565",
-            "medium": "/images/tvoc_medium.rgb565",
-            "high": "/images/tvoc_high.rgb565",
+            "low": "/images/tvoc_low.p4",
+            "medium": "/images/tvoc_medium.p4",
+            "high": "/images/tvoc_high.p4",
         },
         "light": {
-            "low": "/images/light_low.rgb565",
-            "medium": "/images/light_medium.rgb565",
-            "high": "/images/light_high.rgb565",
+            "low": "/images/light_low.p4",
+            "medium": "/images/light_medium.p4",
+            "high": "/images/light_high.p4",
         },
         "uv": {
-            "low": "/images/uv_low.rgb565",
-            "medium": "/images/uv_medium.rgb565",
-            "high": "/images/uv_high.rgb565",
+            "low": "/images/uv_low.p4",
+            "medium": "/images/uv_medium.p4",
+            "high": "/images/uv_high.p4",
         },
         "sound": {
-            "low": "/images/sound_low.rgb565",
-            "medium": "/images/sound_medium.rgb565",
-            "high": "/images/sound_high.rgb565",
+            "low": "/images/sound_low.p4",
+            "medium": "/images/sound_medium.p4",
+            "high": "/images/sound_high.p4",
         },
     }
     data = {
@@ -195,6 +196,9 @@ class WeatherStation:
         self.bme680 = BME680_I2C(i2c=rpi.i2c1, address=0x77, debug=False,
                                  temperature_offset=-1, refresh_rate=10)
 
+        # Calidad del aire con línea base aprendida y guardada en la flash
+        self.iaq = IAQEngine(debug=debug)
+
         # Sensor CO2 y TVOC
         self.c = CCS811(i2c=rpi.i2c0, addr=0x5A, debug=debug)
         self.c_last_calibrate = time.time()
@@ -239,12 +243,27 @@ class WeatherStation:
             raise ValueError(
                 f"Value {value} is out of range for sensor type {sensor_type}")
 
+    @staticmethod
+    def snapshot () -> dict:
+        """
+        Copia de los valores actuales para entregarla a otro hilo (el
+        renderizado de la pantalla) sin compartir WeatherStation.data.
+
+        :return: Diccionario {sensor: (valor actual, unidad)} con tuplas
+                 inmutables, no se modifica tras crearlo.
+        :rtype: dict
+        """
+        return {key: (stats.get('current'), stats.get('unit'))
+                for key, stats in WeatherStation.data.items()}
+
     def read_all(self):
-        self.read_bme680()
+        # La conversión del BME680 avanza mientras se leen los demás sensores
+        self.start_bme680()
         self.read_uv()
         self.read_light()
         self.read_c()
         self.read_sound()
+        self.read_bme680()
 
     def read_sound(self):
         if self.sound:
@@ -256,42 +275,54 @@ class WeatherStation:
             self.data["sound"]["min"] = min(self.data["sound"]["min"], self.data["sound"]["current"]) if self.data["sound"]["min"] is not None else self.data["sound"]["current"]
             self.data["sound"]["avg"] = ((self.data["sound"]["avg"] or 0) * (self.data["sound"]["reads"] - 1) + self.data["sound"]["current"]) / self.data["sound"]["reads"]
 
+    def start_bme680(self):
+        """
+        Lanza la medición del BME680 sin esperar, read_bme680() la recoge.
+        """
+        if self.bme680 and not self.bme680.measuring:
+            self.bme680.start_measurement()
+
     def read_bme680(self):
         if self.bme680:
-            if self.bme680.temperature is not None:
-                self.data["temperature"]["current"] = self.bme680.temperature
-                self.data["temperature"]["reads"] = self.data["temperature"]["reads"] + 1 if self.data["temperature"]["reads"] else 1
-                self.data["temperature"]["max"] = max(self.data["temperature"]["max"], self.bme680.temperature) if self.data["temperature"]["max"] is not None else self.bme680.temperature
-                self.data["temperature"]["min"] = min(self.data["temperature"]["min"], self.bme680.temperature) if self.data["temperature"]["min"] is not None else self.bme680.temperature
-                self.data["temperature"]["avg"] = ((self.data["temperature"]["avg"] or 0) * (self.data["temperature"]["reads"] - 1) + self.bme680.temperature) / self.data["temperature"]["reads"]
-
-            if self.bme680.pressure is not None:
-                self.data["pressure"]["current"] = self.bme680.pressure
-                self.data["pressure"]["reads"] = self.data["pressure"]["reads"] + 1 if self.data["pressure"]["reads"] else 1
-                self.data["pressure"]["max"] = max(self.data["pressure"]["max"], self.bme680.pressure) if self.data["pressure"]["max"] is not None else self.bme680.pressure
-                self.data["pressure"]["min"] = min(self.data["pressure"]["min"], self.bme680.pressure) if self.data["pressure"]["min"] is not None else self.bme680.pressure
-                self.data["pressure"]["avg"] = ((self.data["pressure"]["avg"] or 0) * (self.data["pressure"]["reads"] - 1) + self.bme680.pressure) / self.data["pressure"]["reads"]
-
-            if self.bme680.humidity is not None:
-                self.data["humidity"]["current"] = self.bme680.humidity
-                self.data["humidity"]["reads"] = self.data["humidity"]["reads"] + 1 if self.data["humidity"]["reads"] else 1
-                self.data["humidity"]["max"] = max(self.data["humidity"]["max"], self.bme680.humidity) if self.data["humidity"]["max"] is not None else self.bme680.humidity
-                self.data["humidity"]["min"] = min(self.data["humidity"]["min"], self.bme680.humidity) if self.data["humidity"]["min"] is not None else self.bme680.humidity
-                self.data["humidity"]["avg"] = ((self.data["humidity"]["avg"] or 0) * (self.data["humidity"]["reads"] - 1) + self.bme680.humidity) / self.data["humidity"]["reads"]
-
-            if self.bme680.is_gas_ready() and (self.bme680.gas is not None):
-                self.data["gas"]["current"] = self.bme680.gas
-                self.data["gas"]["reads"] = self.data["gas"]["reads"] + 1 if self.data["gas"]["reads"] else 1
-                self.data["gas"]["max"] = max(self.data["gas"]["max"], self.bme680.gas) if self.data["gas"]["max"] is not None else self.bme680.gas
-                self.data["gas"]["min"] = min(self.data["gas"]["min"], self.bme680.gas) if self.data["gas"]["min"] is not None else self.bme680.gas
-                self.data["gas"]["avg"] = ((self.data["gas"]["avg"] or 0) * (self.data["gas"]["reads"] - 1) + self.bme680.gas) / self.data["gas"]["reads"]
-
-            if self.bme680.is_gas_ready() and (self.bme680.air_quality() is not None):
-                self.data["air_quality"]["current"] = self.bme680.air_quality()
-                self.data["air_quality"]["reads"] = self.data["air_quality"]["reads"] + 1 if self.data["air_quality"]["reads"] else 1
-                self.data["air_quality"]["max"] = max(self.data["air_quality"]["max"], self.bme680.air_quality()) if self.data["air_quality"]["max"] is not None else self.bme680.air_quality()
-                self.data["air_quality"]["min"] = min(self.data["air_quality"]["min"], self.bme680.air_quality()) if self.data["air_quality"]["min"] is not None else self.bme680.air_quality()
-                self.data["air_quality"]["avg"] = ((self.data["air_quality"]["avg"] or 0) * (self.data["air_quality"]["reads"] - 1) + self.bme680.air_quality()) / self.data["air_quality"]["reads"]
+            # Una sola medición por ciclo para todos los valores del sensor.
+            # Si se lanzó con start_bme680() y aún no ha terminado se recoge
+            # en el siguiente ciclo, sin lanzar otra. Si no termina en una
+            # conversión más de lo previsto, poll() la da por perdida y lanza
+            # otra
+            if self.bme680.measuring:
+                reading = self.bme680.collect()
+            else:
+                reading = self.bme680.read_snapshot()
+
+            if reading is None:
+                return
+
+            self.add_read("temperature", reading.temperature)
+            self.add_read("pressure", reading.pressure)
+            self.add_read("humidity", reading.humidity)
+
+            # El gas solo se registra con el sensor estabilizado: línea base
+            # aprendida o cargada de la flash y el calefactor ya en marcha
+            air_quality = self.iaq.update(reading.gas, reading.humidity)
+
+            if self.iaq.ready:
+                self.add_read("gas", reading.gas)
+                self.add_read("air_quality", air_quality)
+
+    def add_read(self, key, value):
+        """
+        Guarda una lectura como valor actual y actualiza el máximo, el
+        mínimo y la media del sensor. Las lecturas None se ignoran.
+        """
+        if value is None:
+            return
+
+        stats = self.data[key]
+        stats["current"] = value
+        stats["reads"] = stats["reads"] + 1 if stats["reads"] else 1
+        stats["max"] = max(stats["max"], value) if stats["max"] is not None else value
+        stats["min"] = min(stats["min"], value) if stats["min"] is not None else value
+        stats["avg"] = ((stats["avg"] or 0) * (stats["reads"] - 1) + value) / stats["reads"]
 
     def read_c(self):
 
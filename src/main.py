@@ -4,6 +4,8 @@ from time import sleep_ms
 from Models.Api import Api
 from Models.RpiPico import RpiPico
 from Models.DisplayST7735_128x160 import DisplayST7735_128x160
+from Models.DisplayWorker import DisplayWorker
+from Lib.jitter import JitterMeter
 from machine import Pin, SPI
 
 # Importo variables de entorno
@@ -79,11 +81,15 @@ spi1 = SPI(1, baudrate=8000000, polarity=0, phase=0,
 
 display = DisplayST7735_128x160(spi1, rst=9, ce=13, dc=12, btn_display_on=2,
                                 pin_backlight=3,
-                                orientation=env.DISPLAY_ORIENTATION, debug=env.DEBUG, timeout=env.DISPLAY_TIMEOUT)
+                                orientation=env.DISPLAY_ORIENTATION, debug=env.DEBUG, timeout=env.DISPLAY_TIMEOUT,
+                                framebuffer=getattr(env, 'DISPLAY_FRAMEBUFFER', False),
+                                grid_shape=getattr(env, 'DISPLAY_GRID_SHAPE', None))
 display.displayHeadInfo(wifi_status=rpi.wifi_status())
 display.displayFooterInfo()
+display.flush()
 sleep_ms(display.DELAY)
 display.grid_create()
+display.flush()
 
 # Sonómetro Test
 """
@@ -105,13 +111,30 @@ sleep_ms(3000)
 
 # Almacena el último minuto para solo actualizar hora en el footer cuando cambia
 last_minute = 0
+footer_text = None
+
+# Segundos entre cambios de página grid/historial, 0 para mostrar solo el grid
+DISPLAY_PAGE_SECONDS = getattr(env, 'DISPLAY_PAGE_SECONDS', 0)
+last_page_change = time.time()
+page = display.PAGE_GRID
+
+# Renderizado de la pantalla en el segundo núcleo, el bucle principal solo
+# entrega una copia de los datos y no espera al SPI
+worker = None
+
+if getattr(env, 'DISPLAY_WORKER', False):
+    worker = DisplayWorker(display, debug=DEBUG)
+    worker.start()
+
+# Duración y jitter de cada vuelta del bucle principal
+loop_meter = JitterMeter()
 
 def thread0 ():
     """
     Primer hilo, flujo principal de la aplicación.
     En este hilo colocamos toda la lógica principal de funcionamiento.
     """
-    global last_minute
+    global last_minute, last_page_change, footer_text, page
 
     if env.DEBUG:
         print('')
@@ -122,9 +145,6 @@ def thread0 ():
     # Se leen todos los sensores
     ws.read_all()
 
-    # Compruebo si se enciende o apaga la pantalla
-    display.loop()
-
     if DEBUG:
         ws.debug()
 
@@ -134,9 +154,31 @@ def thread0 ():
 
     if localtime_str and minute != last_minute:
         last_minute = minute
-        display.displayFooterInfo(center=localtime_str)
+        footer_text = localtime_str
+
+    # Alterna entre el grid y el historial cada DISPLAY_PAGE_SECONDS
+    if DISPLAY_PAGE_SECONDS and time.time() - last_page_change >= DISPLAY_PAGE_SECONDS:
+        last_page_change = time.time()
+        page = display.PAGE_HISTORY if page == display.PAGE_GRID else display.PAGE_GRID
 
-    display.grid_update()
+    # Fotograma con una copia de los datos, la pantalla nunca lee los
+    # datos mientras se actualizan
+    frame = (WeatherStation.snapshot(), rpi.wifi_status(), footer_text, page)
+
+    if worker:
+        worker.submit(frame)
+    else:
+        # La memoria reservada solo se mide con DEBUG
+        if DEBUG:
+            allocated = gc.mem_alloc()
+
+        display.render(frame)
+
+        if DEBUG:
+            allocated = gc.mem_alloc() - allocated
+            drawn, skipped = display.text_stats()
+            print('Carácteres dibujados: {}, sin cambios: {}'.format(drawn, skipped))
+            print('Memoria reservada al dibujar: {} bytes'.format(allocated))
 
     # Si la subida a la api está habilitada en las variables de entorno
     if API_UPLOAD:
@@ -168,7 +210,18 @@ def thread0 ():
 
 while True:
     try:
+        loop_meter.start()
         thread0()
+        loop_meter.stop()
+
+        if DEBUG and loop_meter.count % 60 == 0:
+            print('Bucle principal ({}): {}'.format(
+                'pantalla en núcleo 1' if worker else 'pantalla en núcleo 0',
+                loop_meter.summary()))
+
+            if worker:
+                print('Fotogramas dibujados: {}, descartados: {}'.format(
+                    worker.frames, worker.dropped))
     except Exception as e:
         if env.DEBUG:
             print('Error: ', e)
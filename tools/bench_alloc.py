@@ -0,0 +1,95 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_alloc.py
+#
+"""
+Mide con tracemalloc la memoria reservada al dibujar fotogramas del grid,
+con los mismos valores y con valores que cambian en cada fotograma.
+
+En CPython los números y las llamadas también reservan memoria, así que las
+cifras sirven para comparar versiones del código y no son las de la placa,
+donde los int pequeños no reservan memoria. En la placa main.py muestra con
+DEBUG la memoria reservada en cada fotograma (gc.mem_alloc()).
+
+Uso:
+    python tools/bench_alloc.py [--frames 50]
+"""
+import argparse
+import tracemalloc
+
+import hostenv
+import st7735_sim
+
+
+def measure (function, loops):
+    """
+    Ejecuta function loops veces y devuelve la media y el máximo de bytes
+    reservados a la vez durante una llamada (pico sobre lo ya reservado).
+    """
+    function()  # Calentamiento: cachés y buffers creados la primera vez
+
+    total = 0
+    worst = 0
+
+    tracemalloc.start()
+
+    for _ in range(loops):
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+
+        total += peak - before
+        worst = max(worst, peak - before)
+
+    tracemalloc.stop()
+
+    return total / loops, worst
+
+
+def main ():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=50)
+    args = parser.parse_args()
+
+    # SPI que solo cuenta bytes, el del simulador guarda un registro por escritura
+    hostenv.install()
+
+    from machine import SPI
+    from Models.DisplayST7735_128x160 import DisplayST7735_128x160
+    from Models.WeatherStation import WeatherStation
+
+    display = DisplayST7735_128x160(SPI(1), rst=9, ce=13, dc=st7735_sim.DC_PIN,
+                                    pin_backlight=3, orientation=3,
+                                    history_interval=3600)
+    display.displayHeadInfo(wifi_status=3)
+    display.displayFooterInfo(center='12:00')
+    display.grid_create()
+
+    # Fotogramas preparados de antemano para medir solo el dibujado
+    frames = []
+
+    for i in range(5):
+        st7735_sim.apply_sample(WeatherStation.data, i)
+        frames.append((WeatherStation.snapshot(), 3, '12:00', display.PAGE_GRID))
+
+    state = {'frame': 0}
+
+    def render_same ():
+        display.render(frames[0])
+
+    def render_changes ():
+        state['frame'] = (state['frame'] + 1) % len(frames)
+        display.render(frames[state['frame']])
+
+    print('{:<22} {:>12} {:>12}'.format('caso', 'media bytes', 'máx bytes'))
+
+    for name, function in (('valores iguales', render_same),
+                           ('valores cambiando', render_changes)):
+        mean, worst = measure(function, args.frames)
+        print('{:<22} {:>12.1f} {:>12}'.format(name, mean, worst))
+
+
+if __name__ == '__main__':
+    main()
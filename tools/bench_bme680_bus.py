@@ -0,0 +1,118 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_bme680_bus.py
+#
+"""
+Cuenta las transacciones I2C, los bytes y el tiempo de bus por medición del
+BME680 en un bus simulado (tools/bme680_mock.py) frente a la implementación
+anterior, que escribía cada byte con su propio writeto_mem() y leía
+CTRL_MEAS antes de lanzar el modo forzado.
+
+También comprueba que ambas obtienen los mismos valores.
+
+Uso:
+    python tools/bench_bme680_bus.py [--measurements 10] [--freq 400000]
+"""
+import argparse
+
+import hostenv
+
+hostenv.install()
+
+from bme680_mock import ADDRESS, MockBME680Bus
+from Models.BME680 import (BME680_I2C, _BME680_REG_CONFIG, _BME680_REG_CTRL_GAS,
+                           _BME680_REG_CTRL_HUM, _BME680_REG_CTRL_MEAS,
+                           _BME680_RUNGAS)
+
+
+class LegacyBME680_I2C(BME680_I2C):
+    """Escrituras byte a byte y lectura de CTRL_MEAS, como antes."""
+
+    def _write (self, register, values):
+        for value in values:
+            self._i2c.writeto_mem(self._address, register,
+                                  bytearray([value & 0xFF]))
+            register += 1
+
+    def _write_pairs (self, pairs):
+        for i in range(0, len(pairs), 2):
+            self._write(pairs[i], [pairs[i + 1]])
+
+    def start_measurement (self):
+        self._write(_BME680_REG_CONFIG, [self._filter << 2])
+        self._write(_BME680_REG_CTRL_MEAS,
+                    [(self._temp_oversample << 5) | (
+                            self._pressure_oversample << 2)])
+        self._write(_BME680_REG_CTRL_HUM, [self._humidity_oversample])
+        self._write(_BME680_REG_CTRL_GAS, [_BME680_RUNGAS])
+        ctrl = self._read_byte(_BME680_REG_CTRL_MEAS)
+        ctrl = (ctrl & 0xFC) | 0x01
+        self._write(_BME680_REG_CTRL_MEAS, [ctrl])
+
+        # Sin esperas en el PC: la conversión simulada es inmediata
+        self.measuring = True
+        self._ready_at = 0
+
+        return self._ready_at
+
+
+class InstantBME680_I2C(BME680_I2C):
+    """Implementación actual sin esperar la duración de la conversión."""
+
+    def start_measurement (self):
+        super().start_measurement()
+        self._ready_at = 0
+
+        return self._ready_at
+
+
+def measure (sensor_class, measurements, freq):
+    bus = MockBME680Bus()
+    sensor = sensor_class(bus, address=ADDRESS)
+    setup_transactions = bus.transactions
+
+    bus.reset_counters()
+    readings = [sensor.read_snapshot() for _ in range(measurements)]
+
+    return {
+        'setup': setup_transactions,
+        'transactions': bus.transactions / measurements,
+        'writes': bus.writes / measurements,
+        'reads': bus.reads / measurements,
+        'bytes': bus.wire_bytes / measurements,
+        'bus_us': bus.bus_us(freq) / measurements,
+        'conversions': bus.measurements,
+        'readings': readings,
+    }
+
+
+def main ():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--measurements', type=int, default=10)
+    parser.add_argument('--freq', type=int, default=400000,
+                        help='Frecuencia del bus I2C en Hz')
+    args = parser.parse_args()
+
+    results = {
+        'anterior': measure(LegacyBME680_I2C, args.measurements, args.freq),
+        'actual': measure(InstantBME680_I2C, args.measurements, args.freq),
+    }
+
+    print('{:<10} {:>7} {:>10} {:>8} {:>8} {:>8} {:>8}'.format(
+        'versión', 'inicio', 'trans/med', 'escr', 'lect', 'bytes', 'bus us'))
+
+    for name, result in results.items():
+        print('{:<10} {:>7} {:>10.1f} {:>8.1f} {:>8.1f} {:>8.1f} {:>8.1f}'.format(
+            name, result['setup'], result['transactions'], result['writes'],
+            result['reads'], result['bytes'], result['bus_us']))
+
+    same = results['anterior']['readings'] == results['actual']['readings']
+    print('Mismos valores: {}'.format('sí' if same else 'NO'))
+
+    if not same:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,69 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_bme680_fixed.py
+#
+"""
+Compara el tiempo de compensación de una lectura del BME680 (temperatura,
+presión, humedad y gas) con float y en punto fijo, usando los vectores de
+tools/bme680_vectors.json.
+
+Cada camino se calienta con una pasada y se mide con timeit.repeat tomando
+el mínimo de las repeticiones, el valor menos afectado por el resto del
+sistema.
+
+Solo compara los dos caminos sobre CPython en el PC, con FPU y sin
+@micropython.native (aquí es un decorador vacío). No indica lo que tarda ni
+la diferencia que hay en el RP2040, donde los float son por software y se
+reservan en el heap; para eso hay que medir en la placa.
+
+Uso:
+    python tools/bench_bme680_fixed.py [--rounds 50] [--repeat 7]
+"""
+import argparse
+import json
+import timeit
+
+from check_bme680_fixed import VECTORS_PATH, compensate, create_sensor
+
+
+def measure (fixed_point, recorded, rounds, repeat):
+    sensors = [create_sensor(calibration, fixed_point)
+               for calibration in recorded['calibration']]
+    vectors = [(sensors[vector['calibration']], bytes.fromhex(vector['data']))
+               for vector in recorded['vectors']]
+
+    def run ():
+        for sensor, data in vectors:
+            compensate(sensor, data)
+
+    run()  # Calentamiento
+
+    best = min(timeit.repeat(run, number=rounds, repeat=repeat))
+
+    return best * 1000000 / (rounds * len(vectors))
+
+
+def main ():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--rounds', type=int, default=50,
+                        help='Pasadas por los vectores en cada repetición')
+    parser.add_argument('--repeat', type=int, default=7,
+                        help='Repeticiones, se toma la más rápida (mínimo 5)')
+    args = parser.parse_args()
+
+    with open(VECTORS_PATH) as f:
+        recorded = json.load(f)
+
+    repeat = max(args.repeat, 5)
+    float_us = measure(False, recorded, args.rounds, repeat)
+    fixed_us = measure(True, recorded, args.rounds, repeat)
+
+    print('{:<12} {:>14}'.format('camino', 'us por lectura'))
+    print('{:<12} {:>14.2f}'.format('float', float_us))
+    print('{:<12} {:>14.2f}'.format('punto fijo', fixed_us))
+    print('Relación en el PC: {:.2f}x (no es la del RP2040)'.format(float_us / fixed_us))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,116 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_driver.py
+#
+"""
+Cuenta las escrituras SPI y los flancos de CS de las operaciones básicas del
+driver ST7735 frente a la implementación anterior, que enviaba cada byte de
+comando y argumento por separado y creaba un bloque nuevo por cada trozo de
+relleno.
+
+Uso:
+    python tools/bench_driver.py
+"""
+import math
+import time
+
+import hostenv
+
+hostenv.install()
+
+from machine import Pin, SPI
+from Lib.ST7735 import ST7735, ST7735_CASET, ST7735_RASET, ST7735_RAMWR
+
+
+class CountingPin(Pin):
+    """Pin que cuenta las veces que se pone a nivel bajo (selección CS)."""
+
+    def __init__ (self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.lows = 0
+
+    def low (self):
+        self.lows += 1
+        super().low()
+
+
+class LegacyST7735(ST7735):
+    """Ventana de dirección y begin() byte a byte, como antes."""
+
+    def set_addr_window (self, x0, y0, x1, y1):
+        self.command(ST7735_CASET)
+        self.data(0x00)
+        self.data(x0 + self._offset)
+        self.data(0x00)
+        self.data(x1 + self._offset)
+        self.command(ST7735_RASET)
+        self.data(0x00)
+        self.data(y0 + self._offset)
+        self.data(0x00)
+        self.data(y1 + self._offset)
+        self.command(ST7735_RAMWR)
+
+    _set_addr_window = set_addr_window
+
+    def draw_block (self, x, y, w, h, color):
+        max_rows = math.floor(500 / h)
+        rows = 0
+        while rows < h:
+            block_rows = min(max_rows, h - rows)
+            b = bytes([color >> 8, color & 0xff]) * w * block_rows
+            self.draw_bmp(x, y + rows, w, block_rows, b)
+            rows = rows + max_rows
+
+    def send_commands (self, commands):
+        i = 0
+        while i < len(commands):
+            self.command(commands[i])
+            argcount = commands[i + 1] & 0x7F
+            delay = commands[i + 1] & 0x80
+            i += 2
+            for c in commands[i:i + argcount]:
+                self.data(c)
+            i += argcount + (1 if delay else 0)
+
+
+def measure (driver_class):
+    spi = SPI(1, baudrate=8000000)
+    driver = driver_class(spi, rst=9, ce=13, dc=12)
+    driver._ce = CountingPin(13, Pin.OUT)
+    icon = bytearray(15 * 30 * 2)
+    results = []
+
+    for name, action in (
+            ('begin()', lambda: driver.begin()),
+            ('set_addr_window()', lambda: driver.set_addr_window(0, 0, 14, 29)),
+            ('pixel()', lambda: driver.pixel(10, 10, 0xFFFF)),
+            ('draw_bmp() 15x30', lambda: driver.draw_bmp(0, 0, 15, 30, icon)),
+            ('draw_block() 4x128', lambda: driver.draw_block(0, 0, 4, 128, 0xF800)),
+            ('fill_screen()', lambda: driver.fill_screen(0x0000)),
+    ):
+        spi.reset_stats()
+        driver._ce.lows = 0
+        start = time.perf_counter()
+        action()
+        elapsed = (time.perf_counter() - start) * 1000
+        results.append((name, spi.writes, driver._ce.lows, elapsed))
+
+    return results
+
+
+def main ():
+    legacy = measure(LegacyST7735)
+    current = measure(ST7735)
+
+    print('{:<20} {:>12} {:>12} {:>9} {:>9} {:>9} {:>9}'.format(
+        'operación', 'writes antes', 'writes ahora', 'CS antes', 'CS ahora',
+        'ms antes', 'ms ahora'))
+
+    for (name, old_writes, old_cs, old_ms), (_, writes, cs, ms) in zip(legacy, current):
+        print('{:<20} {:>12} {:>12} {:>9} {:>9} {:>9.3f} {:>9.3f}'.format(
+            name, old_writes, writes, old_cs, cs, old_ms, ms))
+
+
+if __name__ == '__main__':
+    main()
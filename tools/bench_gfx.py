@@ -0,0 +1,72 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_gfx.py
+#
+"""
+Compara las primitivas de Lib/lcd_gfx.py dibujadas píxel a píxel frente a
+tramos con draw_block: píxeles cubiertos y transacciones SPI.
+
+Uso:
+    python tools/bench_gfx.py
+"""
+import hostenv
+
+hostenv.install()
+
+from machine import SPI
+from Lib.ST7735 import ST7735
+from Lib.lcd_gfx import Lcd_Gfx
+
+
+class PixelOnly:
+    """Expone solo pixel(), como usaban antes las primitivas."""
+
+    def __init__ (self, driver):
+        self._driver = driver
+        self.pixels = 0
+
+    def pixel (self, x, y, color):
+        self.pixels += 1
+        self._driver.pixel(x, y, color)
+
+
+SAMPLES = [20.1, 20.4, 21.0, 21.8, 22.5, 22.1, 21.7, 21.9, 22.8, 23.4,
+           23.9, 24.2, 23.8, 23.1, 22.6, 22.0, 21.5, 21.2, 21.6, 22.3] * 2
+
+PRIMITIVES = (
+    ('drawLine diagonal', lambda g, lcd: g.drawLine(0, 0, 120, 40, lcd, 0xFFFF)),
+    ('drawRect 50x50', lambda g, lcd: g.drawRect(10, 10, 50, 50, lcd, 0xFFFF)),
+    ('drawFillRect 50x50', lambda g, lcd: g.drawFillRect(10, 10, 50, 50, lcd, 0xFFFF)),
+    ('drawfillCircle r20', lambda g, lcd: g.drawfillCircle(60, 60, 20, lcd, 0xFFFF)),
+    ('drawFillTrie', lambda g, lcd: g.drawFillTrie(10, 10, 90, 30, 40, 100, lcd, 0xFFFF)),
+    ('drawBarGauge 40x8', lambda g, lcd: g.drawBarGauge(0, 0, 40, 8, 22.4, 0, 40, lcd, 0x07E0, 0x0000, 0xFFFF)),
+    ('drawSparkline 40x16', lambda g, lcd: g.drawSparkline(0, 0, 40, 16, SAMPLES, lcd, 0x07E0, 0x0000)),
+)
+
+
+def main ():
+    spi = SPI(1, baudrate=8000000)
+    driver = ST7735(spi, rst=9, ce=13, dc=12)
+    driver.set_rotation(3)
+    gfx = Lcd_Gfx()
+
+    print('{:<22} {:>9} {:>16} {:>16}'.format(
+        'primitiva', 'píxeles', 'writes píxel', 'writes tramos'))
+
+    for name, draw in PRIMITIVES:
+        pixel_only = PixelOnly(driver)
+        spi.reset_stats()
+        draw(gfx, pixel_only)
+        pixel_writes = spi.writes
+
+        spi.reset_stats()
+        draw(gfx, driver)
+        span_writes = spi.writes
+
+        print('{:<22} {:>9} {:>16} {:>16}'.format(
+            name, pixel_only.pixels, pixel_writes, span_writes))
+
+
+if __name__ == '__main__':
+    main()
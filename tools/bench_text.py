@@ -0,0 +1,90 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_text.py
+#
+"""
+Compara el dibujado de las cadenas del grid 3x3 carácter a carácter
+(printChar) frente a la línea completa en un solo envío (printText).
+
+Muestra transacciones SPI, bytes enviados y el tiempo de bus modelado a la
+velocidad del SPI (bytes * 8 / baudrate, como tools/st7735_sim.py). No se
+mide el tiempo en el PC: es sobre todo la sobrecarga de CPython y no dice
+nada de lo que tarda en la placa.
+
+Uso:
+    python tools/bench_text.py [--baudrate 8000000]
+"""
+import argparse
+
+import hostenv
+import st7735_sim
+
+hostenv.install(spi_class=st7735_sim.SimulatedSPI)
+
+from machine import SPI
+from Models.DisplayST7735_128x160 import DisplayST7735_128x160
+
+# Valores y unidades ya centrados tal como los dibuja grid_update()
+GRID_STRINGS = (
+    ' 22.4', '  C  ', ' 60  ', '  %  ', '1500 ', ' lum ',
+    ' 45.1', '  %  ', ' 612 ', ' ppm ', '  3  ', ' uv  ',
+    '1013 ', 'mbar ', ' 80  ', ' ppb ', ' 45.5', ' dB  ',
+)
+
+
+def grid_positions (display):
+    """Devuelve (x, y) en píxeles de cada cadena del grid."""
+    cell_width = display.DISPLAY_WIDTH // 3
+    cell_height = (display.DISPLAY_HEIGHT - 18) // 3
+    positions = []
+
+    for row in range(3):
+        for col in range(3):
+            x = col * cell_width + 16
+            y = row * cell_height + 9 + 4
+            positions.append((x, y))
+            positions.append((x, y + 9))
+
+    return positions
+
+
+def per_char (display, positions):
+    for content, (x, y) in zip(GRID_STRINGS, positions):
+        for ch in content:
+            display.printChar(x, y, ch, 0xFFFF, 0x0000)
+            x += 6
+
+
+def per_string (display, positions):
+    for content, (x, y) in zip(GRID_STRINGS, positions):
+        display.printText(x, y, content, 0xFFFF, 0x0000)
+
+
+def measure (display, spi, positions, render):
+    render(display, positions)  # Calienta la caché de carácteres
+    spi.reset_stats()
+    render(display, positions)
+    summary = spi.summary()
+
+    return summary['writes'], summary['bytes'], summary['bus_us'] / 1000
+
+
+def main ():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--baudrate', type=int, default=8000000)
+    args = parser.parse_args()
+
+    spi = SPI(1, baudrate=args.baudrate)
+    display = DisplayST7735_128x160(spi, dc=st7735_sim.DC_PIN, pin_backlight=3)
+    positions = grid_positions(display)
+
+    print('{:<12} {:>10} {:>10} {:>14}'.format('modo', 'writes', 'bytes', 'bus ms/frame'))
+
+    for name, render in (('printChar', per_char), ('printText', per_string)):
+        writes, sent, ms = measure(display, spi, positions, render)
+        print('{:<12} {:>10} {:>10} {:>14.3f}'.format(name, writes, sent, ms))
+
+
+if __name__ == '__main__':
+    main()
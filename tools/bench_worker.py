@@ -0,0 +1,120 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bench_worker.py
+#
+"""
+Mide la duración y el jitter del bucle principal con la pantalla dibujada en
+el mismo hilo frente a DisplayWorker en un segundo hilo.
+
+El SPI simulado espera el tiempo que tardaría cada transferencia en el bus
+real y la lectura de sensores se simula con una espera fija, así el bucle
+solo se ve afectado por lo que tarda la pantalla. Cada cierto número de
+vueltas se cambia de página para forzar un redibujado completo.
+
+Uso:
+    python tools/bench_worker.py [--loops N] [--sensor-ms 20]
+                                 [--page-every 10] [--baudrate 8000000]
+"""
+import argparse
+import time
+
+import hostenv
+import st7735_sim
+
+
+class TimedSPI(st7735_sim.SimulatedSPI):
+    """SPI simulado que espera el tiempo de bus de cada transferencia."""
+
+    def __init__ (self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pending_us = 0
+
+    def write (self, buffer):
+        super().write(buffer)
+        self._pending_us += self.transfer_us(len(buffer))
+
+        # Agrupa las esperas cortas, time.sleep no es preciso por debajo de 1 ms
+        if self._pending_us >= 1000:
+            time.sleep(self._pending_us / 1000000)
+            self._pending_us = 0
+
+
+def run (worker_enabled, args):
+    from machine import SPI
+    from Lib.jitter import JitterMeter
+    from Models.DisplayST7735_128x160 import DisplayST7735_128x160
+    from Models.DisplayWorker import DisplayWorker
+    from Models.WeatherStation import WeatherStation
+
+    spi = SPI(1, baudrate=args.baudrate)
+    display = DisplayST7735_128x160(spi, rst=9, ce=13, dc=st7735_sim.DC_PIN,
+                                    pin_backlight=3, orientation=3,
+                                    history_interval=0)
+    display.displayHeadInfo(wifi_status=3)
+    display.displayFooterInfo(center='12:00')
+    display.grid_create()
+
+    worker = None
+
+    if worker_enabled:
+        worker = DisplayWorker(display)
+        worker.start()
+
+    meter = JitterMeter()
+    page = display.PAGE_GRID
+
+    for loop in range(args.loops):
+        meter.start()
+
+        # Lectura de sensores
+        time.sleep(args.sensor_ms / 1000)
+        st7735_sim.apply_sample(WeatherStation.data, loop)
+
+        if args.page_every and loop % args.page_every == args.page_every - 1:
+            page = display.PAGE_HISTORY if page == display.PAGE_GRID else display.PAGE_GRID
+
+        frame = (WeatherStation.snapshot(), 3, '12:{:02d}'.format(loop % 60), page)
+
+        if worker:
+            worker.submit(frame)
+        else:
+            display.render(frame)
+
+        meter.stop()
+
+    if worker:
+        # Deja terminar el último fotograma antes de parar
+        time.sleep(0.2)
+        worker.stop()
+
+    return meter, worker
+
+
+def main ():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--loops', type=int, default=60)
+    parser.add_argument('--sensor-ms', type=float, default=20,
+                        help='Tiempo simulado de lectura de sensores por vuelta')
+    parser.add_argument('--page-every', type=int, default=10,
+                        help='Cambia de página cada N vueltas, 0 nunca')
+    parser.add_argument('--baudrate', type=int, default=8000000)
+    args = parser.parse_args()
+
+    hostenv.install(spi_class=TimedSPI)
+
+    print('{:<10} {:>10} {:>10} {:>10} {:>10} {:>8} {:>10}'.format(
+        'modo', 'media ms', 'jitter ms', 'min ms', 'max ms', 'frames', 'descartes'))
+
+    for name, enabled in (('núcleo 0', False), ('worker', True)):
+        meter, worker = run(enabled, args)
+        frames = worker.frames if worker else meter.count
+        dropped = worker.dropped if worker else 0
+
+        print('{:<10} {:>10.2f} {:>10.2f} {:>10.2f} {:>10.2f} {:>8} {:>10}'.format(
+            name, meter.mean_us() / 1000, meter.jitter_us() / 1000,
+            meter.min_us / 1000, meter.max_us / 1000, frames, dropped))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,152 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  bme680_mock.py
+#
+"""
+Bus I2C simulado con un BME680 a nivel de registros, para ejecutar
+Models/BME680.py en el PC.
+
+Responde al id del chip y a los coeficientes de calibración (valores típicos
+de un sensor real), y al escribir CTRL_MEAS en modo forzado deja en los
+registros de datos los valores crudos configurados con set_adc(). Cuenta las
+transacciones y los bytes que pasarían por el bus.
+
+Admite escrituras con writeto_mem() (registro y datos consecutivos) y con
+writeto() en parejas registro/valor como indica la hoja de datos.
+
+Para probar fallos, con new_data = False las conversiones nunca marcan datos
+nuevos y con read_error las lecturas lanzan esa excepción.
+"""
+import struct
+
+ADDRESS = 0x77
+
+# Coeficientes en el orden del struct de BME680._read_calibration()
+CALIBRATION_FORMAT = '<hbBHhbBhhbbHhhBBBHbbbBbHhbb'
+CALIBRATION = (
+    26571, 3, 0, 36813, -10470, 88, 0, 7232, -63, 58, 30, 0, -4095,
+    -1641, 30, 0, 63, 691 * 16 + 9, 0, 45, 20, 120, -100, 26095, -1620,
+    -83, 18,
+)
+
+_REG_MEAS_STATUS = 0x1D
+_REG_CTRL_MEAS = 0x74
+
+
+class MockBME680Bus:
+    """
+    Bus I2C con un BME680 simulado.
+
+    Atributos:
+        transactions (int): Transacciones I2C (lecturas y escrituras).
+        reads (int): Transacciones de lectura.
+        writes (int): Transacciones de escritura.
+        wire_bytes (int): Bytes en el bus incluyendo dirección y registro.
+        measurements (int): Conversiones lanzadas en modo forzado.
+        new_data (bool): Las conversiones marcan new_data (0x80) al terminar.
+        read_error (Exception): Excepción que lanzan las lecturas, None sin fallos.
+    """
+
+    def __init__ (self, temperature=500000, pressure=400000, humidity=20000,
+                  gas=500, gas_range=4):
+        self.regs = bytearray(256)
+        self.regs[0xD0] = 0x61  # Id del chip
+
+        packed = struct.pack(CALIBRATION_FORMAT, *CALIBRATION)
+        self.regs[0x8A:0x8A + 24] = packed[:24]
+        self.regs[0xE1:0xE1 + len(packed) - 24] = packed[24:]
+
+        self.regs[0x00] = 0x30  # res_heat_val
+        self.regs[0x02] = 0x10  # res_heat_range
+        self.regs[0x04] = 0x20  # range_sw_err
+
+        self.new_data = True
+        self.read_error = None
+
+        self.set_adc(temperature, pressure, humidity, gas, gas_range)
+        self.reset_counters()
+
+    def load_calibration (self, coeff1, coeff2, heat):
+        """
+        Carga una calibración guardada: los 25 bytes desde 0x89, los 16
+        desde 0xE1 y los registros 0x00, 0x02 y 0x04.
+        """
+        self.regs[0x89:0x89 + len(coeff1)] = coeff1
+        self.regs[0xE1:0xE1 + len(coeff2)] = coeff2
+        self.regs[0x00], self.regs[0x02], self.regs[0x04] = heat
+
+    def set_adc (self, temperature, pressure, humidity, gas, gas_range):
+        """Valores crudos que devolverá la próxima conversión."""
+        self.adc = (temperature, pressure, humidity, gas, gas_range)
+
+    def reset_counters (self):
+        self.transactions = 0
+        self.reads = 0
+        self.writes = 0
+        self.wire_bytes = 0
+        self.measurements = 0
+
+    def bus_us (self, freq=400000):
+        """Tiempo de bus en microsegundos, 9 ciclos por byte (con ACK)."""
+        return self.wire_bytes * 9 * 1000000 // freq
+
+    def _convert (self):
+        temperature, pressure, humidity, gas, gas_range = self.adc
+        regs = self.regs
+
+        regs[0x1F:0x22] = bytes(((pressure >> 12) & 0xFF, (pressure >> 4) & 0xFF,
+                                 (pressure << 4) & 0xF0))
+        regs[0x22:0x25] = bytes(((temperature >> 12) & 0xFF, (temperature >> 4) & 0xFF,
+                                 (temperature << 4) & 0xF0))
+        regs[0x25:0x27] = bytes((humidity >> 8, humidity & 0xFF))
+
+        # gas_r (10 bits), gas_valid, heat_stab y rango
+        regs[0x2A] = gas >> 2
+        regs[0x2B] = ((gas & 0x03) << 6) | 0x30 | gas_range
+
+        regs[_REG_MEAS_STATUS] = 0x80 if self.new_data else 0x00
+        self.measurements += 1
+
+    def _store (self, register, value):
+        self.regs[register] = value
+
+        # Modo forzado: convierte y vuelve a modo reposo
+        if register == _REG_CTRL_MEAS and value & 0x03 == 0x01:
+            self._convert()
+            self.regs[_REG_CTRL_MEAS] = value & 0xFC
+
+    def readfrom_mem_into (self, address, register, buf):
+        if self.read_error is not None:
+            raise self.read_error
+
+        self.transactions += 1
+        self.reads += 1
+        # Dirección, registro, dirección de nuevo y datos
+        self.wire_bytes += 3 + len(buf)
+        buf[:] = self.regs[register:register + len(buf)]
+
+    def readfrom_mem (self, address, register, length):
+        buf = bytearray(length)
+        self.readfrom_mem_into(address, register, buf)
+
+        return bytes(buf)
+
+    def writeto_mem (self, address, register, buf):
+        self.transactions += 1
+        self.writes += 1
+        self.wire_bytes += 2 + len(buf)
+
+        for i, value in enumerate(buf):
+            self._store(register + i, value)
+
+    def writeto (self, address, buf):
+        """Escritura en parejas registro/valor."""
+        self.transactions += 1
+        self.writes += 1
+        self.wire_bytes += 1 + len(buf)
+
+        for i in range(0, len(buf) - 1, 2):
+            self._store(buf[i], buf[i + 1])
+
+        return len(buf)
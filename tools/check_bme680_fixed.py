@@ -0,0 +1,102 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  check_bme680_fixed.py
+#
+"""
+Comprueba la compensación en punto fijo del BME680 frente a la de float con
+los registros crudos de tools/bme680_vectors.json.
+
+Cada vector se compensa con las dos implementaciones de Models/BME680.py y
+falla si alguna diferencia supera la tolerancia (bastante menos que el
+decimal que se muestra en pantalla).
+
+Uso:
+    python tools/check_bme680_fixed.py [--vectors tools/bme680_vectors.json]
+"""
+import argparse
+import json
+import os
+
+import hostenv
+
+hostenv.install()
+
+from bme680_mock import ADDRESS, MockBME680Bus
+from Models.BME680 import BME680_I2C
+
+VECTORS_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                            'bme680_vectors.json')
+
+# Diferencia máxima admitida por magnitud, el gas en proporción
+TOLERANCES = {
+    'temperature': 0.02,  # ºC
+    'pressure': 0.1,  # hPa
+    'humidity': 0.1,  # %
+    'gas': 0.00001,  # Proporción de la resistencia
+}
+
+
+def create_sensor (calibration, fixed_point):
+    bus = MockBME680Bus()
+    bus.load_calibration(bytes.fromhex(calibration['coeff1']),
+                         bytes.fromhex(calibration['coeff2']),
+                         calibration['heat'])
+
+    return BME680_I2C(bus, address=ADDRESS, fixed_point=fixed_point)
+
+
+def compensate (sensor, data):
+    """Compensa un bloque de datos crudo sin pasar por el bus."""
+    sensor._load_data(data)
+
+    return sensor._reading()
+
+
+def main ():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--vectors', default=VECTORS_PATH)
+    args = parser.parse_args()
+
+    with open(args.vectors) as f:
+        recorded = json.load(f)
+
+    sensors = [(create_sensor(calibration, False), create_sensor(calibration, True))
+               for calibration in recorded['calibration']]
+
+    worst = {key: 0.0 for key in TOLERANCES}
+    failures = 0
+
+    for index, vector in enumerate(recorded['vectors']):
+        float_sensor, fixed_sensor = sensors[vector['calibration']]
+        data = bytes.fromhex(vector['data'])
+        expected = compensate(float_sensor, data)
+        result = compensate(fixed_sensor, data)
+
+        for key, tolerance in TOLERANCES.items():
+            reference = getattr(expected, key)
+            diff = abs(getattr(result, key) - reference)
+
+            if key == 'gas':
+                diff /= max(reference, 1)
+
+            worst[key] = max(worst[key], diff)
+
+            if diff > tolerance:
+                failures += 1
+                print('Vector {} {}: float {} punto fijo {}'.format(
+                    index, key, reference, getattr(result, key)))
+
+    print('{:<12} {:>12} {:>12}'.format('magnitud', 'máx dif', 'tolerancia'))
+
+    for key, tolerance in TOLERANCES.items():
+        print('{:<12} {:>12.6g} {:>12g}'.format(key, worst[key], tolerance))
+
+    print('{} vectores, {} fallos'.format(len(recorded['vectors']), failures))
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,174 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  check_bme680_poll.py
+#
+"""
+Comprueba que las mediciones del BME680 lanzadas con start_measurement() no
+se quedan esperando para siempre cuando el sensor falla, sobre el bus
+simulado de tools/bme680_mock.py y con un reloj simulado.
+
+- Medición normal: poll() no accede al bus antes del instante previsto.
+- Sin datos nuevos (new_data nunca a 1): pasada una conversión más se da
+  por perdida y se lanza otra; al volver el sensor se recogen datos.
+- Error de lectura del bus: se propaga y deja de esperarse la medición.
+- WeatherStation: el sensor vuelve a dar lecturas tras un fallo.
+
+Termina con error si alguna comprobación falla.
+
+Uso:
+    python tools/check_bme680_poll.py
+"""
+import time
+
+import hostenv
+
+hostenv.install()
+
+from bme680_mock import ADDRESS, MockBME680Bus
+from Models.BME680 import BME680_I2C
+from Models.IAQEngine import IAQEngine
+from Models.WeatherStation import WeatherStation
+
+
+class Clock:
+    """Reloj para time.ticks_ms() que solo avanza al llamar a advance()."""
+
+    def __init__ (self):
+        self.now = 0
+
+    def __call__ (self):
+        return self.now
+
+    def advance (self, ms):
+        self.now += ms
+
+
+clock = Clock()
+time.ticks_ms = clock
+
+failures = []
+
+
+def check (name, condition):
+    print('{:<60} {}'.format(name, 'ok' if condition else 'FALLO'))
+
+    if not condition:
+        failures.append(name)
+
+
+def create_sensor ():
+    bus = MockBME680Bus()
+    sensor = BME680_I2C(bus, address=ADDRESS)
+    bus.reset_counters()
+
+    return bus, sensor
+
+
+def check_normal ():
+    bus, sensor = create_sensor()
+    ready_at = sensor.start_measurement()
+    writes = bus.transactions
+
+    check('normal: sin lecturas antes del instante previsto',
+          not sensor.poll() and bus.transactions == writes)
+
+    clock.now = ready_at
+    check('normal: datos leídos en el instante previsto',
+          sensor.collect() is not None and not sensor.measuring)
+
+
+def check_no_new_data ():
+    bus, sensor = create_sensor()
+    bus.new_data = False
+    duration = sensor.measurement_duration_ms()
+    ready_at = sensor.start_measurement()
+
+    clock.now = ready_at
+    check('sin datos nuevos: sigue esperando dentro del margen',
+          sensor.collect() is None and sensor.measuring and bus.measurements == 1)
+
+    clock.now = ready_at + duration
+    check('sin datos nuevos: pasado el margen lanza otra medición',
+          sensor.collect() is None and sensor.measuring and bus.measurements == 2)
+
+    # El simulador convierte al lanzar la medición, así que la relanzada
+    # también queda sin datos y hace falta esperar a la siguiente
+    bus.new_data = True
+    clock.advance(2 * duration)
+    check('sin datos nuevos: se relanza de nuevo al expirar la segunda',
+          sensor.collect() is None and bus.measurements == 3)
+
+    clock.advance(duration)
+    check('sin datos nuevos: recupera lecturas al volver el sensor',
+          sensor.collect() is not None and not sensor.measuring)
+
+
+def check_read_error ():
+    bus, sensor = create_sensor()
+    ready_at = sensor.start_measurement()
+    bus.read_error = OSError(5)
+    clock.now = ready_at
+
+    try:
+        sensor.poll()
+        raised = False
+    except OSError:
+        raised = True
+
+    check('error de lectura: se propaga el OSError', raised)
+    check('error de lectura: deja de esperar la medición', not sensor.measuring)
+
+    bus.read_error = None
+    clock.advance(sensor.measurement_duration_ms())
+    sensor.start_measurement()
+    clock.advance(sensor.measurement_duration_ms())
+    check('error de lectura: la siguiente medición da datos',
+          sensor.collect() is not None)
+
+
+def check_weather_station ():
+    bus, sensor = create_sensor()
+    bus.new_data = False
+
+    station = WeatherStation.__new__(WeatherStation)
+    station.bme680 = sensor
+    station.iaq = IAQEngine(path=None)
+
+    for key in ('temperature', 'pressure', 'humidity'):
+        station.data[key]['current'] = None
+
+    # Ciclos del bucle principal de unos 6 segundos con el sensor sin datos
+    for _ in range(5):
+        station.start_bme680()
+        clock.advance(6000)
+        station.read_bme680()
+
+    check('WeatherStation: sin datos mientras el sensor falla',
+          station.data['temperature']['current'] is None)
+
+    bus.new_data = True
+
+    for _ in range(3):
+        station.start_bme680()
+        clock.advance(6000)
+        station.read_bme680()
+
+    check('WeatherStation: vuelve a leer el sensor tras el fallo',
+          station.data['temperature']['current'] is not None)
+
+
+def main ():
+    check_normal()
+    check_no_new_data()
+    check_read_error()
+    check_weather_station()
+
+    print('{} fallos'.format(len(failures)))
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
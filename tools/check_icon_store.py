@@ -0,0 +1,80 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  check_icon_store.py
+#
+"""
+Comprueba la lectura de iconos de Lib/icon_store.py con ficheros
+temporales: los iconos que caben en el buffer de lectura (también justo de
+su tamaño) se devuelven completos y los que no caben fallan con ValueError
+en lugar de devolverse cortados.
+
+Termina con error si alguna comprobación falla.
+
+Uso:
+    python tools/check_icon_store.py
+"""
+import os
+import tempfile
+
+import hostenv
+
+hostenv.install()
+
+from Lib.icon_store import IconStore
+
+BUFFER_BYTES = 900
+
+failures = []
+
+
+def check (name, condition):
+    print('{:<50} {}'.format(name, 'ok' if condition else 'FALLO'))
+
+    if not condition:
+        failures.append(name)
+
+
+def write_icon (directory, name, size):
+    path = os.path.join(directory, name)
+    data = bytes(i % 251 for i in range(size))
+
+    with open(path, 'wb') as f:
+        f.write(data)
+
+    return path, data
+
+
+def main ():
+    with tempfile.TemporaryDirectory() as directory:
+        small, small_data = write_icon(directory, 'small.p4', 236)
+        exact, exact_data = write_icon(directory, 'exact.rgb565', BUFFER_BYTES)
+        large, _ = write_icon(directory, 'large.rgb565', BUFFER_BYTES * 2)
+
+        for max_bytes in (0, 10800):
+            store = IconStore(max_bytes, buffer_bytes=BUFFER_BYTES)
+            mode = 'con caché' if max_bytes else 'sin caché'
+
+            check('{}: icono pequeño completo'.format(mode),
+                  bytes(store.get(small)) == small_data)
+            check('{}: icono del tamaño del buffer completo'.format(mode),
+                  bytes(store.get(exact)) == exact_data)
+
+            try:
+                store.get(large)
+                raised = False
+            except ValueError:
+                raised = True
+
+            check('{}: icono mayor que el buffer da ValueError'.format(mode), raised)
+            check('{}: el icono grande no entra en caché'.format(mode),
+                  store.cache.get(large) is None)
+
+    print('{} fallos'.format(len(failures)))
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,79 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  check_st7735_color.py
+#
+"""
+Comprueba el orden de bytes con el que el driver de Lib/ST7735.py envía los
+colores RGB565 a la pantalla: byte alto primero (big endian), como espera el
+ST7735 con COLMOD a 16 bits.
+
+pixel(), draw_block() y fill_screen() deben dejar el mismo valor en la
+memoria del panel simulado de tools/st7735_sim.py, con y sin framebuffer.
+Hasta que pixel() pasó a enviar los bytes en este orden, los píxeles sueltos
+salían con los bytes invertidos respecto a los rellenos (0xF800, rojo, se
+veía como 0x00F8).
+
+Termina con error si algún color no coincide.
+
+Uso:
+    python tools/check_st7735_color.py
+"""
+import hostenv
+import st7735_sim
+
+hostenv.install(spi_class=st7735_sim.SimulatedSPI)
+
+from machine import SPI
+from Lib.ST7735 import ST7735
+
+COLORS = (0xF800, 0x07E0, 0x001F, 0x1234, 0xFFFF)
+
+
+def ram_color (panel, col, row):
+    """Color RGB565 guardado en el panel para una dirección (columna, fila)."""
+    x, y = panel.native(col, row)
+    offset = (y * st7735_sim.PANEL_WIDTH + x) * 2
+
+    return (panel.ram[offset] << 8) | panel.ram[offset + 1]
+
+
+def main ():
+    failures = 0
+
+    print('{:<14} {:>8} {:>8} {:>8} {:>8}'.format(
+        'modo', 'color', 'pixel', 'block', 'fill'))
+
+    for framebuffer in (False, True):
+        spi = SPI(1)
+        display = ST7735(spi, rst=9, ce=13, dc=st7735_sim.DC_PIN,
+                         framebuffer=framebuffer)
+
+        for color in COLORS:
+            display.fill_screen(color)
+            display.flush()
+            fill = ram_color(spi.panel, 10, 10)
+
+            display.fill_screen(0x0000)
+            display.pixel(10, 10, color)
+            display.draw_block(20, 10, 2, 2, color)
+            display.flush()
+
+            pixel = ram_color(spi.panel, 10, 10)
+            block = ram_color(spi.panel, 20, 10)
+
+            print('{:<14} {:>8} {:>8} {:>8} {:>8}'.format(
+                'framebuffer' if framebuffer else 'directo',
+                hex(color), hex(pixel), hex(block), hex(fill)))
+
+            if not pixel == block == fill == color:
+                failures += 1
+
+    print('{} fallos'.format(failures))
+
+    if failures:
+        raise SystemExit(1)
+
+
+if __name__ == '__main__':
+    main()
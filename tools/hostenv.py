@@ -0,0 +1,270 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  hostenv.py
+#
+"""
+Entorno mínimo para ejecutar el código de src/ con CPython en un PC.
+
+Registra módulos sustitutos de los específicos de MicroPython (machine,
+micropython, utime...) para poder importar los modelos y medir su
+comportamiento sin hardware. Las rutas absolutas del dispositivo
+(p.ej. /images/...) se resuelven dentro de src/.
+
+Uso:
+    import hostenv
+    hostenv.install()
+    from Models.DisplayST7735_128x160 import DisplayST7735_128x160
+"""
+import builtins
+import os
+import sys
+import time
+import types
+
+ROOT_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SRC_DIR = os.path.join(ROOT_DIR, 'src')
+
+# Pines creados por número, para que el SPI pueda consultar el pin DC
+PINS = {}
+
+
+class Pin:
+    IN = 0
+    OUT = 1
+    PULL_UP = 1
+    PULL_DOWN = 2
+    IRQ_FALLING = 4
+    IRQ_RISING = 8
+
+    def __init__ (self, id, mode=None, pull=None, value=0):
+        self.id = id
+        self._value = value
+        self._handler = None
+        PINS[id] = self
+
+    def value (self, value=None):
+        if value is None:
+            return self._value
+
+        self._value = 1 if value else 0
+
+    def high (self):
+        self._value = 1
+
+    def low (self):
+        self._value = 0
+
+    on = high
+    off = low
+
+    def irq (self, trigger=None, handler=None):
+        self._handler = handler
+
+    def trigger (self, value=1):
+        """Simula una pulsación lanzando el callback de la interrupción."""
+        self._value = value
+
+        if self._handler:
+            self._handler(self)
+
+
+class SPI:
+    """
+    SPI que cuenta las transacciones (llamadas a write) y bytes enviados.
+    """
+    MSB = 0
+    LSB = 1
+
+    def __init__ (self, id=0, baudrate=1000000, polarity=0, phase=0, bits=8,
+                  firstbit=MSB, sck=None, mosi=None, miso=None):
+        self.baudrate = baudrate
+        self.writes = 0
+        self.bytes = 0
+
+    def write (self, buffer):
+        self.writes += 1
+        self.bytes += len(buffer)
+
+    def reset_stats (self):
+        self.writes = 0
+        self.bytes = 0
+
+
+class I2C:
+    def __init__ (self, id=0, scl=None, sda=None, freq=400000):
+        self.freq = freq
+
+    def scan (self):
+        return []
+
+
+class ADC:
+    def __init__ (self, pin):
+        self.pin = pin
+
+    def read_u16 (self):
+        return 32768
+
+
+class RTC:
+    def datetime (self, value=None):
+        if value is None:
+            t = time.localtime()
+            return (t.tm_year, t.tm_mon, t.tm_mday, t.tm_wday, t.tm_hour,
+                    t.tm_min, t.tm_sec, 0)
+
+
+class FrameBuffer:
+    """
+    Subconjunto de framebuf.FrameBuffer en RGB565 (little endian, igual
+    que en el RP2040).
+    """
+
+    def __init__ (self, buffer, width, height, format, stride=None):
+        self.buffer = buffer
+        self.width = width
+        self.height = height
+        self.stride = stride or width
+
+    def pixel (self, x, y, color=None):
+        if not (0 <= x < self.width and 0 <= y < self.height):
+            return None
+
+        offset = (y * self.stride + x) * 2
+
+        if color is None:
+            return self.buffer[offset] | (self.buffer[offset + 1] << 8)
+
+        self.buffer[offset] = color & 0xFF
+        self.buffer[offset + 1] = (color >> 8) & 0xFF
+
+    def fill_rect (self, x, y, w, h, color):
+        x0 = max(x, 0)
+        y0 = max(y, 0)
+        x1 = min(x + w, self.width)
+        y1 = min(y + h, self.height)
+
+        if x0 >= x1 or y0 >= y1:
+            return
+
+        row = bytes((color & 0xFF, (color >> 8) & 0xFF)) * (x1 - x0)
+
+        for yy in range(y0, y1):
+            offset = (yy * self.stride + x0) * 2
+            self.buffer[offset:offset + len(row)] = row
+
+    def fill (self, color):
+        self.fill_rect(0, 0, self.width, self.height, color)
+
+    def hline (self, x, y, w, color):
+        self.fill_rect(x, y, w, 1, color)
+
+    def vline (self, x, y, h, color):
+        self.fill_rect(x, y, 1, h, color)
+
+
+def _ticks_ms ():
+    return int(time.monotonic() * 1000)
+
+
+def _ticks_us ():
+    return int(time.monotonic() * 1000000)
+
+
+def _ticks_diff (a, b):
+    return a - b
+
+
+def _sleep_ms (ms):
+    time.sleep(ms / 1000)
+
+
+def _sleep_us (us):
+    time.sleep(us / 1000000)
+
+
+def _no_sleep (value):
+    pass
+
+
+def _identity (f):
+    return f
+
+
+def _open_factory (real_open):
+    def device_open (path, *args, **kwargs):
+        """Busca en src/ las rutas que no existen en el PC."""
+        if isinstance(path, str) and not os.path.exists(path):
+            candidate = os.path.join(SRC_DIR, path.lstrip('/'))
+
+            if os.path.exists(candidate):
+                path = candidate
+
+        return real_open(path, *args, **kwargs)
+
+    return device_open
+
+
+_installed = False
+
+
+def install (spi_class=None, fast_sleep=True):
+    """
+    Registra los módulos sustitutos. Es idempotente.
+
+    :param spi_class: Clase que se expone como machine.SPI (por defecto SPI).
+    :param fast_sleep: Si es True, sleep_ms no espera para agilizar medidas.
+    """
+    global _installed
+
+    machine = types.ModuleType('machine')
+    machine.Pin = Pin
+    machine.SPI = spi_class or SPI
+    machine.I2C = I2C
+    machine.ADC = ADC
+    machine.RTC = RTC
+    machine.freq = lambda *args: 125000000
+    sys.modules['machine'] = machine
+
+    if _installed:
+        return
+
+    framebuf = types.ModuleType('framebuf')
+    framebuf.FrameBuffer = FrameBuffer
+    framebuf.RGB565 = 1
+    sys.modules['framebuf'] = framebuf
+
+    micropython = types.ModuleType('micropython')
+    micropython.const = lambda value: value
+    micropython.native = _identity
+    micropython.viper = _identity
+    micropython.schedule = lambda callback, arg: callback(arg)
+    micropython.alloc_emergency_exception_buf = lambda size: None
+    sys.modules['micropython'] = micropython
+
+    # MicroPython expone const() también como builtin
+    builtins.const = micropython.const
+
+    time.sleep_ms = _no_sleep if fast_sleep else _sleep_ms
+    time.sleep_us = _no_sleep if fast_sleep else _sleep_us
+    time.ticks_ms = _ticks_ms
+    time.ticks_us = _ticks_us
+    time.ticks_diff = _ticks_diff
+    time.ticks_add = lambda a, b: a + b
+    sys.modules['utime'] = time
+
+    for name in ('network', 'ntptime', 'urequests'):
+        sys.modules[name] = types.ModuleType(name)
+
+    import json
+    sys.modules['ujson'] = json
+    import struct
+    sys.modules['ustruct'] = struct
+
+    builtins.open = _open_factory(builtins.open)
+
+    if SRC_DIR not in sys.path:
+        sys.path.insert(0, SRC_DIR)
+
+    _installed = True
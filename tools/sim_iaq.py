@@ -0,0 +1,123 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  sim_iaq.py
+#
+"""
+Simula lecturas del gas del BME680 y compara el índice de calidad del aire
+de Models/IAQEngine.py arrancando sin línea base y con la guardada en la
+flash, junto al índice lineal anterior entre Rmin y Rmax fijos.
+
+La resistencia parte de una fracción del valor de aire limpio mientras se
+calienta el sensor, con ruido, y en mitad de la simulación baja durante
+unos minutos como si hubiera contaminación.
+
+Uso:
+    python tools/sim_iaq.py [--minutes 30] [--period 6] [--clean 250000]
+                            [--humidity 55] [--window 50]
+"""
+import argparse
+import math
+import os
+import random
+import tempfile
+import time
+
+import hostenv
+
+
+def gas_series (args):
+    """
+    Resistencia del gas en Ohm por lectura y si hay contaminación.
+    """
+    rng = random.Random(1)
+    readings = int(args.minutes * 60 / args.period)
+    polluted_from = readings // 2
+    polluted_to = polluted_from + int(args.polluted_minutes * 60 / args.period)
+
+    for i in range(readings):
+        t = i * args.period
+        gas = args.clean * (1 - 0.6 * math.exp(-t / args.warmup))
+        polluted = polluted_from <= i < polluted_to
+
+        if polluted:
+            gas *= 0.4
+
+        yield int(gas * rng.uniform(0.98, 1.02)), polluted
+
+
+def run (args, path):
+    from Models.BME680 import BME680
+    from Models.IAQEngine import IAQEngine
+
+    engine = IAQEngine(window=args.window, path=path)
+    restored = engine.baseline is not None
+    first_ready = None
+    clean, polluted, linear_clean, linear_polluted = [], [], [], []
+    elapsed = 0
+
+    for i, (gas, is_polluted) in enumerate(gas_series(args)):
+        start = time.perf_counter()
+        score = engine.update(gas, args.humidity)
+        elapsed += time.perf_counter() - start
+
+        if score is None:
+            continue
+
+        if first_ready is None:
+            first_ready = (i + 1) * args.period
+
+        linear = BME680._air_quality_from_gas(gas)
+        (polluted if is_polluted else clean).append(score)
+        (linear_polluted if is_polluted else linear_clean).append(linear)
+
+    return {
+        'restored': restored,
+        'ready_s': first_ready,
+        'baseline': engine.baseline,
+        'clean': sum(clean) / len(clean) if clean else None,
+        'polluted': sum(polluted) / len(polluted) if polluted else None,
+        'linear_clean': sum(linear_clean) / len(linear_clean) if linear_clean else None,
+        'linear_polluted': sum(linear_polluted) / len(linear_polluted) if linear_polluted else None,
+        'update_us': elapsed * 1000000 / engine.samples,
+    }
+
+
+def main ():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--minutes', type=float, default=30)
+    parser.add_argument('--period', type=float, default=6,
+                        help='Segundos entre lecturas (un ciclo del bucle principal)')
+    parser.add_argument('--clean', type=int, default=250000,
+                        help='Resistencia en Ohm con aire limpio')
+    parser.add_argument('--humidity', type=float, default=55)
+    parser.add_argument('--warmup', type=float, default=20,
+                        help='Constante de tiempo en segundos del calentamiento')
+    parser.add_argument('--polluted-minutes', type=float, default=3)
+    parser.add_argument('--window', type=int, default=50)
+    args = parser.parse_args()
+
+    hostenv.install()
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, 'iaq_baseline.json')
+
+        # El primer arranque aprende y guarda la línea base, el segundo la carga
+        results = [run(args, path), run(args, path)]
+
+    print('{:<12} {:>10} {:>10} {:>8} {:>8} {:>8} {:>8} {:>8}'.format(
+        'arranque', 'listo s', 'base Ohm', 'limpio', 'contam.',
+        'lin. L', 'lin. C', 'us/lect'))
+
+    for result in results:
+        print('{:<12} {:>10} {:>10} {:>8} {:>8} {:>8} {:>8} {:>8.2f}'.format(
+            'guardada' if result['restored'] else 'en frío',
+            result['ready_s'] if result['ready_s'] is not None else '-',
+            result['baseline'] if result['baseline'] is not None else '-',
+            *('{:.1f}'.format(result[key]) if result[key] is not None else '-'
+              for key in ('clean', 'polluted', 'linear_clean', 'linear_polluted')),
+            result['update_us']))
+
+
+if __name__ == '__main__':
+    main()
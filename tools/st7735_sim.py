@@ -0,0 +1,361 @@
+#!/usr/bin/env python
+# -*- coding: utf-8 -*-
+#
+#  st7735_sim.py
+#
+"""
+Simulador de la pantalla ST7735 para ejecutar DisplayST7735_128x160 en un PC.
+
+Sustituye machine.SPI por un SPI que interpreta los comandos del driver
+(CASET, RASET, RAMWR, MADCTL...) sobre una memoria virtual RGB565 de
+128x160 píxeles, registra cada transacción con sus bytes y el tiempo que
+tardaría en el bus a la velocidad configurada, y guarda fotogramas en PNG.
+También muestra los carácteres dibujados y omitidos por no haber cambiado.
+
+Uso:
+    python tools/st7735_sim.py [--frames N] [--png salida.png]
+                               [--orientation 3] [--grid-shape 3x3]
+                               [--max-frame-bytes N]
+
+Con --max-frame-bytes termina con error si un fotograma en régimen estable
+envía más bytes de los indicados, para detectar regresiones de tráfico SPI.
+"""
+import argparse
+import os
+import struct
+import sys
+import time
+import zlib
+
+import hostenv
+
+# Comandos interpretados por el simulador
+CMD_SLPIN = 0x10
+CMD_SLPOUT = 0x11
+CMD_DISPOFF = 0x28
+CMD_DISPON = 0x29
+CMD_CASET = 0x2A
+CMD_RASET = 0x2B
+CMD_RAMWR = 0x2C
+CMD_VSCRDEF = 0x33
+CMD_MADCTL = 0x36
+CMD_VSCSAD = 0x37
+
+MADCTL_MY = 0x80
+MADCTL_MX = 0x40
+MADCTL_MV = 0x20
+
+PANEL_WIDTH = 128
+PANEL_HEIGHT = 160
+
+# Pin DC usado por el driver, el SPI lo consulta para separar comando y datos
+DC_PIN = 12
+
+
+class ST7735Panel:
+    """
+    Memoria de la pantalla en coordenadas nativas (128x160) y estado de los
+    registros que afectan a la imagen.
+    """
+
+    def __init__ (self):
+        self.ram = bytearray(PANEL_WIDTH * PANEL_HEIGHT * 2)
+        self.madctl = 0
+        self.columns = (0, PANEL_WIDTH - 1)
+        self.rows = (0, PANEL_HEIGHT - 1)
+        self.sleeping = True
+        self.display_on = False
+
+        # Desplazamiento vertical: área fija superior, área de scroll, inferior
+        self.scroll_area = (0, PANEL_HEIGHT, 0)
+        self.scroll_start = 0
+
+        self._command = None
+        self._args = bytearray()
+        self._cursor = None
+
+    def command (self, c):
+        self._command = c
+        self._args = bytearray()
+
+        if c == CMD_RAMWR:
+            self._cursor = [self.columns[0], self.rows[0]]
+        elif c == CMD_SLPIN:
+            self.sleeping = True
+        elif c == CMD_SLPOUT:
+            self.sleeping = False
+        elif c == CMD_DISPOFF:
+            self.display_on = False
+        elif c == CMD_DISPON:
+            self.display_on = True
+
+    def data (self, data):
+        if self._command == CMD_RAMWR:
+            self._write_ram(data)
+            return
+
+        self._args += data
+        args = self._args
+
+        if self._command == CMD_CASET and len(args) >= 4:
+            self.columns = ((args[0] << 8) | args[1], (args[2] << 8) | args[3])
+        elif self._command == CMD_RASET and len(args) >= 4:
+            self.rows = ((args[0] << 8) | args[1], (args[2] << 8) | args[3])
+        elif self._command == CMD_MADCTL and len(args) >= 1:
+            self.madctl = args[0]
+        elif self._command == CMD_VSCRDEF and len(args) >= 6:
+            self.scroll_area = ((args[0] << 8) | args[1],
+                                (args[2] << 8) | args[3],
+                                (args[4] << 8) | args[5])
+        elif self._command == CMD_VSCSAD and len(args) >= 2:
+            self.scroll_start = (args[0] << 8) | args[1]
+
+    def native (self, col, row, madctl=None):
+        """Convierte una dirección (columna, fila) en coordenadas nativas."""
+        madctl = self.madctl if madctl is None else madctl
+
+        if madctl & MADCTL_MV:
+            x, y = row, col
+        else:
+            x, y = col, row
+
+        if madctl & MADCTL_MX:
+            x = PANEL_WIDTH - 1 - x
+
+        if madctl & MADCTL_MY:
+            y = PANEL_HEIGHT - 1 - y
+
+        return x, y
+
+    def _write_ram (self, data):
+        cursor = self._cursor
+        x0, x1 = self.columns
+        y1 = self.rows[1]
+
+        for i in range(0, len(data) - 1, 2):
+            if cursor[1] > y1:
+                break
+
+            x, y = self.native(cursor[0], cursor[1])
+
+            if 0 <= x < PANEL_WIDTH and 0 <= y < PANEL_HEIGHT:
+                offset = (y * PANEL_WIDTH + x) * 2
+                self.ram[offset] = data[i]
+                self.ram[offset + 1] = data[i + 1]
+
+            cursor[0] += 1
+
+            if cursor[0] > x1:
+                cursor[0] = x0
+                cursor[1] += 1
+
+    def visible_row (self, y):
+        """Fila de memoria que se ve en la fila física y según el scroll."""
+        top, area, _ = self.scroll_area
+
+        if top <= y < top + area and area:
+            return top + (y - top + self.scroll_start - top) % area
+
+        return y
+
+    def frame (self, madctl=None):
+        """
+        Devuelve (ancho, alto, bytes RGB888) de la imagen visible orientada
+        según MADCTL, o en negro si la pantalla está apagada.
+        """
+        madctl = self.madctl if madctl is None else madctl
+        landscape = madctl & MADCTL_MV
+        width = PANEL_HEIGHT if landscape else PANEL_WIDTH
+        height = PANEL_WIDTH if landscape else PANEL_HEIGHT
+        rgb = bytearray(width * height * 3)
+
+        if self.sleeping or not self.display_on:
+            return width, height, rgb
+
+        i = 0
+        for row in range(height):
+            for col in range(width):
+                x, y = self.native(col, row, madctl)
+                offset = (self.visible_row(y) * PANEL_WIDTH + x) * 2
+                color = (self.ram[offset] << 8) | self.ram[offset + 1]
+                rgb[i] = ((color >> 11) & 0x1F) * 255 // 31
+                rgb[i + 1] = ((color >> 5) & 0x3F) * 255 // 63
+                rgb[i + 2] = (color & 0x1F) * 255 // 31
+                i += 3
+
+        return width, height, rgb
+
+    def save_png (self, path, madctl=None):
+        width, height, rgb = self.frame(madctl)
+        write_png(path, width, height, rgb)
+
+
+def write_png (path, width, height, rgb):
+    """Guarda una imagen RGB888 en PNG sin dependencias externas."""
+    raw = bytearray()
+    stride = width * 3
+
+    for y in range(height):
+        raw.append(0)
+        raw += rgb[y * stride:(y + 1) * stride]
+
+    def chunk (kind, data):
+        body = kind + data
+        return (struct.pack('>I', len(data)) + body +
+                struct.pack('>I', zlib.crc32(body) & 0xFFFFFFFF))
+
+    with open(path, 'wb') as f:
+        f.write(b'\x89PNG\r\n\x1a\n')
+        f.write(chunk(b'IHDR', struct.pack('>IIBBBBB', width, height, 8, 2, 0, 0, 0)))
+        f.write(chunk(b'IDAT', zlib.compress(bytes(raw), 9)))
+        f.write(chunk(b'IEND', b''))
+
+
+class SimulatedSPI(hostenv.SPI):
+    """
+    SPI conectado a un ST7735Panel. Cada write se registra como
+    (comando activo, es_comando, bytes, microsegundos en el bus).
+    """
+
+    def __init__ (self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.panel = ST7735Panel()
+        self.log = []
+
+    def write (self, buffer):
+        super().write(buffer)
+        data = bytes(buffer)
+        dc = hostenv.PINS.get(DC_PIN)
+        is_command = dc is not None and dc.value() == 0
+
+        if is_command:
+            for c in data:
+                self.panel.command(c)
+        else:
+            self.panel.data(data)
+
+        self.log.append((self.panel._command, is_command, len(data),
+                         self.transfer_us(len(data))))
+
+    def transfer_us (self, size):
+        """Tiempo de transferencia modelado a la velocidad del bus."""
+        return size * 8 * 1000000 / self.baudrate
+
+    def reset_stats (self):
+        super().reset_stats()
+        self.log = []
+
+    def summary (self):
+        """Devuelve writes, bytes, tiempo modelado (us) y writes por comando."""
+        per_command = {}
+
+        for command, _, _, _ in self.log:
+            per_command[command] = per_command.get(command, 0) + 1
+
+        return {
+            'writes': len(self.log),
+            'bytes': sum(entry[2] for entry in self.log),
+            'bus_us': sum(entry[3] for entry in self.log),
+            'per_command': per_command,
+        }
+
+
+# Lecturas de ejemplo con pequeñas variaciones entre fotogramas
+SAMPLE_DATA = {
+    'temperature': (22.4, 0.1),
+    'humidity': (45.2, 0.3),
+    'pressure': (1013.2, 0.1),
+    'air_quality': (62, 1),
+    'co2': (612, 4),
+    'tvoc': (80, 2),
+    'light': (1500.4, 12.5),
+    'uv': (3, 0),
+    'sound': (44.5, 0.7),
+}
+
+
+def apply_sample (data, frame):
+    for key, (base, step) in SAMPLE_DATA.items():
+        value = base + step * ((frame % 5) - 2)
+        data[key]['current'] = value if isinstance(base, float) else int(value)
+
+
+def main ():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument('--frames', type=int, default=10,
+                        help='Ciclos de grid_update() a simular')
+    parser.add_argument('--png', default=None,
+                        help='Ruta del PNG con el último fotograma')
+    parser.add_argument('--orientation', type=int, default=3)
+    parser.add_argument('--grid-shape', default=None,
+                        help='Forma del grid como FILASxCOLUMNAS (2x3, 3x3, 4x2)')
+    parser.add_argument('--baudrate', type=int, default=8000000)
+    parser.add_argument('--framebuffer', action='store_true',
+                        help='Usa el framebuffer en RAM del driver')
+    parser.add_argument('--max-frame-bytes', type=int, default=None,
+                        help='Falla si un fotograma estable supera estos bytes')
+    args = parser.parse_args()
+
+    hostenv.install(spi_class=SimulatedSPI)
+
+    from machine import SPI
+    from Models.DisplayST7735_128x160 import DisplayST7735_128x160
+    from Models.WeatherStation import WeatherStation
+
+    grid_shape = None
+    if args.grid_shape:
+        grid_shape = tuple(int(n) for n in args.grid_shape.lower().split('x'))
+
+    spi = SPI(1, baudrate=args.baudrate)
+    display = DisplayST7735_128x160(spi, rst=9, ce=13, dc=DC_PIN,
+                                    pin_backlight=3,
+                                    orientation=args.orientation,
+                                    framebuffer=args.framebuffer,
+                                    grid_shape=grid_shape)
+
+    spi.reset_stats()
+    display.displayHeadInfo(wifi_status=3)
+    display.displayFooterInfo(center='12:00')
+    display.grid_create()
+    display.flush()
+    setup = spi.summary()
+    drawn, skipped = display.text_stats()
+
+    print('{:<8} {:>8} {:>9} {:>10} {:>10} {:>8} {:>8}'.format(
+        'frame', 'writes', 'bytes', 'bus ms', 'cpu ms', 'glyphs', 'skipped'))
+    print('{:<8} {:>8} {:>9} {:>10.2f} {:>10} {:>8} {:>8}'.format(
+        'setup', setup['writes'], setup['bytes'], setup['bus_us'] / 1000, '-',
+        drawn, skipped))
+
+    worst = 0
+
+    for frame in range(args.frames):
+        apply_sample(WeatherStation.data, frame)
+        spi.reset_stats()
+        start = time.perf_counter()
+        display.grid_update()
+        display.flush()
+        cpu_ms = (time.perf_counter() - start) * 1000
+        stats = spi.summary()
+        drawn, skipped = display.text_stats()
+
+        # El primer fotograma escribe todos los valores, no es régimen estable
+        if frame > 0:
+            worst = max(worst, stats['bytes'])
+
+        print('{:<8} {:>8} {:>9} {:>10.2f} {:>10.2f} {:>8} {:>8}'.format(
+            frame, stats['writes'], stats['bytes'], stats['bus_us'] / 1000,
+            cpu_ms, drawn, skipped))
+
+    if args.png:
+        spi.panel.save_png(args.png)
+        print('Fotograma guardado en {}'.format(os.path.abspath(args.png)))
+
+    if args.max_frame_bytes is not None and worst > args.max_frame_bytes:
+        print('ERROR: {} bytes en un fotograma, máximo {}'.format(
+            worst, args.max_frame_bytes))
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()